@@ -1,16 +1,49 @@
 # AIBBOT/backend/app.py (완전히 수정된 버전)
 
 import os
+import secrets
 import mysql.connector
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv, find_dotenv
 import openai
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 # 향상된 RAG 서비스 임포트
 from rag_service import EnhancedAibbotRAGService
+from sync_jobs import SyncJobManager
+from corpus_events import CorpusEventBus
+from recent_feed import RecentPolicyFeed
+from policy_versions import PolicyVersionCache
+from fuzzy_index import FuzzyTermIndex
+from user_profiles import InvalidProfileError, UserProfileStore
+from conversation_store import ConversationStore
+from llm_usage import llm_usage
+from session_tokens import (
+    InvalidTokenError,
+    PasswordHasher,
+    PasswordHasherBusyError,
+    SessionTokenSigner,
+    TOKEN_TYPE_REFRESH,
+    bearer_token,
+)
+from suggest_index import (
+    SUGGEST_DEFAULT_LIMIT,
+    SUGGEST_MAX_LIMIT,
+    PolicyPopularity,
+    SuggestIndex,
+)
+from policy_browse import (
+    BROWSE_DEFAULT_LIMIT,
+    BROWSE_MAX_LIMIT,
+    CATEGORY_FILTERS,
+    CategoryFacetCache,
+    InvalidCursorError,
+    build_browse_query,
+    decode_cursor,
+    encode_cursor,
+)
 
 # --- Load Environment Variables ---
 print("--- .env 파일 로드 시도 ---")
@@ -37,6 +70,21 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
+# 세션 토큰 서명 키 (여러 프로세스/재시작 간 토큰을 유지하려면 반드시 설정)
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+if not SESSION_SECRET:
+    SESSION_SECRET = secrets.token_urlsafe(32)
+    print(
+        "Warning: SESSION_SECRET not set. 임시 키를 사용하므로 서버 재시작 시 로그인 토큰이 무효화됩니다."
+    )
+session_tokens = SessionTokenSigner(SESSION_SECRET)
+
+# 비밀번호 해시 전용 실행기 (로그인/회원가입 폭주 시 요청 스레드 보호)
+password_hasher = PasswordHasher(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16")),
+)
+
 # 향상된 RAG 서비스 초기화
 db_config = {
     "host": DB_HOST,
@@ -81,105 +129,6 @@ def get_db_connection():
         raise err
 
 
-def get_recent_policies_from_db(days=7, limit=10):
-    """실제로 최근 N일 내 변경된 정책만 가져오는 함수 (수정된 버전)"""
-    policies = []
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cutoff_date = datetime.now() - timedelta(days=days)
-        print(f"실제 최근 {days}일 내 변경된 정책 조회 시작 (기준일: {cutoff_date})")
-
-        # 1. 먼저 sync_logs에서 실제 변경사항이 있었는지 확인
-        cursor.execute(
-            """
-            SELECT SUM(new_policies) as total_new, SUM(updated_policies) as total_updated,
-                   MAX(created_at) as last_sync_time
-            FROM sync_logs 
-            WHERE created_at >= %s AND success = TRUE
-        """,
-            (cutoff_date,),
-        )
-
-        sync_summary = cursor.fetchone()
-        if sync_summary:
-            total_new = sync_summary.get("total_new") or 0
-            total_updated = sync_summary.get("total_updated") or 0
-            last_sync = sync_summary.get("last_sync_time")
-
-            print(
-                f"동기화 로그 확인 - 신규: {total_new}개, 업데이트: {total_updated}개, 마지막 동기화: {last_sync}"
-            )
-
-            # 실제 변경사항이 없으면 빈 리스트 반환
-            if total_new == 0 and total_updated == 0:
-                print("동기화 로그에 실제 변경사항이 없어 빈 결과 반환")
-                return []
-
-        # 2. 실제 변경된 정책들만 조회 (더 엄격한 기준)
-        query = """
-            SELECT 
-                id, biz_nm, biz_cn, utztn_trpr_cn, 
-                biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm,
-                trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr,
-                created_at, updated_at,
-                CASE 
-                    WHEN created_at >= %s THEN 'new'
-                    WHEN updated_at >= %s AND updated_at > created_at AND updated_at >= %s THEN 'updated'
-                    ELSE 'existing'
-                END as policy_status,
-                CASE 
-                    WHEN created_at >= %s THEN created_at 
-                    ELSE updated_at 
-                END as recent_date
-            FROM policies 
-            WHERE (
-                created_at >= %s  -- 실제 신규 생성
-            ) OR (
-                updated_at >= %s AND updated_at > created_at AND updated_at >= %s  -- 실제 내용 업데이트만
-            )
-            ORDER BY recent_date DESC
-            LIMIT %s
-        """
-
-        cursor.execute(
-            query,
-            (
-                cutoff_date,
-                cutoff_date,
-                cutoff_date,
-                cutoff_date,
-                cutoff_date,
-                cutoff_date,
-                cutoff_date,
-                limit,
-            ),
-        )
-        policies = cursor.fetchall()
-
-        # 정책 상태별 개수 계산
-        status_count = {"new": 0, "updated": 0, "existing": 0}
-        for policy in policies:
-            status = policy["policy_status"]
-            status_count[status] = status_count.get(status, 0) + 1
-
-        print(f"실제 최근 {days}일 내 변경된 정책 {len(policies)}개 조회됨")
-        print(f"정책 상태: {status_count}")
-
-    except (ValueError, mysql.connector.Error) as err:
-        print(f"[DB Error] 최근 정책 조회 오류: {err}")
-        raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
-    return policies
-
-
 # DB에서 샘플 정책 데이터를 가져오는 테스트 함수 (기존 유지)
 def get_sample_policies_from_db(limit=3):
     """DB에서 샘플 정책 정보(최대 limit 개수)를 가져와 리스트로 반환"""
@@ -191,7 +140,7 @@ def get_sample_policies_from_db(limit=3):
         cursor = conn.cursor(dictionary=True)
         print(f"DB Fetching sample policies (limit: {limit})")
         cursor.execute(
-            f"SELECT id, biz_nm, biz_cn, utztn_trpr_cn, biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, trgt_child_age, deviw_site_addr FROM policies LIMIT %s",
+            f"SELECT id, biz_nm, biz_cn, utztn_trpr_cn, biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, trgt_child_age, deviw_site_addr FROM policies WHERE is_active = TRUE LIMIT %s",
             (limit,),
         )
         policies = cursor.fetchall()
@@ -225,9 +174,10 @@ def get_policy_details_from_db(policy_id):
                 id, biz_nm, biz_cn, utztn_trpr_cn, 
                 biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, 
                 trgt_child_age, deviw_site_addr, utztn_mthd_cn, 
-                oper_hr_cn, aref_cn, aply_site_addr, created_at, updated_at
+                oper_hr_cn, aref_cn, aply_site_addr, created_at, updated_at,
+                content_hash
             FROM policies 
-            WHERE id = %s
+            WHERE id = %s AND is_active = TRUE
         """
         cursor.execute(query, (policy_id,))
         policy_details = cursor.fetchone()
@@ -246,6 +196,67 @@ def get_policy_details_from_db(policy_id):
     return policy_details
 
 
+# 정책 일괄 조회에서 요청할 수 있는 컬럼 (fields 생략 시 목록 표시용 가벼운 컬럼만 반환)
+POLICY_SELECTABLE_FIELDS = (
+    "id",
+    "biz_nm",
+    "biz_cn",
+    "utztn_trpr_cn",
+    "utztn_mthd_cn",
+    "oper_hr_cn",
+    "aref_cn",
+    "biz_lclsf_nm",
+    "biz_mclsf_nm",
+    "biz_sclsf_nm",
+    "trgt_child_age",
+    "trgt_itrst",
+    "trgt_rgn",
+    "deviw_site_addr",
+    "aply_site_addr",
+    "created_at",
+    "updated_at",
+)
+POLICY_DEFAULT_BATCH_FIELDS = (
+    "id",
+    "biz_nm",
+    "biz_lclsf_nm",
+    "biz_mclsf_nm",
+    "biz_sclsf_nm",
+    "trgt_child_age",
+    "trgt_rgn",
+    "deviw_site_addr",
+)
+MAX_BATCH_POLICY_IDS = 50
+
+
+def get_policies_by_ids_from_db(policy_ids, fields):
+    """여러 정책을 IN 조회 한 번으로 가져와 {id: 정책} 딕셔너리로 반환 (fields 컬럼만)"""
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        columns = ", ".join(fields)  # POLICY_SELECTABLE_FIELDS에서 검증된 컬럼명만 사용
+        placeholders = ", ".join(["%s"] * len(policy_ids))
+        cursor.execute(
+            f"""
+            SELECT {columns}
+            FROM policies
+            WHERE id IN ({placeholders}) AND is_active = TRUE
+        """,
+            list(policy_ids),
+        )
+        return {policy["id"]: policy for policy in cursor.fetchall()}
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"[DB Error] DB Fetch Policies Error: {err}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn and conn.is_connected():
+            conn.close()
+
+
 def generate_chat_response_from_llm(user_message, conversation_history=None):
     """기존 단순 채팅 응답 함수 (RAG 사용하지 않는 경우)"""
     if not OPENAI_API_KEY:
@@ -267,6 +278,7 @@ def generate_chat_response_from_llm(user_message, conversation_history=None):
         response = client.chat.completions.create(
             model=model_name, messages=messages, temperature=0.7, max_tokens=1000
         )
+        llm_usage.record("chat_fallback", response)
         answer = response.choices[0].message.content.strip()
         print(f"LLM chat response successful. Raw answer: {answer}")
         return answer
@@ -275,59 +287,6 @@ def generate_chat_response_from_llm(user_message, conversation_history=None):
         return "채팅 응답 생성 중 오류가 발생했습니다."
 
 
-def save_sync_log(
-    sync_type,
-    new_policies=0,
-    updated_policies=0,
-    unchanged_policies=0,
-    total_processed=None,
-    duration_seconds=None,
-    success=True,
-    error_message=None,
-):
-    """sync_logs 테이블에 동기화 결과 저장"""
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        if total_processed is None:
-            total_processed = new_policies + updated_policies + unchanged_policies
-
-        cursor.execute(
-            """
-            INSERT INTO sync_logs (
-                sync_type, new_policies, updated_policies, unchanged_policies,
-                total_processed, duration_seconds, success, error_message
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """,
-            (
-                sync_type,
-                new_policies,
-                updated_policies,
-                unchanged_policies,
-                total_processed,
-                duration_seconds,
-                success,
-                error_message,
-            ),
-        )
-
-        conn.commit()
-        print(
-            f"sync_logs 저장 완료: {sync_type} - 신규:{new_policies}, 업데이트:{updated_policies}"
-        )
-
-    except mysql.connector.Error as err:
-        print(f"sync_logs 저장 실패: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
-
-
 # --- API Endpoints ---
 @app.route("/")
 def home():
@@ -369,10 +328,12 @@ def handle_get_recent_policies():
         days = max(1, min(days, 30))  # 1일~30일
         limit = max(1, min(limit, 50))  # 1개~50개
 
-        print(f"최근 {days}일, 최대 {limit}개 실제 변경된 정책 조회 요청")
-
-        # 실제 변경된 정책만 조회
-        recent_policies = get_recent_policies_from_db(days, limit)
+        # 동기화 시 만들어진 최근 변경 피드를 메모리에서 잘라 응답 (DB 조회 없음)
+        recent_policies, etag = recent_policy_feed.get(days, limit)
+        if request.if_none_match.contains_weak(etag):
+            not_modified = app.response_class(status=304)
+            not_modified.set_etag(etag, weak=True)
+            return not_modified
 
         # 정책 상태별 개수 계산
         new_count = len([p for p in recent_policies if p.get("policy_status") == "new"])
@@ -401,10 +362,10 @@ def handle_get_recent_policies():
             },
         }
 
-        print(
-            f"응답 데이터: 총 {len(recent_policies)}개, 신규 {new_count}개, 업데이트 {updated_count}개"
-        )
-        return jsonify(response_data)
+        response = jsonify(response_data)
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     except (ValueError, mysql.connector.Error) as err:
         print(f"[API Recent Policies Error] Database error: {err}")
@@ -417,18 +378,64 @@ def handle_get_recent_policies():
         return jsonify({"success": False, "message": f"서버 내부 오류: {str(e)}"}), 500
 
 
+# 정책 상세 응답 캐시 유지 시간 (정책은 하루 몇 번의 동기화 때만 바뀜)
+POLICY_DETAIL_MAX_AGE_SECONDS = 300
+
+
+def _http_datetime(value):
+    """DB TIMESTAMP(서버 로컬 시각)를 HTTP 날짜 비교용 UTC 시각으로 변환 (초 단위)"""
+    if value is None:
+        return None
+    return value.replace(microsecond=0).astimezone(timezone.utc)
+
+
+def _set_policy_cache_headers(response, content_hash, last_modified):
+    if content_hash:
+        response.set_etag(content_hash)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = POLICY_DETAIL_MAX_AGE_SECONDS
+    return response
+
+
+def _is_policy_not_modified(content_hash, last_modified):
+    """조건부 요청 판단 (If-None-Match가 있으면 If-Modified-Since는 무시)"""
+    if request.if_none_match:
+        return bool(content_hash) and request.if_none_match.contains(content_hash)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
 @app.route("/api/policy/<int:policy_id>", methods=["GET"])
 def handle_get_policy_details(policy_id):
     try:
+        # 조건부 요청은 메모리의 버전 정보만으로 304 응답 (TEXT 컬럼 조회 없음)
+        version = policy_versions.get(policy_id)
+        if version:
+            content_hash, updated_at = version
+            last_modified = _http_datetime(updated_at)
+            if _is_policy_not_modified(content_hash, last_modified):
+                return _set_policy_cache_headers(
+                    app.response_class(status=304), content_hash, last_modified
+                )
+
         policy_data = get_policy_details_from_db(policy_id)
         if policy_data:
+            content_hash = policy_data.pop("content_hash", None)
             policy_field_parts = [
                 policy_data.get("biz_lclsf_nm"),
                 policy_data.get("biz_mclsf_nm"),
                 policy_data.get("biz_sclsf_nm"),
             ]
             policy_data["policy_field"] = " > ".join(filter(None, policy_field_parts))
-            return jsonify({"success": True, "data": policy_data})
+            policy_popularity.record([policy_id])
+            return _set_policy_cache_headers(
+                jsonify({"success": True, "data": policy_data}),
+                content_hash,
+                _http_datetime(policy_data.get("updated_at")),
+            )
         else:
             return (
                 jsonify(
@@ -444,6 +451,265 @@ def handle_get_policy_details(policy_id):
         return jsonify({"success": False, "message": f"서버 내부 오류: {str(e)}"}), 500
 
 
+@app.route("/api/policies", methods=["GET"])
+def handle_get_policies_by_ids():
+    """정책 일괄 조회 API (ids=1,2,3&fields=biz_nm,trgt_rgn)"""
+    try:
+        raw_ids = [v.strip() for v in request.args.get("ids", "").split(",") if v.strip()]
+        if not raw_ids:
+            return jsonify({"success": False, "message": "ids 파라미터가 필요합니다."}), 400
+        try:
+            # 요청 순서를 유지하면서 중복 제거
+            policy_ids = list(dict.fromkeys(int(v) for v in raw_ids))
+        except ValueError:
+            return (
+                jsonify({"success": False, "message": "ids는 쉼표로 구분된 정수여야 합니다."}),
+                400,
+            )
+        if len(policy_ids) > MAX_BATCH_POLICY_IDS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "message": f"한 번에 최대 {MAX_BATCH_POLICY_IDS}개까지 조회할 수 있습니다.",
+                    }
+                ),
+                400,
+            )
+
+        raw_fields = request.args.get("fields")
+        if raw_fields:
+            fields = [f.strip() for f in raw_fields.split(",") if f.strip()]
+            unknown = [f for f in fields if f not in POLICY_SELECTABLE_FIELDS]
+            if unknown:
+                return (
+                    jsonify(
+                        {
+                            "success": False,
+                            "message": f"지원하지 않는 필드입니다: {', '.join(unknown)}",
+                            "allowed_fields": list(POLICY_SELECTABLE_FIELDS),
+                        }
+                    ),
+                    400,
+                )
+            # 결과를 ID로 매칭해야 하므로 id는 항상 포함
+            fields = list(dict.fromkeys(["id"] + fields))
+        else:
+            fields = list(POLICY_DEFAULT_BATCH_FIELDS)
+
+        found = get_policies_by_ids_from_db(policy_ids, fields)
+        return jsonify(
+            {
+                "success": True,
+                "data": [found[pid] for pid in policy_ids if pid in found],
+                "missing_ids": [pid for pid in policy_ids if pid not in found],
+            }
+        )
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"[API Policies Error] Database or config error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+    except Exception as e:
+        print(f"[API Policies Error] Unexpected error: {e}")
+        return jsonify({"success": False, "message": f"서버 내부 오류: {str(e)}"}), 500
+
+
+# 채팅 응답의 참고 정책 필드 (detail=minimal|standard|full, 기본 minimal)
+# full은 후보 정책 전체 필드와 query_analysis까지 포함 (디버깅/테스트용)
+CITED_POLICY_FIELDS = {
+    "minimal": ("id", "biz_nm", "biz_mclsf_nm", "final_score", "deviw_site_addr"),
+    "standard": (
+        "id",
+        "biz_nm",
+        "biz_lclsf_nm",
+        "biz_mclsf_nm",
+        "biz_sclsf_nm",
+        "trgt_child_age",
+        "trgt_rgn",
+        "final_score",
+        "deviw_site_addr",
+        "aply_site_addr",
+    ),
+}
+CHAT_DETAIL_LEVELS = ("minimal", "standard", "full")
+
+
+def _project_cited_policies(policies, detail):
+    """참고 정책 목록을 detail 수준에 맞는 필드만 남긴 사본으로 변환"""
+    if detail == "full":
+        return policies
+    fields = CITED_POLICY_FIELDS[detail]
+    return [{field: policy.get(field) for field in fields} for policy in policies]
+
+
+@app.route("/api/policies/browse", methods=["GET"])
+def handle_browse_policies():
+    """
+    정책 목록 탐색 API (분류순 키셋 페이지네이션)
+    ?lclsf=&mclsf=&sclsf=&limit=&cursor=&facets=true
+    """
+    try:
+        limit = request.args.get("limit", default=BROWSE_DEFAULT_LIMIT, type=int)
+        limit = max(1, min(limit, BROWSE_MAX_LIMIT))
+        filters = {
+            param: request.args[param]
+            for param in CATEGORY_FILTERS
+            if request.args.get(param) is not None
+        }
+        cursor_param = request.args.get("cursor")
+        try:
+            after = decode_cursor(cursor_param) if cursor_param else None
+        except InvalidCursorError as err:
+            return jsonify({"success": False, "message": str(err)}), 400
+
+        sql, params = build_browse_query(
+            POLICY_DEFAULT_BATCH_FIELDS, filters, after, limit
+        )
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+        has_more = len(rows) > limit
+        policies = rows[:limit]
+        response_data = {
+            "success": True,
+            "data": policies,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(policies[-1]) if has_more else None,
+        }
+        # 패싯은 첫 페이지에서 기본 포함 (facets=false로 생략, facets=true로 강제)
+        include_facets = request.args.get(
+            "facets", "false" if cursor_param else "true"
+        ).lower() in ("1", "true", "yes")
+        if include_facets:
+            response_data["facets"] = category_facets.get()
+        return jsonify(response_data)
+
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"[API Browse Error] Database or config error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+    except Exception as e:
+        print(f"[API Browse Error] Unexpected error: {e}")
+        return jsonify({"success": False, "message": f"서버 내부 오류: {str(e)}"}), 500
+
+
+@app.route("/api/suggest", methods=["GET"])
+def handle_suggest():
+    """정책명/분류명 자동완성 API (?q=첫만남, 초성 입력 가능)"""
+    query = (request.args.get("q") or "").strip()
+    limit = request.args.get("limit", default=SUGGEST_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    if not query:
+        return jsonify({"success": True, "query": query, "suggestions": []})
+
+    try:
+        suggestions = suggest_index.suggest(query, limit)
+        for suggestion in suggestions:
+            suggestion.pop("weight", None)
+        return jsonify({"success": True, "query": query, "suggestions": suggestions})
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"[API Suggest Error] Database or config error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+    except Exception as e:
+        print(f"[API Suggest Error] Unexpected error: {e}")
+        return jsonify({"success": False, "message": f"서버 내부 오류: {str(e)}"}), 500
+
+
+def _authenticated_user_id():
+    """
+    Authorization: Bearer access 토큰의 사용자 ID (서명/만료만 확인, DB 조회 없음)
+    헤더가 없으면 None, 토큰이 잘못되었으면 InvalidTokenError
+    """
+    token = bearer_token(request.headers.get("Authorization"))
+    if token is None:
+        return None
+    return session_tokens.verify(token)["sub"]
+
+
+def _unauthorized(message):
+    response = jsonify({"success": False, "message": message})
+    response.status_code = 401
+    response.headers["WWW-Authenticate"] = "Bearer"
+    return response
+
+
+def _authorize_profile_access(user_id):
+    """프로필 API 권한 확인 - 본인 토큰이면 None, 아니면 오류 응답"""
+    try:
+        token_user_id = _authenticated_user_id()
+    except InvalidTokenError as err:
+        return _unauthorized(str(err))
+    if token_user_id is None:
+        return _unauthorized("로그인이 필요합니다.")
+    if token_user_id != user_id:
+        return (
+            jsonify({"success": False, "message": "다른 사용자의 프로필입니다."}),
+            403,
+        )
+    return None
+
+
+def _profile_response(profile, features):
+    """프로필 API 응답 형식 (QUA 프롬프트 블록은 내부용이라 제외)"""
+    features = {k: v for k, v in features.items() if k != "prompt_context"}
+    return {"success": True, "profile": profile, "features": features}
+
+
+@app.route("/api/users/<int:user_id>/profile", methods=["GET"])
+def handle_get_user_profile(user_id):
+    """서버에 저장된 사용자 프로필과 파생 특성 조회 (본인 access 토큰 필요)"""
+    denied = _authorize_profile_access(user_id)
+    if denied:
+        return denied
+    try:
+        profile, features = user_profile_store.get(user_id)
+        if profile is None:
+            return (
+                jsonify({"success": False, "message": "저장된 프로필이 없습니다."}),
+                404,
+            )
+        return jsonify(_profile_response(profile, features))
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"[API Profile Error] Database or config error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+
+
+@app.route("/api/users/<int:user_id>/profile", methods=["PUT"])
+def handle_save_user_profile(user_id):
+    """사용자 프로필 저장 - 파생 특성(자녀 개월 수, 자치구 코드 등)은 저장 시 계산 (본인 access 토큰 필요)"""
+    denied = _authorize_profile_access(user_id)
+    if denied:
+        return denied
+    if not request.is_json:
+        return jsonify({"success": False, "message": "Request body must be JSON"}), 400
+
+    profile = request.get_json()
+    try:
+        features = user_profile_store.save(user_id, profile)
+        return jsonify(_profile_response(profile, features))
+    except InvalidProfileError as err:
+        return jsonify({"success": False, "message": str(err)}), 400
+    except mysql.connector.Error as err:
+        if err.errno == 1452:  # 외래 키 위반 - 존재하지 않는 사용자
+            return (
+                jsonify({"success": False, "message": "사용자를 찾을 수 없습니다."}),
+                404,
+            )
+        print(f"[API Profile Error] Database error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+    except ValueError as err:
+        print(f"[API Profile Error] Config error: {err}")
+        return jsonify({"success": False, "message": str(err)}), 500
+
+
 @app.route("/api/chat", methods=["POST"])
 def handle_chat():
     """향상된 RAG 기반 채팅 API"""
@@ -452,8 +718,17 @@ def handle_chat():
 
     data = request.get_json()
     user_message = data.get("message")
-    user_profile = data.get("user_profile")  # 프론트엔드에서 사용자 프로필 전달
-    user_id = data.get("user_id")  # 로그인한 사용자 ID (선택적)
+    user_profile = data.get("user_profile")  # 프론트엔드에서 사용자 프로필 전달 (이전 방식)
+    user_id = data.get("user_id")  # 로그인한 사용자 ID (선택적, 서버 저장 프로필 사용)
+    session_id = data.get("session_id")  # 대화 세션 ID (첫 메시지는 생략, 응답의 값을 다음 요청에 전달)
+    detail = data.get("detail") or request.args.get("detail") or "minimal"
+    if detail not in CHAT_DETAIL_LEVELS:
+        return (
+            jsonify(
+                {"error": f"Field 'detail' must be one of {', '.join(CHAT_DETAIL_LEVELS)}"}
+            ),
+            400,
+        )
 
     if (
         not user_message
@@ -462,37 +737,89 @@ def handle_chat():
     ):
         return jsonify({"error": "Field 'message' is missing or empty"}), 400
 
+    # 로그인 사용자는 access 토큰으로 인증 (토큰 검증만 하고 users 테이블은 조회하지 않음)
+    try:
+        token_user_id = _authenticated_user_id()
+    except InvalidTokenError as err:
+        return _unauthorized(str(err))
+    if user_id is not None and user_id != token_user_id:
+        return _unauthorized("user_id를 사용하려면 해당 사용자의 access 토큰이 필요합니다.")
+    user_id = token_user_id
+
+    # 프로필을 보내지 않은 로그인 사용자는 서버에 저장된 프로필과 캐시된 파생 특성 사용
+    profile_features = None
+    if user_id is not None and not user_profile:
+        try:
+            user_profile, profile_features = user_profile_store.get(user_id)
+        except (ValueError, mysql.connector.Error) as err:
+            # 프로필을 못 읽어도 일반 검색으로 답변
+            print(f"[Chat] 사용자 프로필 조회 실패 (프로필 없이 진행): {err}")
+
+    conversation = conversation_store.get_or_create(
+        session_id if isinstance(session_id, str) else None, user_id
+    )
+
     print(f"\n--- New Enhanced RAG Chat Request ---")
     print(f"User message: {user_message}")
     print(f"User profile provided: {bool(user_profile)}")
     print(f"User ID: {user_id}")
+    print(f"Session: {conversation.session_id} (이전 메시지 {len(conversation.messages)}개)")
 
     # Enhanced RAG 서비스 사용 가능 여부 확인
     if not enhanced_rag_service or not OPENAI_API_KEY:
         print("Enhanced RAG Service 또는 OpenAI API 키가 없어서 기본 채팅으로 처리")
-        response_text = generate_chat_response_from_llm(user_message)
+        response_text = generate_chat_response_from_llm(
+            user_message, conversation.history()
+        )
+        conversation.record_turn(user_message, response_text)
+        conversation_store.save(conversation)
         return jsonify(
-            {"answer": response_text, "processing_pipeline": "Fallback to basic chat"}
+            {
+                "answer": response_text,
+                "processing_pipeline": "Fallback to basic chat",
+                "session_id": conversation.session_id,
+            }
         )
 
     try:
         # Enhanced RAG 처리 (QUA → HRA → AGA)
         rag_result = enhanced_rag_service.process_query(
-            user_query=user_message, user_profile=user_profile
+            user_query=user_message,
+            user_profile=user_profile,
+            profile_features=profile_features,
+            conversation=conversation,
+        )
+
+        policy_popularity.record(
+            policy.get("id") for policy in rag_result.get("cited_policies", [])
+        )
+
+        # 다음 턴이 이어 쓸 수 있도록 분석 결과/인용 정책을 세션에 저장
+        conversation.record_turn(
+            user_message,
+            rag_result["answer"],
+            qua_result=rag_result.get("query_analysis"),
+            cited_policies=rag_result.get("cited_policies", []),
         )
+        conversation_store.save(conversation)
 
-        # 응답 구성
+        # 응답 구성 (참고 정책은 detail 수준에 맞게 축약, 분석 결과는 full에서만 포함)
         response_data = {
             "answer": rag_result["answer"],
-            "cited_policies": rag_result.get("cited_policies", []),
+            "cited_policies": _project_cited_policies(
+                rag_result.get("cited_policies", []), detail
+            ),
             "personalized": rag_result.get("personalized", False),
             "search_results_count": rag_result.get("search_results_count", 0),
             "confidence_score": rag_result.get("confidence_score", 0),
             "processing_pipeline": rag_result.get(
                 "processing_pipeline", "Enhanced RAG"
             ),
-            "query_analysis": rag_result.get("query_analysis", {}),
+            "session_id": conversation.session_id,
         }
+        if detail == "full":
+            response_data["query_analysis"] = rag_result.get("query_analysis", {})
+            response_data["token_usage"] = rag_result.get("token_usage", {})
 
         print(f"Enhanced RAG Response prepared:")
         print(f"- 참조 정책: {len(rag_result.get('cited_policies', []))}개")
@@ -507,105 +834,190 @@ def handle_chat():
     except Exception as e:
         print(f"[Enhanced RAG Chat Error] Enhanced RAG 처리 중 오류: {e}")
         # Enhanced RAG 실패 시 기본 채팅으로 폴백
-        fallback_response = generate_chat_response_from_llm(user_message)
+        fallback_response = generate_chat_response_from_llm(
+            user_message, conversation.history()
+        )
+        conversation.record_turn(user_message, fallback_response)
+        conversation_store.save(conversation)
         return jsonify(
             {
                 "answer": fallback_response,
                 "cited_policies": [],
                 "personalized": False,
                 "processing_pipeline": "Fallback due to error",
+                "session_id": conversation.session_id,
                 "error": f"Enhanced RAG 처리 중 문제가 발생하여 기본 응답으로 처리했습니다: {str(e)}",
             }
         )
 
 
-@app.route("/api/sync-policies", methods=["POST"])
-def handle_manual_sync():
-    """수동 정책 동기화 API (완전히 수정된 버전)"""
+@app.route("/api/llm-usage", methods=["GET"])
+def handle_llm_usage():
+    """프로세스 시작 이후 단계별 LLM 토큰 사용량 (입력/출력/프롬프트 캐시 적중)"""
+    return jsonify({"success": True, "stages": llm_usage.snapshot()})
+
+
+def _import_sync_module():
+    """프로젝트 루트의 sync_data 모듈 임포트 (backend 디렉토리에서 실행되는 경우 대비)"""
+    import sys
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.append(parent_dir)
+
+    import sync_data
+
+    return sync_data
+
+
+def _run_startup_migrations():
+    """앱 시작 시 미적용 DB 마이그레이션 적용 (AUTO_MIGRATE=false로 끌 수 있음)"""
+    if os.getenv("AUTO_MIGRATE", "true").lower() in ("0", "false", "no"):
+        return
+    _import_sync_module()  # 프로젝트 루트를 sys.path에 추가
+    import migrate
+
     try:
-        import sys
-        import os
+        applied = migrate.run_migrations()
+        if applied:
+            print(f"DB 마이그레이션 적용 완료: {applied}")
+    except Exception as e:
+        print(f"DB 마이그레이션 실패 (python migrate.py로 직접 실행 가능): {e}")
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir not in sys.path:
-            sys.path.append(parent_dir)
 
-        from sync_data import PolicySyncService
+def _create_sync_service(progress_callback=None):
+    """백그라운드 동기화 작업용 PolicySyncService 생성"""
+    return _import_sync_module().PolicySyncService(progress_callback=progress_callback)
 
-        print("수동 정책 동기화 요청 받음")
 
-        policy_service = PolicySyncService()
-        result = policy_service.sync_policies()
+def _on_sync_job_finished(job, result):
+    """동기화 작업 완료 시 sync_logs 테이블에 결과 저장 및 변경 이벤트 즉시 확인"""
+    if result.get("skipped"):
+        # 다른 프로세스가 동기화 중이어서 실행하지 않은 경우는 기록하지 않음
+        return
 
-        if result["success"]:
-            stats = result.get("stats", {})
-            total_changes = result.get("total_changes", 0)
+    if result.get("generation"):
+        corpus_events.poll_now()
 
-            # sync_logs 테이블에 결과 저장
-            try:
-                save_sync_log(
-                    sync_type="manual",
-                    new_policies=stats.get("new", 0),
-                    updated_policies=stats.get("updated", 0),
-                    unchanged_policies=stats.get("unchanged", 0),
-                    success=True,
-                )
-            except Exception as log_error:
-                print(f"sync_logs 저장 실패: {log_error}")
+    duration = None
+    if job.started_at and job.finished_at:
+        duration = (job.finished_at - job.started_at).total_seconds()
 
-            if total_changes == 0:
-                return jsonify(
-                    {
-                        "success": True,
-                        "message": "동기화 완료: 새로운 변경사항이 없습니다.",
-                        "changes": {
-                            "new_policies": 0,
-                            "updated_policies": 0,
-                            "total_changes": 0,
-                        },
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-            else:
-                return jsonify(
-                    {
-                        "success": True,
-                        "message": result["message"],
-                        "changes": {
-                            "new_policies": stats.get("new", 0),
-                            "updated_policies": stats.get("updated", 0),
-                            "total_changes": total_changes,
-                        },
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-        else:
-            # 실패 로그 저장
-            try:
-                save_sync_log(
-                    sync_type="manual",
-                    success=False,
-                    error_message=result.get("message", "알 수 없는 오류"),
-                )
-            except Exception as log_error:
-                print(f"sync_logs 실패 저장 실패: {log_error}")
+    _create_sync_service().save_sync_log(
+        job.sync_type,
+        stats=result.get("stats"),
+        duration_seconds=duration,
+        success=result.get("success", False),
+        error_message=None if result.get("success") else result.get("message"),
+        partial=result.get("partial", False),
+    )
+
+
+sync_job_manager = SyncJobManager(_create_sync_service, on_finished=_on_sync_job_finished)
+
+_run_startup_migrations()
+
+# 정책 데이터 변경 이벤트 (다른 프로세스의 동기화 포함) - 캐시/인덱스는 여기에 구독
+corpus_events = CorpusEventBus(get_db_connection)
+
+# 최근 변경 정책 피드 (동기화가 만든 피드를 메모리에 두고 변경 이벤트 시에만 다시 읽음)
+recent_policy_feed = RecentPolicyFeed(
+    get_db_connection, rebuild=lambda: _create_sync_service().refresh_recent_feed()
+)
+corpus_events.subscribe(recent_policy_feed.invalidate)
+
+# 정책 상세 조건부 요청용 버전 캐시 (변경 이벤트로 바뀐 정책만 다시 읽음)
+policy_versions = PolicyVersionCache(get_db_connection)
+corpus_events.subscribe(policy_versions.on_corpus_change)
+
+# 정책 탐색용 분류 패싯 (정책 데이터 세대마다 한 번 계산)
+category_facets = CategoryFacetCache(get_db_connection)
+corpus_events.subscribe(category_facets.invalidate)
+
+# 정책명/분류명 자동완성 (정책 상세 조회/채팅 인용 횟수로 순위 가중)
+policy_popularity = PolicyPopularity()
+suggest_index = SuggestIndex(get_db_connection, popularity=policy_popularity)
+corpus_events.subscribe(suggest_index.on_corpus_change)
+
+# 서버 측 사용자 프로필 (채팅은 user_id만으로 프로필/파생 특성 사용)
+user_profile_store = UserProfileStore(get_db_connection)
+
+# 채팅 대화 세션 (CONVERSATION_SPILL=true면 메모리 상한을 넘은 세션을 MySQL에 보관)
+conversation_store = ConversationStore(
+    get_db_connection
+    if os.getenv("CONVERSATION_SPILL", "false").lower() in ("1", "true", "yes")
+    else None,
+    ttl_seconds=int(os.getenv("CONVERSATION_TTL_SECONDS", "1800")),
+    max_sessions=int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000")),
+    history_token_budget=int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1200")),
+)
 
-            return jsonify({"success": False, "message": result["message"]}), 500
+# HRA 검색어 오타 교정 인덱스 (정책명/분류명 단어의 자모 단위 삭제 사전)
+policy_term_index = FuzzyTermIndex(get_db_connection)
+corpus_events.subscribe(policy_term_index.on_corpus_change)
+if enhanced_rag_service:
+    enhanced_rag_service.hra.term_index = policy_term_index
+corpus_events.start()
 
+
+@app.route("/api/sync-policies", methods=["POST"])
+def handle_manual_sync():
+    """수동 정책 동기화 API - 백그라운드 작업을 등록하고 작업 ID를 즉시 반환"""
+    try:
+        _import_sync_module()
     except ImportError as e:
         print(f"sync_data 모듈 import 실패: {e}")
         return (
             jsonify({"success": False, "message": "동기화 모듈을 찾을 수 없습니다."}),
             500,
         )
-    except Exception as e:
-        print(f"수동 동기화 오류: {e}")
+
+    print("수동 정책 동기화 요청 받음")
+    job, created = sync_job_manager.submit(sync_type="manual")
+    job_data = sync_job_manager.snapshot(job)
+    status_url = f"/api/sync-jobs/{job.id}"
+
+    if not created:
         return (
-            jsonify({"success": False, "message": f"동기화 중 오류 발생: {str(e)}"}),
-            500,
+            jsonify(
+                {
+                    "success": False,
+                    "message": "이미 진행 중인 동기화 작업이 있습니다.",
+                    "job_id": job.id,
+                    "status_url": status_url,
+                    "job": job_data,
+                }
+            ),
+            409,
         )
 
+    return (
+        jsonify(
+            {
+                "success": True,
+                "message": "동기화 작업이 등록되었습니다.",
+                "job_id": job.id,
+                "status_url": status_url,
+                "job": job_data,
+                "timestamp": datetime.now().isoformat(),
+            }
+        ),
+        202,
+    )
+
+
+@app.route("/api/sync-jobs/<job_id>", methods=["GET"])
+def handle_get_sync_job(job_id):
+    """동기화 작업 진행 상황 조회 API"""
+    job = sync_job_manager.get(job_id)
+    if not job:
+        return (
+            jsonify({"success": False, "message": "해당 ID의 동기화 작업이 없습니다."}),
+            404,
+        )
+    return jsonify({"success": True, "job": sync_job_manager.snapshot(job)})
+
 
 # --- User Authentication Endpoints ---
 @app.route("/api/signup", methods=["POST"])
@@ -635,7 +1047,10 @@ def handle_signup():
             400,
         )
 
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = password_hasher.run(generate_password_hash, password)
+    except PasswordHasherBusyError as err:
+        return jsonify({"success": False, "message": str(err)}), 503, {"Retry-After": "1"}
     conn = None
     cursor = None
     try:
@@ -730,22 +1145,6 @@ def handle_login():
             (username,),
         )
         user = cursor.fetchone()
-
-        if user and check_password_hash(user["password_hash"], password):
-            user_info = {"id": user["id"], "username": user["username"]}
-            return jsonify(
-                {"success": True, "message": "로그인 성공!", "user": user_info}
-            )
-        else:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": "사용자 이름 또는 비밀번호가 올바르지 않습니다.",
-                    }
-                ),
-                401,
-            )
     except (ValueError, mysql.connector.Error) as err:
         print(f"[API Login Error] Database or config error: {err}")
         return (
@@ -764,28 +1163,67 @@ def handle_login():
         if conn and conn.is_connected():
             conn.close()
 
+    # 해시 확인은 DB 연결을 반납한 뒤 전용 실행기에서 (로그인 시에만 수행)
+    try:
+        password_ok = bool(user) and password_hasher.run(
+            check_password_hash, user["password_hash"], password
+        )
+    except PasswordHasherBusyError as err:
+        return jsonify({"success": False, "message": str(err)}), 503, {"Retry-After": "1"}
+
+    if password_ok:
+        user_info = {"id": user["id"], "username": user["username"]}
+        return jsonify(
+            {
+                "success": True,
+                "message": "로그인 성공!",
+                "user": user_info,
+                **session_tokens.issue(user["id"], user["username"]),
+            }
+        )
+    return (
+        jsonify(
+            {
+                "success": False,
+                "message": "사용자 이름 또는 비밀번호가 올바르지 않습니다.",
+            }
+        ),
+        401,
+    )
+
+
+@app.route("/api/token/refresh", methods=["POST"])
+def handle_refresh_token():
+    """refresh 토큰으로 access/refresh 토큰 재발급 (서명 검증만 하며 DB 조회 없음)"""
+    data = request.get_json(silent=True)
+    refresh_token = data.get("refresh_token") if isinstance(data, dict) else None
+    if not refresh_token or not isinstance(refresh_token, str):
+        return (
+            jsonify({"success": False, "message": "Field 'refresh_token' is missing"}),
+            400,
+        )
+
+    try:
+        payload = session_tokens.verify(refresh_token, TOKEN_TYPE_REFRESH)
+    except InvalidTokenError as err:
+        return _unauthorized(str(err))
+    return jsonify(
+        {"success": True, **session_tokens.issue(payload["sub"], payload["usr"])}
+    )
+
 
 # --- App Run ---
 if __name__ == "__main__":
     print(f"Starting Flask server (Enhanced RAG + Auto Policy Sync Ready)...")
     print(f"RAG Pipeline: QUA → HRA → AGA")
     print(f"새로운 API: /api/recent-policies (실제 새 정책 조회)")
-    print(f"관리자 API: /api/sync-policies (수동 동기화)")
+    print(f"관리자 API: /api/sync-policies (수동 동기화 작업 등록)")
+    print(f"관리자 API: /api/sync-jobs/<job_id> (동기화 작업 상태 조회)")
     print(f"Access at http://127.0.0.1:5001")
 
     # 백그라운드 자동 동기화 시작 (선택적)
     try:
-        import sys
-        import os
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir not in sys.path:
-            sys.path.append(parent_dir)
-
-        from sync_data import start_auto_sync
-
-        start_auto_sync()
+        _import_sync_module().start_auto_sync()
         print("자동 정책 동기화 백그라운드 서비스 시작됨")
     except Exception as e:
         print(f"자동 동기화 시작 실패 (수동 실행 가능): {e}")
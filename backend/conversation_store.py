@@ -0,0 +1,283 @@
+# AIBBOT/backend/conversation_store.py
+# 채팅 대화 세션 저장소 (LRU 상한 + TTL 만료 + 선택적 MySQL 스필)
+#
+# 세션마다 최근 대화, 직전 턴의 QUA 분석 결과, 인용한 정책(ID/이름)을 보관해
+# 후속 질문("그거 신청은 어떻게 해?")이 이전 검색 상태를 이어 쓰도록 함.
+# - 프로세스 메모리에 최근 사용 순으로 최대 max_sessions개 보관
+# - 마지막 사용 후 ttl_seconds가 지나면 만료 (스필된 세션도 같은 만료 시각 적용)
+# - connection_factory를 주면 상한을 넘어 밀려난 세션을 conversation_sessions 테이블에 저장했다가
+#   다시 요청이 오면 읽어 옴 (주지 않으면 밀려난 세션은 버림)
+# - LLM에 넘길 대화 기록은 토큰 예산 안에서 최근 메시지부터 잘라 사용
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+CONVERSATION_TTL_SECONDS = 30 * 60
+CONVERSATION_MAX_SESSIONS = 1000
+HISTORY_TOKEN_BUDGET = 1200
+# 메모리에 보관하는 최대 메시지 수 (사용자/답변 각각 1개씩 = 턴당 2개)
+MAX_STORED_MESSAGES = 20
+# 저장하는 메시지 한 개의 최대 길이 (긴 답변 하나가 예산을 모두 차지하지 않도록)
+MAX_MESSAGE_CHARS = 800
+# 메시지마다 붙는 역할/구분 토큰 추정치
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 토큰 수 추정
+    한글은 대략 글자당 1토큰, 그 외 문자는 4글자당 1토큰으로 계산 (실제보다 약간 크게 잡음)
+    """
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣" or "ㄱ" <= ch <= "ㅣ")
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def trim_history(
+    messages: List[Dict[str, str]], token_budget: int
+) -> List[Dict[str, str]]:
+    """최근 메시지부터 token_budget 안에 들어가는 만큼만 남김 (순서 유지)"""
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        cost = estimate_tokens(message["content"]) + _MESSAGE_OVERHEAD_TOKENS
+        if used + cost > token_budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    # 답변만 남고 그 질문이 잘린 경우 답변도 제외 (대화가 assistant로 시작하지 않도록)
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
+
+
+class ConversationSession:
+    """대화 세션 1개의 상태"""
+
+    def __init__(
+        self,
+        session_id: str,
+        user_id: Optional[int] = None,
+        history_token_budget: int = HISTORY_TOKEN_BUDGET,
+    ):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.history_token_budget = history_token_budget
+        self.messages: List[Dict[str, str]] = []
+        self.qua_result: Optional[Dict[str, Any]] = None  # 직전 턴의 질문 분석 결과
+        # 직전 턴에 인용한 정책 ({"id", "biz_nm"} - 후속 질문에서 정책을 이름/순서로 가리킬 때 사용)
+        self.cited_policies: List[Dict[str, Any]] = []
+        self.last_active = time.time()
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.messages)
+
+    @property
+    def cited_policy_ids(self) -> List[int]:
+        return [policy["id"] for policy in self.cited_policies]
+
+    def history(self) -> List[Dict[str, str]]:
+        """LLM 호출용 대화 기록 (토큰 예산으로 자른 복사본)"""
+        return trim_history(self.messages, self.history_token_budget)
+
+    def record_turn(
+        self,
+        user_message: str,
+        answer: str,
+        qua_result: Optional[Dict[str, Any]] = None,
+        cited_policies: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.messages.append({"role": "user", "content": user_message[:MAX_MESSAGE_CHARS]})
+        self.messages.append({"role": "assistant", "content": answer[:MAX_MESSAGE_CHARS]})
+        del self.messages[:-MAX_STORED_MESSAGES]
+        if qua_result is not None:
+            self.qua_result = qua_result
+        if cited_policies is not None:
+            self.cited_policies = [
+                {"id": policy["id"], "biz_nm": policy.get("biz_nm") or ""}
+                for policy in cited_policies
+                if policy.get("id") is not None
+            ]
+        self.last_active = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "qua_result": self.qua_result,
+            "cited_policies": self.cited_policies,
+            "last_active": self.last_active,
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        session_id: str,
+        user_id: Optional[int],
+        data: Dict[str, Any],
+        history_token_budget: int,
+    ) -> "ConversationSession":
+        session = cls(session_id, user_id, history_token_budget)
+        session.messages = data.get("messages") or []
+        session.qua_result = data.get("qua_result")
+        session.cited_policies = data.get("cited_policies") or []
+        session.last_active = data.get("last_active") or time.time()
+        return session
+
+
+class ConversationStore:
+    """세션 ID → ConversationSession (LRU + TTL, 선택적 MySQL 스필)"""
+
+    def __init__(
+        self,
+        connection_factory: Optional[Callable[[], Any]] = None,
+        ttl_seconds: float = CONVERSATION_TTL_SECONDS,
+        max_sessions: int = CONVERSATION_MAX_SESSIONS,
+        history_token_budget: int = HISTORY_TOKEN_BUDGET,
+    ):
+        self.connection_factory = connection_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.history_token_budget = history_token_budget
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+    def get_or_create(
+        self, session_id: Optional[str], user_id: Optional[int] = None
+    ) -> ConversationSession:
+        """
+        세션 조회 - 없거나 만료되었거나 다른 사용자의 세션이면 새 세션 생성
+        (로그인 사용자의 세션은 같은 사용자만 이어 쓸 수 있음)
+        """
+        session = self._find(session_id) if session_id else None
+        if session is not None and session.user_id not in (None, user_id):
+            session = None
+        if session is None:
+            session = ConversationSession(
+                uuid.uuid4().hex, user_id, self.history_token_budget
+            )
+        elif session.user_id is None:
+            session.user_id = user_id
+        return session
+
+    def save(self, session: ConversationSession):
+        """턴 기록 후 호출 - 최근 사용으로 표시하고 상한을 넘은 세션은 스필/삭제"""
+        session.last_active = time.time()
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            self._purge_expired_locked()
+            overflow = []
+            while len(self._sessions) > self.max_sessions:
+                overflow.append(self._sessions.popitem(last=False)[1])
+        if overflow and self.connection_factory:
+            self._spill(overflow)
+
+    def _find(self, session_id: str) -> Optional[ConversationSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if self._is_expired(session):
+                    del self._sessions[session_id]
+                    return None
+                self._sessions.move_to_end(session_id)
+                return session
+        if self.connection_factory:
+            return self._load_spilled(session_id)
+        return None
+
+    def _is_expired(self, session: ConversationSession) -> bool:
+        return session.last_active + self.ttl_seconds <= time.time()
+
+    def _purge_expired_locked(self):
+        # 최근 사용 순으로 정렬되어 있으므로 가장 오래된 쪽부터 만료된 것만 제거
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if not self._is_expired(oldest):
+                break
+            self._sessions.popitem(last=False)
+
+    def _spill(self, sessions: List[ConversationSession]):
+        conn = None
+        cursor = None
+        try:
+            conn = self.connection_factory()
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO conversation_sessions (session_id, user_id, state_json, expires_at)
+                VALUES (%s, %s, %s, FROM_UNIXTIME(%s))
+                ON DUPLICATE KEY UPDATE
+                    user_id = VALUES(user_id),
+                    state_json = VALUES(state_json),
+                    expires_at = VALUES(expires_at)
+            """,
+                [
+                    (
+                        session.session_id,
+                        session.user_id,
+                        json.dumps(session.to_dict(), ensure_ascii=False, default=str),
+                        int(session.last_active + self.ttl_seconds),
+                    )
+                    for session in sessions
+                ],
+            )
+            # 만료된 스필 세션 정리 (한 번에 조금씩)
+            cursor.execute(
+                "DELETE FROM conversation_sessions WHERE expires_at < NOW() LIMIT 100"
+            )
+            conn.commit()
+        except Exception as e:
+            # 스필 실패는 대화 맥락만 잃을 뿐 요청 처리에는 영향 없음
+            print(f"[Conversation] 세션 스필 실패 ({len(sessions)}개 세션 버림): {e}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def _load_spilled(self, session_id: str) -> Optional[ConversationSession]:
+        conn = None
+        cursor = None
+        try:
+            conn = self.connection_factory()
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT user_id, state_json FROM conversation_sessions
+                WHERE session_id = %s AND expires_at > NOW()
+            """,
+                (session_id,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            user_id, state_json = row
+            loaded = ConversationSession.from_dict(
+                session_id, user_id, json.loads(state_json), self.history_token_budget
+            )
+            # 행을 지우기 전에 메모리에 먼저 되돌려 둠 - 요청이 save() 전에 실패해도 대화가 사라지지 않음
+            # (같은 세션을 동시에 읽은 다른 요청이 먼저 넣었으면 그 세션을 사용)
+            with self._lock:
+                session = self._sessions.setdefault(session_id, loaded)
+                self._sessions.move_to_end(session_id)
+            # 메모리로 돌아온 세션은 다음 스필 때 다시 저장되므로 행은 삭제
+            cursor.execute(
+                "DELETE FROM conversation_sessions WHERE session_id = %s", (session_id,)
+            )
+            conn.commit()
+            return session
+        except Exception as e:
+            print(f"[Conversation] 스필된 세션 조회 실패: {e}")
+            with self._lock:
+                return self._sessions.get(session_id)
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
@@ -0,0 +1,162 @@
+# AIBBOT/backend/corpus_events.py
+# 정책 데이터 변경 이벤트 버스 (동기화 → 앱 프로세스 내 캐시/인덱스 무효화)
+#
+# 동기화는 변경된 정책 ID를 corpus_generation 테이블에 새 세대로 기록하고,
+# 각 앱 프로세스의 CorpusEventBus가 이 테이블을 폴링해 구독자에게 순서대로 전달함.
+# 같은 프로세스에서 끝난 동기화는 poll_now()로 즉시 전달 가능.
+
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class CorpusChangeEvent:
+    """정책 데이터 1세대 분의 변경 내역"""
+
+    def __init__(
+        self,
+        generation: int,
+        created_ids: List[int],
+        updated_ids: List[int],
+        deleted_ids: List[int],
+    ):
+        self.generation = generation
+        self.created_ids = created_ids
+        self.updated_ids = updated_ids
+        self.deleted_ids = deleted_ids
+
+    @property
+    def changed_ids(self) -> List[int]:
+        """생성/변경/삭제된 전체 정책 ID"""
+        return self.created_ids + self.updated_ids + self.deleted_ids
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "generation": self.generation,
+            "created_ids": self.created_ids,
+            "updated_ids": self.updated_ids,
+            "deleted_ids": self.deleted_ids,
+        }
+
+
+class CorpusEventBus:
+    """
+    corpus_generation 테이블 폴링 기반 변경 이벤트 버스
+    - 시작 시점의 최신 세대부터 구독 (이전 변경은 구독자가 초기 적재 시 이미 반영했다고 가정)
+    - 구독자 콜백은 폴링 스레드에서 세대 순서대로 호출됨
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        poll_interval: float = 5.0,
+        batch_limit: int = 100,
+    ):
+        self.connection_factory = connection_factory
+        self.poll_interval = poll_interval
+        self.batch_limit = batch_limit
+        self._subscribers: List[Callable[[CorpusChangeEvent], None]] = []
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._generation: Optional[int] = None
+
+    @property
+    def generation(self) -> Optional[int]:
+        """이 프로세스가 반영한 마지막 세대 (아직 읽지 못했으면 None)"""
+        with self._lock:
+            return self._generation
+
+    def subscribe(self, callback: Callable[[CorpusChangeEvent], None]):
+        """변경 이벤트 구독 등록"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def start(self):
+        """폴링 스레드 시작 (여러 번 호출해도 한 번만 시작)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._poll_loop, name="corpus-events", daemon=True
+            )
+            self._thread.start()
+
+    def poll_now(self):
+        """다음 폴링 주기를 기다리지 않고 즉시 새 세대 확인 (같은 프로세스의 동기화 종료 시)"""
+        self._wakeup.set()
+
+    def _poll_loop(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[CorpusEventBus] 변경 이벤트 조회 실패: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def poll(self) -> int:
+        """새 세대를 읽어 구독자에게 전달. 전달한 이벤트 수 반환"""
+        with self._poll_lock:
+            if self._generation is None:
+                self._generation = self._fetch_latest_generation()
+                return 0
+
+            events = self._fetch_events_after(self._generation)
+            for event in events:
+                self._dispatch(event)
+                with self._lock:
+                    self._generation = event.generation
+            return len(events)
+
+    def _dispatch(self, event: CorpusChangeEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                # 구독자 하나의 오류가 다른 구독자 무효화를 막지 않도록 함
+                print(f"[CorpusEventBus] 구독자 처리 실패 (세대 {event.generation}): {e}")
+
+    def _fetch_latest_generation(self) -> int:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(generation), 0) FROM corpus_generation")
+            return int(cursor.fetchone()[0])
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+    def _fetch_events_after(self, generation: int) -> List[CorpusChangeEvent]:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT generation, created_ids, updated_ids, deleted_ids
+                FROM corpus_generation
+                WHERE generation > %s
+                ORDER BY generation
+                LIMIT %s
+            """,
+                (generation, self.batch_limit),
+            )
+            return [
+                CorpusChangeEvent(
+                    int(row[0]),
+                    json.loads(row[1] or "[]"),
+                    json.loads(row[2] or "[]"),
+                    json.loads(row[3] or "[]"),
+                )
+                for row in cursor.fetchall()
+            ]
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
@@ -0,0 +1,191 @@
+# AIBBOT/backend/fuzzy_index.py
+# 정책 검색어 오타 교정 인덱스 (자모 단위 SymSpell 삭제 사전)
+#
+# - 정책명/분류명의 단어를 자모열로 분해해 두고, 최대 편집 거리만큼 자모를 지운 문자열 → 단어 사전을 만듦
+# - 조회 시 입력도 같은 방식으로 지워 사전을 찾고, 후보만 실제 편집 거리로 확인 ("양육수담" → "양육수당")
+# - 자모 단위라 받침 하나 틀린 오타는 거리 1, 음절 단위 비교보다 교정이 정확함
+# - 접두사(prefix_length 자모)만 삭제 사전에 넣어 긴 정책명에서도 메모리 사용량을 제한
+# - 정책 데이터 세대가 바뀌면(변경 이벤트) 새로 만들어 교체
+
+import threading
+from collections import Counter
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from hangul import decompose, normalize, tokenize
+
+FUZZY_MAX_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 10
+# 자모 수가 이보다 짧은 입력(두 음절 이하)은 거리 1까지만 교정 (짧은 단어는 거리 2면 엉뚱한 단어가 됨)
+FUZZY_SHORT_TERM_LENGTH = 7
+# 자모 수가 이보다 짧은 입력(한 음절)은 교정하지 않음
+FUZZY_MIN_TERM_LENGTH = 4
+# 검색어 하나당 추가할 최대 교정어 수
+FUZZY_MAX_CORRECTIONS = 2
+
+
+def _deletes(key: str, max_distance: int) -> Set[str]:
+    """key에서 자모를 최대 max_distance개까지 지운 문자열 집합 (key 자신 포함)"""
+    variants = {key}
+    for count in range(1, min(max_distance, len(key)) + 1):
+        for positions in combinations(range(len(key)), count):
+            removed = set(positions)
+            variants.add("".join(ch for i, ch in enumerate(key) if i not in removed))
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    인접 전치를 포함한 편집 거리 (OSA)
+    max_distance를 넘는 것이 확실해지면 max_distance + 1을 바로 반환
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class _FuzzyData:
+    """한 세대 분의 삭제 사전 (만든 뒤에는 변경하지 않음)"""
+
+    def __init__(self, max_distance: int, prefix_length: int):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms: Dict[str, Tuple[str, int]] = {}  # 자모열 → (단어, 등장 정책 수)
+        self._deletes: Dict[str, List[str]] = {}  # 지운 접두사 → 자모열 목록
+
+    def build(self, term_counts: Counter):
+        for term, count in term_counts.items():
+            key = decompose(term)
+            if len(key) < FUZZY_MIN_TERM_LENGTH or key in self.terms:
+                continue
+            self.terms[key] = (term, count)
+            for variant in _deletes(key[: self.prefix_length], self.max_distance):
+                self._deletes.setdefault(variant, []).append(key)
+
+    def lookup(self, term: str, max_distance: int) -> List[Tuple[str, int, int]]:
+        """편집 거리 max_distance 이내 단어의 (단어, 거리, 등장 정책 수) 목록 - 가까운 순"""
+        key = decompose(term)
+        candidates: Set[str] = set()
+        for variant in _deletes(key[: self.prefix_length], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                word, count = self.terms[candidate]
+                matches.append((word, distance, count))
+        matches.sort(key=lambda match: (match[1], -match[2], match[0]))
+        return matches
+
+
+class FuzzyTermIndex:
+    """정책명/분류명 단어의 자모 단위 오타 교정 인덱스"""
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        max_distance: int = FUZZY_MAX_DISTANCE,
+        prefix_length: int = FUZZY_PREFIX_LENGTH,
+    ):
+        self.connection_factory = connection_factory
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._lock = threading.Lock()
+        self._data: Optional[_FuzzyData] = None
+
+    def on_corpus_change(self, event=None):
+        """정책 변경 이벤트 구독용 - 이벤트 스레드에서 새 사전을 만들어 교체"""
+        data = self._build()
+        with self._lock:
+            self._data = data
+
+    def correct(self, term: str) -> List[str]:
+        """
+        검색어의 교정 후보 (정규화된 단어, 가까운 순)
+        정규화한 검색어가 이미 사전에 있으면 교정하지 않음
+        """
+        normalized = normalize(term)
+        key = decompose(normalized)
+        if len(key) < FUZZY_MIN_TERM_LENGTH:
+            return []
+        data = self._get_data()
+        if key in data.terms:
+            return []
+        max_distance = 1 if len(key) < FUZZY_SHORT_TERM_LENGTH else self.max_distance
+        matches = data.lookup(normalized, min(max_distance, self.max_distance))
+        return [word for word, _, _ in matches[:FUZZY_MAX_CORRECTIONS]]
+
+    def expand(self, keywords: Iterable[str]) -> List[str]:
+        """
+        검색어 목록에 교정어를 더한 목록 (원래 검색어 순서 유지, 중복 제거)
+        여러 단어로 된 검색어는 전체와 각 단어를 따로 교정
+        """
+        expanded: Dict[str, None] = {}
+        for keyword in keywords:
+            if not keyword:
+                continue
+            expanded[keyword] = None
+            words = tokenize(keyword)
+            for candidate in ([keyword] + words) if len(words) > 1 else [keyword]:
+                for correction in self.correct(candidate):
+                    expanded.setdefault(correction, None)
+        return list(expanded)
+
+    def _get_data(self) -> _FuzzyData:
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._build()
+                data = self._data
+        return data
+
+    def _build(self) -> _FuzzyData:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT biz_nm, biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm
+                FROM policies
+                WHERE is_active = TRUE
+            """
+            )
+            rows = cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+        # 단어별 등장 정책 수 (동률 후보 중 흔한 단어를 우선)
+        term_counts: Counter = Counter()
+        for row in rows:
+            terms = set()
+            for text in row:
+                if not text:
+                    continue
+                terms.update(tokenize(text))
+                terms.add(normalize(text))  # 띄어쓰기 없이 붙여 쓴 전체 이름
+            term_counts.update(terms)
+
+        data = _FuzzyData(self.max_distance, self.prefix_length)
+        data.build(term_counts)
+        return data
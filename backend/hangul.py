@@ -0,0 +1,88 @@
+# AIBBOT/backend/hangul.py
+# 한글 처리 유틸리티 (자모 분해, 초성 추출, 검색용 정규화)
+#
+# 자동완성/오타 교정 인덱스가 공통으로 사용.
+# 자모 분해 시 겹받침/이중모음도 낱자로 풀어 입력 중인 글자("첫마" → "첫만")도 접두사로 일치하게 함.
+
+import re
+from typing import List
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSUNG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# 겹받침/이중모음 → 입력 순서대로의 낱자 (키보드로 칠 때 거치는 중간 상태와 맞추기 위함)
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ",
+    "ㄵ": "ㄴㅈ",
+    "ㄶ": "ㄴㅎ",
+    "ㄺ": "ㄹㄱ",
+    "ㄻ": "ㄹㅁ",
+    "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ",
+    "ㄿ": "ㄹㅍ",
+    "ㅀ": "ㄹㅎ",
+    "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ",
+    "ㅙ": "ㅗㅐ",
+    "ㅚ": "ㅗㅣ",
+    "ㅝ": "ㅜㅓ",
+    "ㅞ": "ㅜㅔ",
+    "ㅟ": "ㅜㅣ",
+    "ㅢ": "ㅡㅣ",
+}
+
+_CHOSUNG_SET = frozenset(CHOSUNG)
+_NON_WORD = re.compile(r"[^0-9a-z가-힣ㄱ-ㅣ]+")
+
+
+def is_syllable(ch: str) -> bool:
+    return _SYLLABLE_BASE <= ord(ch) <= _SYLLABLE_LAST
+
+
+def normalize(text: str) -> str:
+    """검색 키 정규화 - 소문자화하고 한글/영문/숫자 외 문자(공백 포함) 제거"""
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """공백/기호 기준 단어 분리 (정규화된 단어 목록)"""
+    return [token for token in _NON_WORD.split((text or "").lower()) if token]
+
+
+def to_chosung(text: str) -> str:
+    """음절을 초성으로 변환 ("첫만남" → "ㅊㅁㄴ"), 음절이 아닌 문자는 그대로"""
+    result = []
+    for ch in text:
+        if is_syllable(ch):
+            result.append(CHOSUNG[(ord(ch) - _SYLLABLE_BASE) // 588])
+        else:
+            result.append(ch)
+    return "".join(result)
+
+
+def is_chosung_only(text: str) -> bool:
+    """초성만으로 이루어진 입력인지 ("ㅊㅁㄴ")"""
+    return bool(text) and all(ch in _CHOSUNG_SET for ch in text)
+
+
+def decompose(text: str) -> str:
+    """음절을 낱자 자모열로 분해 ("첫만" → "ㅊㅓㅅㅁㅏㄴ"), 겹받침/이중모음도 분리"""
+    result = []
+    for ch in text:
+        if is_syllable(ch):
+            offset = ord(ch) - _SYLLABLE_BASE
+            jamos = (
+                CHOSUNG[offset // 588],
+                JUNGSUNG[(offset % 588) // 28],
+                JONGSUNG[offset % 28].strip(),
+            )
+            for jamo in jamos:
+                result.append(_COMPOUND_JAMO.get(jamo, jamo))
+        else:
+            result.append(_COMPOUND_JAMO.get(ch, ch))
+    return "".join(result)
@@ -0,0 +1,78 @@
+# AIBBOT/backend/llm_usage.py
+# LLM 호출 단계별 토큰 사용량 집계 (입력/출력/프롬프트 캐시 적중 토큰)
+#
+# - 프로세스 누적값: 단계(qua, qua_follow_up, aga, chat_fallback)별 호출 수와 토큰 수
+# - 요청별 값: collect() 블록 안에서 같은 스레드가 기록한 사용량만 따로 모음 (응답의 token_usage)
+# 캐시 적중 토큰(cached_tokens)은 프롬프트 앞부분이 이전 호출과 같을 때 공급자가 재사용한 입력 토큰 수.
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """OpenAI chat completion 응답의 usage에서 토큰 수 추출 (없는 값은 0)"""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "calls": 1,
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+def _add(totals: Dict[str, Dict[str, int]], stage: str, usage: Dict[str, int]):
+    stage_totals = totals.setdefault(stage, dict.fromkeys(_FIELDS, 0))
+    for field in _FIELDS:
+        stage_totals[field] += usage[field]
+
+
+class LLMUsageStats:
+    """단계별 토큰 사용량 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._local = threading.local()
+
+    def record(self, stage: str, response: Any) -> Dict[str, int]:
+        usage = usage_from_response(response)
+        with self._lock:
+            _add(self._totals, stage, usage)
+        request_totals = getattr(self._local, "request_totals", None)
+        if request_totals is not None:
+            _add(request_totals, stage, usage)
+        return usage
+
+    @contextmanager
+    def collect(self) -> Iterator[Dict[str, Dict[str, int]]]:
+        """블록 안에서 현재 스레드가 기록한 사용량을 단계별로 모은 dict를 제공"""
+        previous = getattr(self._local, "request_totals", None)
+        self._local.request_totals = {}
+        try:
+            yield self._local.request_totals
+        finally:
+            self._local.request_totals = previous
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """누적 사용량 + 입력 토큰 중 캐시 적중 비율"""
+        with self._lock:
+            result = {}
+            for stage, totals in self._totals.items():
+                prompt_tokens = totals["prompt_tokens"]
+                result[stage] = {
+                    **totals,
+                    "cached_ratio": (
+                        round(totals["cached_tokens"] / prompt_tokens, 3)
+                        if prompt_tokens
+                        else 0.0
+                    ),
+                }
+            return result
+
+
+# 프로세스 전체에서 공유하는 집계 (RAG 에이전트와 기본 채팅이 함께 기록)
+llm_usage = LLMUsageStats()
@@ -0,0 +1,137 @@
+# AIBBOT/backend/policy_browse.py
+# 정책 목록 탐색 (키셋 페이지네이션 + 분류 패싯)
+#
+# (biz_lclsf_nm, biz_mclsf_nm, id) 순서의 키셋 커서로 페이지를 넘기므로
+# OFFSET 없이 idx_browse 인덱스의 커서 위치부터 읽어 깊은 페이지도 첫 페이지와 비용이 같음.
+# 분류 컬럼은 마이그레이션으로 NULL 대신 ''를 저장해 커서 비교가 항상 정의되도록 함.
+
+import base64
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BROWSE_DEFAULT_LIMIT = 20
+BROWSE_MAX_LIMIT = 100
+
+# 분류 필터 파라미터 → 컬럼
+CATEGORY_FILTERS = {
+    "lclsf": "biz_lclsf_nm",
+    "mclsf": "biz_mclsf_nm",
+    "sclsf": "biz_sclsf_nm",
+}
+
+
+class InvalidCursorError(ValueError):
+    """커서 문자열을 해석할 수 없는 경우"""
+
+
+def encode_cursor(policy: Dict[str, Any]) -> str:
+    """페이지 마지막 정책의 정렬 키를 불투명한 커서 문자열로 변환"""
+    key = [policy["biz_lclsf_nm"], policy["biz_mclsf_nm"], policy["id"]]
+    raw = json.dumps(key, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        lclsf, mclsf, policy_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(lclsf), str(mclsf), int(policy_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("잘못된 커서입니다.") from e
+
+
+def build_browse_query(
+    fields: Sequence[str],
+    filters: Dict[str, str],
+    after: Optional[Tuple[str, str, int]],
+    limit: int,
+) -> Tuple[str, List[Any]]:
+    """
+    키셋 페이지 조회 SQL 생성 (다음 페이지 존재 여부 확인을 위해 limit + 1개 조회)
+    fields는 호출 측에서 허용 목록으로 검증된 컬럼명이어야 함
+    """
+    columns = list(dict.fromkeys(["id", "biz_lclsf_nm", "biz_mclsf_nm", *fields]))
+    conditions = ["is_active = TRUE"]
+    params: List[Any] = []
+    for param, column in CATEGORY_FILTERS.items():
+        if param in filters:
+            conditions.append(f"{column} = %s")
+            params.append(filters[param])
+    if after:
+        # 행 생성자 비교 (a, b, id) > (...)는 is_active 고정 접두사 뒤에서 인덱스 범위 조회로
+        # 바뀌지 않아 커서 앞의 행을 모두 훑게 되므로, 풀어 쓴 OR 형태로 idx_browse 범위 조회를 유도
+        conditions.append(
+            "(biz_lclsf_nm > %s OR (biz_lclsf_nm = %s AND "
+            "(biz_mclsf_nm > %s OR (biz_mclsf_nm = %s AND id > %s))))"
+        )
+        lclsf, mclsf, policy_id = after
+        params.extend([lclsf, lclsf, mclsf, mclsf, policy_id])
+    params.append(limit + 1)
+
+    sql = f"""
+        SELECT {', '.join(columns)}
+        FROM policies
+        WHERE {' AND '.join(conditions)}
+        ORDER BY biz_lclsf_nm, biz_mclsf_nm, id
+        LIMIT %s
+    """
+    return sql, params
+
+
+class CategoryFacetCache:
+    """
+    대/중/소분류 계층별 활성 정책 수
+    정책 데이터 세대마다 한 번만 계산 (변경 이벤트를 받으면 다음 요청에서 다시 계산)
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any]):
+        self.connection_factory = connection_factory
+        self._lock = threading.Lock()
+        self._facets: Optional[List[Dict[str, Any]]] = None
+
+    def invalidate(self, event=None):
+        """정책 변경 이벤트 구독용"""
+        with self._lock:
+            self._facets = None
+
+    def get(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._facets is None:
+                self._facets = self._compute()
+            return self._facets
+
+    def _compute(self) -> List[Dict[str, Any]]:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, COUNT(*)
+                FROM policies
+                WHERE is_active = TRUE
+                GROUP BY biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm
+                ORDER BY biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm
+            """
+            )
+            rows = cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+        tree: Dict[str, Dict[str, Any]] = {}
+        for lclsf, mclsf, sclsf, count in rows:
+            large = tree.setdefault(lclsf, {"name": lclsf, "count": 0, "children": {}})
+            medium = large["children"].setdefault(
+                mclsf, {"name": mclsf, "count": 0, "children": []}
+            )
+            large["count"] += count
+            medium["count"] += count
+            medium["children"].append({"name": sclsf, "count": count})
+
+        return [
+            {**large, "children": list(large["children"].values())}
+            for large in tree.values()
+        ]
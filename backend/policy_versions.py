@@ -0,0 +1,81 @@
+# AIBBOT/backend/policy_versions.py
+# 정책 버전 캐시 (정책 ID → content_hash, updated_at)
+#
+# 정책 상세 API의 조건부 요청(If-None-Match / If-Modified-Since)을
+# TEXT 컬럼을 읽지 않고 메모리에서 판단하기 위한 작은 캐시.
+# 처음 사용할 때 활성 정책 전체의 (id, content_hash, updated_at)만 한 번 읽고,
+# 이후에는 정책 변경 이벤트로 바뀐 ID만 다시 읽음.
+
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+PolicyVersion = Tuple[str, datetime]  # (content_hash, updated_at)
+
+
+class PolicyVersionCache:
+    """활성 정책의 ID → (content_hash, updated_at) 캐시"""
+
+    def __init__(self, connection_factory: Callable[[], Any], chunk_size: int = 500):
+        self.connection_factory = connection_factory
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._versions: Optional[Dict[int, PolicyVersion]] = None
+
+    def get(self, policy_id: int) -> Optional[PolicyVersion]:
+        """정책 버전 조회 (캐시에 없으면 None - 아직 이벤트가 도착하지 않은 신규 정책일 수 있음)"""
+        with self._lock:
+            if self._versions is None:
+                self._versions = self._load_all()
+            return self._versions.get(policy_id)
+
+    def on_corpus_change(self, event):
+        """정책 변경 이벤트 구독용 - 변경/삭제된 ID만 다시 읽음"""
+        with self._lock:
+            if self._versions is None:
+                return  # 아직 적재 전이면 처음 사용할 때 최신 상태로 읽음
+        fresh = self._load_ids(event.changed_ids)
+        with self._lock:
+            if self._versions is None:
+                return
+            for policy_id in event.changed_ids:
+                self._versions.pop(policy_id, None)
+            self._versions.update(fresh)
+
+    def _load_all(self) -> Dict[int, PolicyVersion]:
+        return self._query(
+            "SELECT id, content_hash, updated_at FROM policies WHERE is_active = TRUE",
+            (),
+        )
+
+    def _load_ids(self, policy_ids: Iterable[int]) -> Dict[int, PolicyVersion]:
+        policy_ids = list(policy_ids)
+        versions: Dict[int, PolicyVersion] = {}
+        for offset in range(0, len(policy_ids), self.chunk_size):
+            chunk = policy_ids[offset : offset + self.chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            versions.update(
+                self._query(
+                    f"""
+                    SELECT id, content_hash, updated_at FROM policies
+                    WHERE id IN ({placeholders}) AND is_active = TRUE
+                """,
+                    chunk,
+                )
+            )
+        return versions
+
+    def _query(self, sql: str, params) -> Dict[int, PolicyVersion]:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return {
+                policy_id: (content_hash or "", updated_at)
+                for policy_id, content_hash, updated_at in cursor.fetchall()
+            }
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
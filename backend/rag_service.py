@@ -1,81 +1,168 @@
 import mysql.connector
 import re
 import json
-from datetime import datetime
+import threading
+from string import Template
 from typing import List, Dict, Optional, Any, Tuple
 
-
-class QueryUnderstandingAgent:
-    """QUA - 사용자 질문 이해 및 분석 에이전트"""
-
-    def __init__(self, openai_client):
-        self.client = openai_client
-
-    def analyze_user_query(
-        self, user_query: str, user_profile: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """
-        사용자 질문을 분석하여 의도, 키워드, 엔티티 추출
-        팀원 설계안의 QUA 단계 구현
-        """
-
-        # 사용자 프로필 정보 구성
-        profile_context = ""
-        if user_profile:
-            profile_context = f"""
-등록된 사용자 정보:
-- 거주 지역: {user_profile.get('region', '정보 없음')}
-- 자녀 유무: {user_profile.get('hasChild', '정보 없음')}
-- 자녀 정보: {self._format_children_info(user_profile.get('children', []))}
-- 자산 수준: {user_profile.get('asset', '정보 없음')}
-"""
-
-        # QUA 프롬프트 구성
-        qua_prompt = f"""
-당신은 사용자의 질문을 분석하여 핵심 의도와 주요 정보를 추출하는 AI 에이전트입니다.
+from hangul import normalize
+from llm_usage import llm_usage
+from user_profiles import SEOUL_DISTRICT_CODES, derive_features, profile_fingerprint
+
+# 후속 질문 분류 결과
+TURN_REFINEMENT = "refinement"  # 직전 질문의 조건만 바꿈 ("강남구는?", "둘째는?")
+TURN_NEW_TOPIC = "new_topic"  # 새 질문 - 전체 분석
+TURN_POLICY_DETAIL = "policy_detail"  # 직전 답변의 특정 정책에 대한 질문 - 검색 없이 정책 조회
+
+# 직전 답변의 정책을 가리키는 표현
+_DEMONSTRATIVE = re.compile(r"(그거|그것|그건|그게|이거|이것|이건|저거|그 정책|이 정책|해당 정책|거기)")
+_ORDINAL = re.compile(r"(첫|두|세|1|2|3)\s*(번째|번)")
+_ORDINAL_INDEX = {"첫": 0, "1": 0, "두": 1, "2": 1, "세": 2, "3": 2}
+# 정책 상세 질문 표현 (신청 방법, 대상, 금액 등)
+_DETAIL_WORDS = re.compile(
+    r"(신청|방법|대상|자격|조건|서류|기간|언제|어디|얼마|금액|지원\s*내용|문의|연락처|링크|사이트)"
+)
+# 조건만 바꾸는 짧은 후속 질문에서 뽑는 엔티티
+_AGE_PATTERN = re.compile(r"(만\s*\d+\s*세|\d+\s*살|\d+\s*개월|신생아|영아|유아|초등학생)")
+_CHILD_COUNT_PATTERN = re.compile(r"(첫째|둘째|셋째|넷째|다자녀)")
+_DISTRICT_ALIASES = {
+    district[:-1] if len(district) > 2 else district: district
+    for district in SEOUL_DISTRICT_CODES
+}
+# 이 길이(공백/기호 제외 글자 수) 이하의 후속 질문만 규칙으로 조건 변경을 판단
+_REFINEMENT_MAX_CHARS = 15
+# 조건 표현을 뺀 나머지가 이 길이 이하여야 함 ("서초구는요" → "는요")
+_REFINEMENT_MAX_REMAINDER = 4
+
+# --- 프롬프트 템플릿 ---
+# 공급자 프롬프트 캐시(앞부분이 같은 요청의 입력 토큰 재사용)를 위해
+# 호출마다 같은 지시문/스키마/규칙은 system 메시지(고정 접두부)에, 요청별 내용은 마지막 user 메시지에 둠.
+# 고정 접두부는 모듈 로드 시 한 번만 만들고, 요청별 부분은 미리 만든 Template에 값만 채움.
+
+_QUA_SYSTEM_PROMPT = """당신은 정확한 JSON 형식으로만 응답하는 질문 분석 전문가입니다.
+사용자의 질문을 분석하여 핵심 의도와 주요 정보를 추출하는 AI 에이전트로서,
 서울시 육아 정책 데이터베이스 검색에 최적화된 정보를 추출해주세요.
 
-사용자 질문: "{user_query}"
-{profile_context}
-
 다음 형식으로 JSON 응답해주세요:
-{{
+{
     "intent": "핵심 질문 의도 (예: 출산 지원금 문의, 양육 수당 문의, 다자녀 혜택 문의 등)",
     "search_keywords": ["정책명이나 내용 검색에 사용할 핵심 단어들"],
-    "entities": {{
+    "entities": {
         "region": "표준화된 지역명 (예: 강남구, 서초구 등. 없으면 null)",
         "child_age_keywords": ["나이 관련 표준 키워드들 (예: 만 0세, 영아, 유아 등)"],
         "child_count_keywords": ["자녀 수 관련 키워드들 (예: 첫째, 둘째, 다자녀 등)"],
         "policy_types": ["정책 유형 키워드들 (예: 지원금, 수당, 보육, 의료 등)"]
-    }},
+    },
     "enhanced_queries": ["검색 효과를 높이기 위한 확장 검색어 2-3개"],
     "user_situation_summary": "사용자 상황 요약 (답변 생성 시 참고용)"
-}}
+}
 
 지역명 표준화 규칙:
-- "강남", "강남구", "Gangnam" → "강남구"  
+- "강남", "강남구", "Gangnam" → "강남구"
 - "서초", "서초구" → "서초구"
 - 기타 서울시 25개 자치구 표준명 사용
 
 나이 표준화 규칙:
 - "갓 태어난", "신생아", "0살" → "만 0세", "영아"
-- "두 돌", "2살" → "만 2세", "유아"  
+- "두 돌", "2살" → "만 2세", "유아"
 - "어린이집", "유치원" 관련 → "영유아", "만 3-5세"
 """
 
+_QUA_USER_TEMPLATE = Template('사용자 질문: "$query"\n$profile_context')
+
+_FOLLOW_UP_SYSTEM_PROMPT = f"""대화 중 사용자의 새 메시지를 분류하고 JSON으로만 답하세요.
+- {TURN_POLICY_DETAIL}: 직전 답변의 정책 하나에 대한 질문 → {{"turn_type": "{TURN_POLICY_DETAIL}", "policy_id": 정책ID}}
+- {TURN_REFINEMENT}: 같은 주제에서 조건만 바뀜 → {{"turn_type": "{TURN_REFINEMENT}", "patch": {{바뀐 필드만 (intent, search_keywords, entities의 일부)}}}}
+- {TURN_NEW_TOPIC}: 다른 주제 → {{"turn_type": "{TURN_NEW_TOPIC}"}}
+"""
+
+_FOLLOW_UP_USER_TEMPLATE = Template(
+    '직전 분석: $previous_summary\n직전 답변의 정책:\n$policy_list\n새 메시지: "$query"'
+)
+
+_AGA_SYSTEM_PROMPT = """당신은 서울시 육아 정책을 안내하는 전문 AI 상담가 '아이뽓'입니다. 정확하고 친절한 맞춤 답변을 제공합니다.
+
+사용자 메시지로 사용자 상황, 질문, 질문 의도와 검색된 관련 정책 정보가 주어집니다.
+그 정보를 바탕으로 다음 규칙에 따라 답변해주세요:
+
+1. 사용자의 구체적 상황을 고려한 맞춤형 답변 제공
+2. 각 정책을 명확히 구분하여 설명 (번호 또는 제목으로)
+3. 지원 내용, 대상, 신청 방법을 구체적으로 안내
+4. 답변 마지막에 반드시 다음 형식으로 참고 정책 명시:
+
+📋 참고 정책:
+- [정책명] (정책ID: XX)
+- [정책명] (정책ID: XX)
+
+5. 불확실한 정보는 추측하지 말고 확인이 필요하다고 안내
+6. 친근하고 전문적인 톤 유지
+7. 일반 텍스트로만 답변하세요. 마크다운 목적의 기호 사용을 엄금합니다. ** 같은 별표나 해시 기호 등 특수문자는 사용하지 마세요.
+"""
+
+_AGA_USER_TEMPLATE = Template(
+    """사용자 상황: $situation
+사용자 질문: "$query"
+질문 의도: $intent
+
+다음은 검색된 관련 정책 정보입니다:
+$context
+
+답변:"""
+)
+
+_AGA_POLICY_TEMPLATE = Template(
+    """
+[정책 정보 $index]
+정책명: $name
+정책 ID: $id
+핵심 내용: $content...
+지원 대상: $target...
+이용 방법: $method...
+관련도 점수: $score점
+상세 링크: $link
+"""
+)
+
+
+class QueryUnderstandingAgent:
+    """QUA - 사용자 질문 이해 및 분석 에이전트"""
+
+    def __init__(self, openai_client):
+        self.client = openai_client
+
+    def analyze_user_query(
+        self,
+        user_query: str,
+        user_profile: Optional[Dict] = None,
+        profile_features: Optional[Dict] = None,
+    ) -> Dict[str, Any]:
+        """
+        사용자 질문을 분석하여 의도, 키워드, 엔티티 추출
+        팀원 설계안의 QUA 단계 구현
+        profile_features: 프로필 파생 특성 (서버 저장 프로필은 캐시된 값을 그대로 사용)
+        """
+
+        # 사용자 프로필 정보 구성 (나이/자녀 정보 블록은 파생 특성에 미리 계산되어 있음)
+        if user_profile and profile_features is None:
+            profile_features = derive_features(user_profile)
+        profile_context = profile_features["prompt_context"] if profile_features else ""
+
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
+                    {"role": "system", "content": _QUA_SYSTEM_PROMPT},
                     {
-                        "role": "system",
-                        "content": "당신은 정확한 JSON 형식으로만 응답하는 질문 분석 전문가입니다.",
+                        "role": "user",
+                        "content": _QUA_USER_TEMPLATE.substitute(
+                            query=user_query, profile_context=profile_context
+                        ),
                     },
-                    {"role": "user", "content": qua_prompt},
                 ],
                 temperature=0.1,  # 일관된 분석을 위해 낮은 온도
                 max_tokens=800,
             )
+            llm_usage.record("qua", response)
 
             # JSON 파싱 시도
             raw_response = response.choices[0].message.content.strip()
@@ -98,32 +185,171 @@ class QueryUnderstandingAgent:
             # 폴백: 기본 분석 결과 반환
             return self._create_fallback_analysis(user_query, user_profile)
 
-    def _format_children_info(self, children: List[Dict]) -> str:
-        """자녀 정보를 읽기 좋은 형태로 포맷"""
-        if not children:
-            return "자녀 정보 없음"
-
-        formatted = []
-        for i, child in enumerate(children, 1):
-            gender = child.get("gender", "성별 미상")
-            birthdate = child.get("birthdate", "생년월일 미상")
-            age = (
-                self._calculate_age(birthdate)
-                if birthdate != "생년월일 미상"
-                else "나이 미상"
-            )
-            formatted.append(f"{i}째 ({gender}, {birthdate}, 만 {age}세)")
+    def analyze_follow_up(
+        self,
+        user_query: str,
+        previous: Dict[str, Any],
+        cited_policies: List[Dict[str, Any]],
+        user_profile: Optional[Dict] = None,
+        profile_features: Optional[Dict] = None,
+    ) -> Dict[str, Any]:
+        """
+        대화 중 후속 질문 분석 - 직전 턴의 분석 결과에서 바뀐 부분만 갱신
+        1. 규칙: 직전 답변의 정책을 가리키는 상세 질문 / 지역·나이·자녀 순서만 바꾼 짧은 질문
+        2. 작은 LLM 프롬프트: 분류와 바뀐 필드만 JSON으로 받음
+        3. 새 주제이거나 판단할 수 없으면 전체 분석 (analyze_user_query)
+        결과의 turn_type: refinement / new_topic / policy_detail (policy_detail은 target_policy_id 포함)
+        """
+        # 직전 턴의 분류 결과는 이어받지 않음
+        previous = {
+            key: value
+            for key, value in previous.items()
+            if key not in ("turn_type", "target_policy_id", "analysis_mode")
+        }
+        result = self._classify_follow_up_by_rules(user_query, previous, cited_policies)
+        if result is None:
+            result = self._classify_follow_up_by_llm(user_query, previous, cited_policies)
+        if result is None:
+            result = self.analyze_user_query(user_query, user_profile, profile_features)
+            result["turn_type"] = TURN_NEW_TOPIC
+            result["analysis_mode"] = "full"
 
-        return ", ".join(formatted)
+        print(
+            f"[QUA] 후속 질문 분석: {result['turn_type']} ({result['analysis_mode']})"
+        )
+        return result
+
+    def _classify_follow_up_by_rules(
+        self, user_query: str, previous: Dict, cited_policies: List[Dict]
+    ) -> Optional[Dict[str, Any]]:
+        # 직전 답변의 정책 상세 질문 - 정책명 언급, "두 번째", "그거" 등
+        target = self._referenced_policy(user_query, cited_policies)
+        if target is not None and _DETAIL_WORDS.search(user_query):
+            return {
+                **previous,
+                "turn_type": TURN_POLICY_DETAIL,
+                "target_policy_id": target["id"],
+                "analysis_mode": "rules",
+            }
+
+        # 조건만 바꾼 짧은 질문 ("서초구는?", "둘째는요?", "만 3세면?")
+        compact = normalize(user_query)
+        if len(compact) > _REFINEMENT_MAX_CHARS:
+            return None
+        entities = dict(previous.get("entities") or {})
+        matched = []
+        for alias, district in _DISTRICT_ALIASES.items():
+            if alias in compact:
+                entities["region"] = district
+                matched.append(district if district in compact else alias)
+                break
+        ages = _AGE_PATTERN.findall(compact)
+        if ages:
+            # QUA 표준 표기("만 3세")로 맞춤
+            entities["child_age_keywords"] = [
+                re.sub(r"^만(\d+)세$", r"만 \1세", age) for age in ages
+            ]
+            matched.extend(ages)
+        counts = _CHILD_COUNT_PATTERN.findall(compact)
+        if counts:
+            entities["child_count_keywords"] = counts
+            matched.extend(counts)
+        if not matched:
+            return None
+        # 조건 외에 남는 말이 조사/어미 정도("는요", "이면")일 때만 조건 변경으로 판단
+        remainder = compact
+        for text in matched:
+            remainder = remainder.replace(text, "")
+        if len(remainder) > _REFINEMENT_MAX_REMAINDER:
+            return None
+        return {
+            **previous,
+            "entities": entities,
+            "turn_type": TURN_REFINEMENT,
+            "analysis_mode": "rules",
+        }
+
+    def _referenced_policy(
+        self, user_query: str, cited_policies: List[Dict]
+    ) -> Optional[Dict]:
+        """후속 질문이 가리키는 직전 인용 정책 (없거나 모호하면 None)"""
+        if not cited_policies:
+            return None
+        compact_query = normalize(user_query)
+        for policy in cited_policies:
+            name = normalize(policy.get("biz_nm"))
+            if name and name in compact_query:
+                return policy
+        ordinal = _ORDINAL.search(user_query)
+        if ordinal:
+            index = _ORDINAL_INDEX[ordinal.group(1)]
+            return cited_policies[index] if index < len(cited_policies) else None
+        if _DEMONSTRATIVE.search(user_query) and len(cited_policies) == 1:
+            return cited_policies[0]
+        return None
+
+    def _classify_follow_up_by_llm(
+        self, user_query: str, previous: Dict, cited_policies: List[Dict]
+    ) -> Optional[Dict[str, Any]]:
+        """작은 프롬프트로 분류 + 바뀐 필드만 받아 직전 분석 결과에 반영 (실패 시 None)"""
+        previous_summary = json.dumps(
+            {
+                "intent": previous.get("intent"),
+                "search_keywords": previous.get("search_keywords", []),
+                "entities": previous.get("entities", {}),
+            },
+            ensure_ascii=False,
+        )
+        policy_list = "\n".join(
+            f"{i}. {policy['biz_nm']} (ID: {policy['id']})"
+            for i, policy in enumerate(cited_policies, 1)
+        )
 
-    def _calculate_age(self, birthdate_str: str) -> int:
-        """생년월일로부터 현재 나이 계산"""
         try:
-            birth_year = int(birthdate_str.split("-")[0])
-            current_year = datetime.now().year
-            return current_year - birth_year
-        except:
-            return 0
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _FOLLOW_UP_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": _FOLLOW_UP_USER_TEMPLATE.substitute(
+                            previous_summary=previous_summary,
+                            policy_list=policy_list or "없음",
+                            query=user_query,
+                        ),
+                    },
+                ],
+                temperature=0,
+                max_tokens=200,
+                response_format={"type": "json_object"},
+            )
+            llm_usage.record("qua_follow_up", response)
+            decision = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            print(f"[QUA] 후속 질문 분류 실패 (전체 분석으로 진행): {e}")
+            return None
+
+        turn_type = decision.get("turn_type")
+        if turn_type == TURN_POLICY_DETAIL:
+            cited_ids = {policy["id"] for policy in cited_policies}
+            if decision.get("policy_id") in cited_ids:
+                return {
+                    **previous,
+                    "turn_type": TURN_POLICY_DETAIL,
+                    "target_policy_id": decision["policy_id"],
+                    "analysis_mode": "llm_patch",
+                }
+            return None
+        if turn_type == TURN_REFINEMENT and isinstance(decision.get("patch"), dict):
+            patch = decision["patch"]
+            result = {**previous, "turn_type": TURN_REFINEMENT, "analysis_mode": "llm_patch"}
+            for field in ("intent", "search_keywords", "enhanced_queries"):
+                if field in patch:
+                    result[field] = patch[field]
+            if isinstance(patch.get("entities"), dict):
+                result["entities"] = {**previous.get("entities", {}), **patch["entities"]}
+            return result
+        return None
 
     def _create_fallback_analysis(
         self, user_query: str, user_profile: Optional[Dict]
@@ -146,15 +372,20 @@ class QueryUnderstandingAgent:
 class HybridRetrievalAgent:
     """HRA - 다중 경로 정보 검색 및 리랭킹 에이전트"""
 
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], term_index=None):
         self.db_config = db_config
+        # 검색어 오타 교정 인덱스 (FuzzyTermIndex, 없으면 교정하지 않음)
+        self.term_index = term_index
 
-    def multi_path_search(self, qua_result: Dict[str, Any]) -> List[Dict]:
+    def multi_path_search(
+        self, qua_result: Dict[str, Any], prior_policy_ids: Optional[List[int]] = None
+    ) -> List[Dict]:
         """
         다중 경로 검색 수행
         1. 메타데이터 필터링
         2. 키워드 기반 검색
         3. 리랭킹
+        prior_policy_ids: 같은 대화의 직전 턴에 인용한 정책 (후속 질문에서도 후보에 포함)
         """
 
         conn = None
@@ -163,6 +394,9 @@ class HybridRetrievalAgent:
             conn = self._get_db_connection()
             cursor = conn.cursor(dictionary=True)
 
+            # Phase 0: 검색어 오타 교정/확장 (QUA 결과는 응답에 그대로 남도록 복사본에 반영)
+            qua_result = self._expand_search_terms(qua_result)
+
             # Phase 1: 메타데이터 필터링
             filtered_candidates = self._metadata_filtering(cursor, qua_result)
 
@@ -171,6 +405,11 @@ class HybridRetrievalAgent:
                 # 메타데이터 필터 없이 전체 검색
                 filtered_candidates = self._get_all_policies(cursor)
 
+            if prior_policy_ids:
+                filtered_candidates = self._add_prior_policies(
+                    cursor, filtered_candidates, prior_policy_ids
+                )
+
             # Phase 2: 키워드 기반 검색 (필터링된 후보 내에서)
             keyword_scored = self._keyword_based_search(filtered_candidates, qua_result)
 
@@ -189,6 +428,66 @@ class HybridRetrievalAgent:
             if conn and conn.is_connected():
                 conn.close()
 
+    def _expand_search_terms(self, qua_result: Dict) -> Dict:
+        """검색어/정책 유형에 오타 교정어 추가 ("양육수담" → "양육수당")"""
+        if not self.term_index:
+            return qua_result
+        try:
+            entities = qua_result.get("entities", {})
+            expanded = {
+                **qua_result,
+                "search_keywords": self.term_index.expand(
+                    qua_result.get("search_keywords", [])
+                ),
+                "entities": {
+                    **entities,
+                    "policy_types": self.term_index.expand(
+                        entities.get("policy_types", [])
+                    ),
+                },
+            }
+        except Exception as e:
+            # 교정 인덱스를 만들 수 없어도 원래 검색어로 검색은 계속
+            print(f"[HRA] 검색어 교정 실패 (원래 검색어 사용): {e}")
+            return qua_result
+
+        added = [
+            keyword
+            for keyword in expanded["search_keywords"]
+            if keyword not in qua_result.get("search_keywords", [])
+        ]
+        if added:
+            print(f"[HRA] 검색어 교정/확장: {added}")
+        return expanded
+
+    def get_policy(self, policy_id: int) -> Optional[Dict]:
+        """정책 한 건 조회 (후속 상세 질문용 - 검색 없이 정책 레코드만)"""
+        conn = None
+        cursor = None
+        try:
+            conn = self._get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                """
+                SELECT 
+                    id, biz_nm, biz_cn, utztn_trpr_cn, utztn_mthd_cn,
+                    biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, oper_hr_cn, aref_cn,
+                    trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr
+                FROM policies
+                WHERE id = %s AND is_active = TRUE
+            """,
+                (policy_id,),
+            )
+            return cursor.fetchone()
+        except Exception as e:
+            print(f"[HRA] 정책 조회 중 오류: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
     def _get_db_connection(self):
         """DB 연결"""
         return mysql.connector.connect(
@@ -211,7 +510,7 @@ class HybridRetrievalAgent:
                 biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm,
                 trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr
             FROM policies
-            WHERE 1=1
+            WHERE is_active = TRUE
         """
 
         conditions = []
@@ -266,39 +565,67 @@ class HybridRetrievalAgent:
                 biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm,
                 trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr
             FROM policies
+            WHERE is_active = TRUE
             LIMIT 30
         """
         )
         return cursor.fetchall()
 
+    def _add_prior_policies(
+        self, cursor, candidates: List[Dict], prior_policy_ids: List[int]
+    ) -> List[Dict]:
+        """직전 턴에 인용한 정책 중 후보에 없는 것을 추가 (대화 맥락 유지)"""
+        known_ids = {policy["id"] for policy in candidates}
+        missing_ids = [pid for pid in prior_policy_ids if pid not in known_ids]
+        if not missing_ids:
+            return candidates
+
+        placeholders = ", ".join(["%s"] * len(missing_ids))
+        cursor.execute(
+            f"""
+            SELECT 
+                id, biz_nm, biz_cn, utztn_trpr_cn, utztn_mthd_cn,
+                biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm,
+                trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr
+            FROM policies
+            WHERE id IN ({placeholders}) AND is_active = TRUE
+        """,
+            missing_ids,
+        )
+        return candidates + cursor.fetchall()
+
     def _keyword_based_search(
         self, candidates: List[Dict], qua_result: Dict
     ) -> List[Dict]:
-        """키워드 기반 관련도 점수 계산"""
+        """키워드 기반 관련도 점수 계산 (띄어쓰기/기호 차이는 무시하고 비교)"""
         search_keywords = qua_result.get("search_keywords", [])
         enhanced_queries = qua_result.get("enhanced_queries", [])
 
-        all_keywords = search_keywords + enhanced_queries
+        all_keywords = [
+            keyword
+            for keyword in (normalize(k) for k in search_keywords + enhanced_queries)
+            if keyword
+        ]
 
         for policy in candidates:
             score = 0
 
             # 정책명에서 키워드 매칭
-            policy_name = policy.get("biz_nm", "").lower()
+            policy_name = normalize(policy.get("biz_nm", ""))
             for keyword in all_keywords:
-                if keyword.lower() in policy_name:
+                if keyword in policy_name:
                     score += 3
 
             # 정책 내용에서 키워드 매칭
-            policy_content = policy.get("biz_cn", "").lower()
+            policy_content = normalize(policy.get("biz_cn", ""))
             for keyword in all_keywords:
-                if keyword.lower() in policy_content:
+                if keyword in policy_content:
                     score += 2
 
             # 대상 내용에서 키워드 매칭
-            target_content = policy.get("utztn_trpr_cn", "").lower()
+            target_content = normalize(policy.get("utztn_trpr_cn", ""))
             for keyword in all_keywords:
-                if keyword.lower() in target_content:
+                if keyword in target_content:
                     score += 2
 
             policy["search_score"] = score
@@ -377,9 +704,13 @@ class AnswerGenerationAgent:
         return text.strip()
 
     def generate_personalized_answer(
-        self, user_query: str, qua_result: Dict, policy_results: List[Dict]
+        self,
+        user_query: str,
+        qua_result: Dict,
+        policy_results: List[Dict],
+        history: Optional[List[Dict[str, str]]] = None,
     ) -> Dict[str, Any]:
-        """개인화된 답변 생성"""
+        """개인화된 답변 생성 (history: 토큰 예산으로 자른 이전 대화)"""
 
         if not policy_results:
             return {
@@ -390,66 +721,40 @@ class AnswerGenerationAgent:
 
         # 최적 컨텍스트 구성 (상위 3개 정책)
         context_policies = policy_results[:3]
-        context_parts = []
-
-        for i, policy in enumerate(context_policies, 1):
-            context_parts.append(
-                f"""
-[정책 정보 {i}]
-정책명: {policy['biz_nm']}
-정책 ID: {policy['id']}
-핵심 내용: {policy['biz_cn'][:400]}...
-지원 대상: {policy['utztn_trpr_cn'][:300]}...
-이용 방법: {policy.get('utztn_mthd_cn', '정보 없음')[:200]}...
-관련도 점수: {policy.get('final_score', 0)}점
-상세 링크: {policy.get('deviw_site_addr', '링크 없음')}
-"""
+        context_text = "\n".join(
+            _AGA_POLICY_TEMPLATE.substitute(
+                index=i,
+                name=policy["biz_nm"],
+                id=policy["id"],
+                content=(policy["biz_cn"] or "")[:400],
+                target=(policy["utztn_trpr_cn"] or "")[:300],
+                method=(policy.get("utztn_mthd_cn") or "정보 없음")[:200],
+                score=policy.get("final_score", 0),
+                link=policy.get("deviw_site_addr") or "링크 없음",
             )
+            for i, policy in enumerate(context_policies, 1)
+        )
 
-        context_text = "\n".join(context_parts)
-
-        # AGA 프롬프트 구성
-        aga_prompt = f"""
-당신은 서울시 육아 정책을 안내하는 전문 AI 상담가 '아이뽓'입니다.
-
-사용자 상황: {qua_result.get('user_situation_summary', '육아 정책 문의')}
-사용자 질문: "{user_query}"
-질문 의도: {qua_result.get('intent', '정책 정보 문의')}
-
-다음은 검색된 관련 정책 정보입니다:
-{context_text}
-
-위 정보를 바탕으로 다음 규칙에 따라 답변해주세요:
-
-1. 사용자의 구체적 상황을 고려한 맞춤형 답변 제공
-2. 각 정책을 명확히 구분하여 설명 (번호 또는 제목으로)
-3. 지원 내용, 대상, 신청 방법을 구체적으로 안내
-4. 답변 마지막에 반드시 다음 형식으로 참고 정책 명시:
-
-📋 참고 정책:
-- [정책명] (정책ID: XX)
-- [정책명] (정책ID: XX)
-
-5. 불확실한 정보는 추측하지 말고 확인이 필요하다고 안내
-6. 친근하고 전문적인 톤 유지
-7. 일반 텍스트로만 답변하세요. 마크다운 목적의 기호 사용을 엄금합니다. ** 같은 별표나 해시 기호 등 특수문자는 사용하지 마세요.
-
-답변:
-"""
+        # 요청별 내용만 담은 user 메시지 (지시문/규칙은 고정 system 메시지)
+        aga_prompt = _AGA_USER_TEMPLATE.substitute(
+            situation=qua_result.get("user_situation_summary", "육아 정책 문의"),
+            query=user_query,
+            intent=qua_result.get("intent", "정책 정보 문의"),
+            context=context_text,
+        )
 
         try:
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 서울시 육아 정책 전문 상담사 '아이뽓'입니다. 정확하고 친절한 맞춤 답변을 제공합니다. 일반 텍스트로만 답변하고 마크다운 문법은 절대 사용하지 마세요.",
-                    },
+                    {"role": "system", "content": _AGA_SYSTEM_PROMPT},
+                    *(history or []),
                     {"role": "user", "content": aga_prompt},
                 ],
                 temperature=0.3,
                 max_tokens=1200,
             )
+            llm_usage.record("aga", response)
 
             # 원본 답변
             raw_answer = response.choices[0].message.content.strip()
@@ -490,38 +795,179 @@ class AnswerGenerationAgent:
             return 0.3
 
 
+class _InFlightCall:
+    """진행 중인 파이프라인 실행 1건 (결과/예외를 대기자들과 공유)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlightGroup:
+    """동일 키의 동시 요청을 하나의 실행으로 합치는 single-flight 그룹 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+
+    def do(self, key: str, fn) -> Tuple[Any, bool]:
+        """
+        key에 대해 진행 중인 실행이 있으면 그 결과를 기다려 공유하고,
+        없으면 fn()을 직접 실행한다. (결과, 공유 여부)를 반환
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # 완료된 실행은 즉시 제거 - 이후 요청은 새로 실행 (결과 캐시가 아님)
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        if call.waiters:
+            print(f"[SingleFlight] 동일 요청 {call.waiters}건이 결과를 공유함")
+        return call.result, False
+
+
 class EnhancedAibbotRAGService:
     """향상된 Aibbot RAG 서비스 - 다중 에이전트 아키텍처"""
 
-    def __init__(self, db_config: Dict[str, str], openai_client):
+    def __init__(self, db_config: Dict[str, str], openai_client, term_index=None):
         self.qua = QueryUnderstandingAgent(openai_client)
-        self.hra = HybridRetrievalAgent(db_config)
+        self.hra = HybridRetrievalAgent(db_config, term_index=term_index)
         self.aga = AnswerGenerationAgent(openai_client)
+        self._inflight = SingleFlightGroup()
+
+    @staticmethod
+    def _normalize_query(user_query: str) -> str:
+        """공백/대소문자 차이를 무시한 질문 정규화"""
+        return " ".join(user_query.split()).lower()
 
     def process_query(
-        self, user_query: str, user_profile: Optional[Dict] = None
+        self,
+        user_query: str,
+        user_profile: Optional[Dict] = None,
+        profile_features: Optional[Dict] = None,
+        conversation=None,
+    ) -> Dict[str, Any]:
+        """
+        통합 쿼리 처리 - QUA → HRA → AGA 파이프라인
+        동일한 질문 + 프로필의 동시 요청은 한 번의 실행 결과를 공유
+        profile_features: 서버에 저장된 프로필의 캐시된 파생 특성 (없으면 user_profile에서 계산)
+        conversation: 대화 세션 (ConversationSession) - 이전 대화/인용 정책을 이어 씀
+        """
+        if user_profile and profile_features is None:
+            profile_features = derive_features(user_profile)
+        fingerprint = (
+            profile_features["fingerprint"]
+            if profile_features
+            else profile_fingerprint(user_profile)
+        )
+        flight_key = f"{self._normalize_query(user_query)}|{fingerprint}"
+        if conversation is not None and conversation.has_history:
+            # 대화 맥락이 있는 질문은 세션마다 답이 달라지므로 같은 세션끼리만 합침
+            flight_key += f"|{conversation.session_id}"
+        result, shared = self._inflight.do(
+            flight_key,
+            lambda: self._run_pipeline(
+                user_query, user_profile, profile_features, conversation
+            ),
+        )
+        if shared:
+            print(f"[Enhanced RAG] 진행 중인 동일 요청 결과 재사용: '{user_query}'")
+        # 호출자별로 얕은 복사본을 돌려주어 공유 결과가 변경되지 않도록 함
+        return dict(result)
+
+    def _run_pipeline(
+        self,
+        user_query: str,
+        user_profile: Optional[Dict] = None,
+        profile_features: Optional[Dict] = None,
+        conversation=None,
+    ) -> Dict[str, Any]:
+        """파이프라인 실행 + 이 요청의 단계별 LLM 토큰 사용량(token_usage) 첨부"""
+        with llm_usage.collect() as token_usage:
+            final_response = self._run_stages(
+                user_query, user_profile, profile_features, conversation
+            )
+        final_response["token_usage"] = token_usage
+        return final_response
+
+    def _run_stages(
+        self,
+        user_query: str,
+        user_profile: Optional[Dict] = None,
+        profile_features: Optional[Dict] = None,
+        conversation=None,
     ) -> Dict[str, Any]:
-        """통합 쿼리 처리 - QUA → HRA → AGA 파이프라인"""
+        """QUA → HRA → AGA 파이프라인 실제 실행"""
 
         print(f"[Enhanced RAG] 쿼리 처리 시작: '{user_query}'")
 
-        # Phase 1: Query Understanding
-        qua_result = self.qua.analyze_user_query(user_query, user_profile)
+        # Phase 1: Query Understanding (대화 중이면 직전 분석 결과에서 바뀐 부분만 갱신)
+        if conversation is not None and conversation.qua_result:
+            qua_result = self.qua.analyze_follow_up(
+                user_query,
+                conversation.qua_result,
+                conversation.cited_policies,
+                user_profile,
+                profile_features,
+            )
+        else:
+            qua_result = self.qua.analyze_user_query(
+                user_query, user_profile, profile_features
+            )
 
-        # Phase 2: Hybrid Retrieval
-        policy_results = self.hra.multi_path_search(qua_result)
+        # Phase 2: Hybrid Retrieval (직전 답변의 정책 상세 질문은 검색 없이 해당 정책만 조회)
+        policy_results = None
+        pipeline = "QUA → HRA → AGA"
+        if qua_result.get("turn_type") == TURN_POLICY_DETAIL:
+            policy = self.hra.get_policy(qua_result["target_policy_id"])
+            if policy is not None:
+                policy_results = [policy]
+                pipeline = "QUA → 정책 조회 → AGA"
+        if policy_results is None:
+            prior_policy_ids = conversation.cited_policy_ids if conversation else None
+            policy_results = self.hra.multi_path_search(qua_result, prior_policy_ids)
 
         # Phase 3: Answer Generation
         final_response = self.aga.generate_personalized_answer(
-            user_query, qua_result, policy_results
+            user_query,
+            qua_result,
+            policy_results,
+            history=conversation.history() if conversation else None,
         )
 
+        if pipeline != "QUA → HRA → AGA":
+            # 사용자가 직접 가리킨 정책이므로 검색 점수 기반 신뢰도 대신 높은 신뢰도
+            final_response["confidence_score"] = 0.9
+
         # 응답에 추가 정보 포함
         final_response.update(
             {
                 "query_analysis": qua_result,
                 "search_results_count": len(policy_results),
-                "processing_pipeline": "QUA → HRA → AGA",
+                "processing_pipeline": pipeline,
             }
         )
 
@@ -0,0 +1,92 @@
+# AIBBOT/backend/recent_feed.py
+# 최근 변경 정책 피드 메모리 캐시 (/api/recent-policies)
+#
+# 동기화가 materialized_feeds 테이블에 저장한 피드를 한 번 읽어 메모리에 두고,
+# 정책 변경 이벤트를 받을 때만 다시 읽음. 요청 처리 시에는 DB를 조회하지 않음.
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RECENT_FEED_NAME = "recent_policies"
+
+# 피드에 ISO 문자열로 저장된 날짜 필드 (응답 형식 유지를 위해 datetime으로 복원)
+_DATETIME_FIELDS = ("created_at", "updated_at", "recent_date")
+
+
+class RecentPolicyFeed:
+    """
+    materialized_feeds의 최근 변경 피드 캐시
+    - 피드는 최신순 정렬되어 있으므로 기간/개수 조회는 앞부분을 잘라 응답
+    - rebuild: 피드가 아직 없을 때(첫 동기화 전) DB에서 피드를 만들어 저장하는 함수
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        rebuild: Optional[Callable[[], Any]] = None,
+    ):
+        self.connection_factory = connection_factory
+        self.rebuild = rebuild
+        self._lock = threading.Lock()
+        self._policies: Optional[List[Dict[str, Any]]] = None
+        self._etag: Optional[str] = None
+
+    def invalidate(self, event=None):
+        """정책 변경 이벤트 구독용 - 다음 요청에서 피드를 다시 읽음"""
+        with self._lock:
+            self._policies = None
+            self._etag = None
+
+    def get(self, days: int, limit: int) -> Tuple[List[Dict[str, Any]], str]:
+        """최근 days일 내 변경된 정책 최대 limit개와 응답 ETag(약한 검증자로 사용) 반환"""
+        with self._lock:
+            if self._policies is None:
+                self._policies, self._etag = self._load()
+            policies, feed_etag = self._policies, self._etag
+
+        cutoff_date = datetime.now() - timedelta(days=days)
+        selected = []
+        for policy in policies:
+            if len(selected) >= limit or policy["recent_date"] < cutoff_date:
+                break
+            selected.append(dict(policy))
+
+        # 같은 피드라도 기간이 지나 빠지는 정책이 있으면 응답이 달라지므로 결과 ID까지 포함
+        etag_source = f"{feed_etag}|{days}|{limit}|" + ",".join(
+            str(policy["id"]) for policy in selected
+        )
+        return selected, hashlib.md5(etag_source.encode("utf-8")).hexdigest()
+
+    def _load(self) -> Tuple[List[Dict[str, Any]], str]:
+        row = self._fetch()
+        if row is None and self.rebuild:
+            self.rebuild()
+            row = self._fetch()
+        if row is None:
+            return [], ""
+
+        etag, payload = row
+        policies = json.loads(payload)
+        for policy in policies:
+            for field in _DATETIME_FIELDS:
+                if policy.get(field):
+                    policy[field] = datetime.fromisoformat(policy[field])
+        return policies, etag
+
+    def _fetch(self):
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT etag, payload FROM materialized_feeds WHERE feed_name = %s",
+                (RECENT_FEED_NAME,),
+            )
+            return cursor.fetchone()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
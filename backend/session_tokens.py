@@ -0,0 +1,144 @@
+# AIBBOT/backend/session_tokens.py
+# 서명된 세션 토큰 (HMAC-SHA256) + 비밀번호 해시 전용 실행기
+#
+# 토큰 = base64url(JSON 페이로드) + "." + base64url(HMAC 서명)
+# - 서명과 만료 시각만 확인하면 되므로 인증된 요청마다 users 테이블을 조회하지 않음
+# - access 토큰은 짧게, refresh 토큰은 길게 발급하고 /api/token/refresh에서 둘 다 새로 발급
+# - 서버에 상태가 없으므로 개별 토큰 폐기는 불가 (SESSION_SECRET을 바꾸면 전체 무효화)
+#
+# 비밀번호 해시 확인(check_password_hash)은 의도적으로 CPU를 많이 쓰므로
+# 작은 전용 스레드 풀에서만 실행하고, 대기열이 차면 바로 거절해 요청 스레드가 묶이지 않게 함
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+ACCESS_TOKEN_TTL_SECONDS = 15 * 60
+REFRESH_TOKEN_TTL_SECONDS = 14 * 24 * 60 * 60
+
+TOKEN_TYPE_ACCESS = "access"
+TOKEN_TYPE_REFRESH = "refresh"
+
+
+class InvalidTokenError(ValueError):
+    """서명이 맞지 않거나 만료/형식 오류인 토큰"""
+
+
+class PasswordHasherBusyError(RuntimeError):
+    """비밀번호 해시 실행기 대기열이 가득 참"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionTokenSigner:
+    """HMAC 서명 세션 토큰 발급/검증 (상태 없음)"""
+
+    def __init__(
+        self,
+        secret: str,
+        access_ttl: int = ACCESS_TOKEN_TTL_SECONDS,
+        refresh_ttl: int = REFRESH_TOKEN_TTL_SECONDS,
+    ):
+        self._key = secret.encode("utf-8")
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+
+    def issue(self, user_id: int, username: str) -> Dict[str, Any]:
+        """access/refresh 토큰 한 쌍 발급 (로그인/갱신 응답 형식)"""
+        return {
+            "access_token": self._sign(user_id, username, TOKEN_TYPE_ACCESS, self.access_ttl),
+            "refresh_token": self._sign(
+                user_id, username, TOKEN_TYPE_REFRESH, self.refresh_ttl
+            ),
+            "token_type": "Bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def verify(self, token: str, token_type: str = TOKEN_TYPE_ACCESS) -> Dict[str, Any]:
+        """서명/종류/만료를 확인하고 페이로드({sub, usr, typ, iat, exp}) 반환"""
+        try:
+            payload_part, signature_part = token.split(".")
+            expected = self._signature(payload_part)
+            if not hmac.compare_digest(_b64decode(signature_part), expected):
+                raise InvalidTokenError("토큰 서명이 올바르지 않습니다.")
+            payload = json.loads(_b64decode(payload_part))
+        except InvalidTokenError:
+            raise
+        except (ValueError, TypeError, AttributeError) as e:
+            raise InvalidTokenError("토큰 형식이 올바르지 않습니다.") from e
+
+        if not isinstance(payload, dict) or not isinstance(payload.get("sub"), int):
+            raise InvalidTokenError("토큰 형식이 올바르지 않습니다.")
+        if payload.get("typ") != token_type:
+            raise InvalidTokenError("토큰 종류가 올바르지 않습니다.")
+        if not isinstance(payload.get("exp"), int) or payload["exp"] <= time.time():
+            raise InvalidTokenError("토큰이 만료되었습니다.")
+        return payload
+
+    def _sign(self, user_id: int, username: str, token_type: str, ttl: int) -> str:
+        now = int(time.time())
+        payload = {
+            "sub": user_id,
+            "usr": username,
+            "typ": token_type,
+            "iat": now,
+            "exp": now + ttl,
+        }
+        payload_part = _b64encode(
+            json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        )
+        return f"{payload_part}.{_b64encode(self._signature(payload_part))}"
+
+    def _signature(self, payload_part: str) -> bytes:
+        return hmac.new(self._key, payload_part.encode("ascii"), hashlib.sha256).digest()
+
+
+class PasswordHasher:
+    """
+    비밀번호 해시 생성/확인 전용 실행기
+    max_workers개 스레드에서만 해시를 계산하고, 실행 중 + 대기 작업이 max_pending을 넘으면
+    PasswordHasherBusyError로 즉시 거절 (로그인 폭주 시 요청 스레드 전체가 해시 계산에 묶이지 않도록)
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, timeout: float = 10.0):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.timeout = timeout
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusyError("로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            raise PasswordHasherBusyError("로그인 처리가 지연되고 있습니다. 잠시 후 다시 시도해주세요.") from e
+
+
+def bearer_token(authorization_header: Optional[str]) -> Optional[str]:
+    """Authorization 헤더에서 Bearer 토큰 추출 (없으면 None)"""
+    if not authorization_header:
+        return None
+    scheme, _, token = authorization_header.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise InvalidTokenError("Authorization 헤더는 'Bearer <토큰>' 형식이어야 합니다.")
+    return token.strip()
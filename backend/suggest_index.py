@@ -0,0 +1,208 @@
+# AIBBOT/backend/suggest_index.py
+# 정책명/분류명 자동완성 인덱스 (정렬 배열 + bisect 접두사 검색)
+#
+# - 정책명은 단어 시작 위치마다 키를 만들어 "아이돌보미"로 "서울형 아이돌보미 지원"도 찾음
+# - 키는 자모 분해열이라 입력 중인 글자("첫마")도 일치, 초성만 입력("ㅊㅁㄴ")하면 초성 키로 검색
+# - 자주 쓰는 별칭("산후도우미" → 산모신생아 건강관리)은 해당 정책의 추가 키로 등록
+# - 접두사가 일치하는 키 범위 전체를 확인한 뒤 상위 limit개만 순위대로 고름
+#   ("서", "ㅅ"처럼 짧은 접두사에서도 인기/가중치가 높은 항목이 알파벳 순서 때문에 빠지지 않도록)
+# - 정책 데이터 세대가 바뀌면(변경 이벤트) 새로 만들어 교체
+
+import heapq
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from hangul import decompose, is_chosung_only, normalize, to_chosung, tokenize
+
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
+# 사용자들이 흔히 쓰는 별칭 → 정책명에 들어 있는 표현
+SUGGEST_ALIASES = {
+    "산후도우미": ["산모신생아", "산모·신생아"],
+    "출산지원금": ["출산축하", "출산장려", "첫만남"],
+    "출산장려금": ["출산축하", "출산장려", "첫만남"],
+    "아이돌보미": ["아이돌봄"],
+    "베이비시터": ["아이돌봄", "돌보미"],
+    "육아수당": ["양육수당", "부모급여", "아동수당"],
+    "난임": ["난임부부", "난임시술"],
+    "어린이집": ["보육료", "어린이집"],
+}
+
+# 일치 유형별 순위 (낮을수록 우선)
+_MATCH_NAME_START = 0
+_MATCH_WORD_START = 1
+_MATCH_ALIAS = 2
+
+
+class PolicyPopularity:
+    """정책별 조회/인용 횟수 (자동완성 순위 가중치, 프로세스 메모리)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def record(self, policy_ids: Iterable[Any]):
+        with self._lock:
+            for policy_id in policy_ids:
+                if policy_id is not None:
+                    self._counts[policy_id] += 1
+
+    def get(self, policy_id) -> int:
+        return self._counts.get(policy_id, 0)
+
+
+class _SuggestData:
+    """한 세대 분의 인덱스 (만든 뒤에는 변경하지 않음)"""
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+        self._jamo_keys: List[Tuple[str, int, int]] = []  # (키, 일치 유형, 항목 번호)
+        self._chosung_keys: List[Tuple[str, int, int]] = []
+
+    def add_entry(self, entry: Dict[str, Any]) -> int:
+        self.entries.append(entry)
+        return len(self.entries) - 1
+
+    def add_keys(self, text: str, match_type: int, entry_index: int):
+        key = normalize(text)
+        if key:
+            self._jamo_keys.append((decompose(key), match_type, entry_index))
+            self._chosung_keys.append((to_chosung(key), match_type, entry_index))
+
+    def freeze(self):
+        self._jamo_keys.sort()
+        self._chosung_keys.sort()
+        self._jamo_index = [key for key, _, _ in self._jamo_keys]
+        self._chosung_index = [key for key, _, _ in self._chosung_keys]
+
+    def lookup(self, query: str) -> Dict[int, int]:
+        """접두사가 일치하는 항목 → 가장 좋은 일치 유형"""
+        normalized = normalize(query)
+        if not normalized:
+            return {}
+        if is_chosung_only(normalized):
+            keys, index, prefix = self._chosung_keys, self._chosung_index, normalized
+        else:
+            keys, index, prefix = self._jamo_keys, self._jamo_index, decompose(normalized)
+
+        # 접두사로 시작하는 키는 정렬 배열에서 연속 구간 (전체 키 수를 넘지 않음)
+        matches: Dict[int, int] = {}
+        start = bisect_left(index, prefix)
+        end = bisect_right(index, prefix + "\U0010ffff", lo=start)
+        for _, match_type, entry_index in keys[start:end]:
+            if match_type < matches.get(entry_index, _MATCH_ALIAS + 1):
+                matches[entry_index] = match_type
+        return matches
+
+
+class SuggestIndex:
+    """정책명/분류명 자동완성 인덱스"""
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        popularity: Optional[PolicyPopularity] = None,
+    ):
+        self.connection_factory = connection_factory
+        self.popularity = popularity or PolicyPopularity()
+        self._lock = threading.Lock()
+        self._data: Optional[_SuggestData] = None
+
+    def on_corpus_change(self, event=None):
+        """정책 변경 이벤트 구독용 - 이벤트 스레드에서 새 인덱스를 만들어 교체"""
+        data = self._build()
+        with self._lock:
+            self._data = data
+
+    def suggest(self, query: str, limit: int = SUGGEST_DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._build()
+                data = self._data
+
+        matches = data.lookup(query)
+
+        def rank(item):
+            entry_index, match_type = item
+            entry = data.entries[entry_index]
+            popularity = entry["weight"]
+            if entry["type"] == "policy":
+                popularity += math.log1p(self.popularity.get(entry["id"]))
+            return (match_type, -popularity, len(entry["text"]), entry["text"])
+
+        ranked = heapq.nsmallest(limit, matches.items(), key=rank)
+        return [dict(data.entries[entry_index]) for entry_index, _ in ranked]
+
+    def _build(self) -> _SuggestData:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT id, biz_nm, biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm
+                FROM policies
+                WHERE is_active = TRUE
+            """
+            )
+            rows = cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+        data = _SuggestData()
+        category_counts: Counter = Counter()
+        policy_entries = []
+
+        for policy_id, name, lclsf, mclsf, sclsf in rows:
+            for level, category in (("lclsf", lclsf), ("mclsf", mclsf), ("sclsf", sclsf)):
+                if category:
+                    category_counts[(level, category)] += 1
+            if not name:
+                continue
+            entry_index = data.add_entry(
+                {
+                    "type": "policy",
+                    "id": policy_id,
+                    "text": name,
+                    "category": mclsf or lclsf or "",
+                    "weight": 1.0,
+                }
+            )
+            policy_entries.append((entry_index, normalize(name)))
+
+            # 정책명 전체 + 단어 시작 위치부터의 나머지 (공백 무시)
+            tokens = tokenize(name)
+            data.add_keys("".join(tokens), _MATCH_NAME_START, entry_index)
+            for start in range(1, len(tokens)):
+                data.add_keys("".join(tokens[start:]), _MATCH_WORD_START, entry_index)
+
+        # 분류명 (해당 분류의 정책 수를 가중치로)
+        for (level, category), count in category_counts.items():
+            entry_index = data.add_entry(
+                {
+                    "type": "category",
+                    "level": level,
+                    "text": category,
+                    "count": count,
+                    "weight": math.log1p(count),
+                }
+            )
+            data.add_keys(category, _MATCH_NAME_START, entry_index)
+
+        # 별칭 → 별칭 대상 표현이 이름에 들어 있는 정책
+        for alias, targets in SUGGEST_ALIASES.items():
+            normalized_targets = [normalize(target) for target in targets]
+            for entry_index, normalized_name in policy_entries:
+                if any(target in normalized_name for target in normalized_targets):
+                    data.add_keys(alias, _MATCH_ALIAS, entry_index)
+
+        data.freeze()
+        return data
@@ -0,0 +1,157 @@
+# AIBBOT/backend/sync_jobs.py
+# 정책 동기화 백그라운드 작업 큐 (요청 스레드와 분리된 전용 워커에서 실행)
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SyncJob:
+    """동기화 작업 1건의 상태와 진행 상황"""
+
+    def __init__(self, sync_type: str):
+        self.id = uuid.uuid4().hex
+        self.sync_type = sync_type
+        self.status = "queued"  # queued → running → succeeded / partial / failed
+        self.progress: Dict[str, Any] = {
+            "phase": "queued",
+            "pages_fetched": 0,
+            "total_pages": None,
+            "rows_fetched": 0,
+            "rows_diffed": 0,
+            "rows_written": 0,
+        }
+        self.message: Optional[str] = None
+        self.changes: Optional[Dict[str, int]] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at:
+            duration = round(
+                ((self.finished_at or datetime.now()) - self.started_at).total_seconds(),
+                1,
+            )
+        return {
+            "job_id": self.id,
+            "sync_type": self.sync_type,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "message": self.message,
+            "changes": self.changes,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": duration,
+        }
+
+
+class SyncJobManager:
+    """
+    동기화 작업 관리자
+    - 작업은 단일 전용 워커 스레드에서 실행되어 채팅 요청 스레드를 점유하지 않음
+    - 실행 중(또는 대기 중)인 작업이 있으면 새 작업을 만들지 않음 (중복 동기화 방지)
+    """
+
+    def __init__(
+        self,
+        service_factory: Callable[..., Any],
+        on_finished: Optional[Callable[[SyncJob, Dict[str, Any]], None]] = None,
+        max_history: int = 20,
+    ):
+        # service_factory(progress_callback=...) → PolicySyncService 호환 객체
+        self.service_factory = service_factory
+        self.on_finished = on_finished
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, SyncJob]" = OrderedDict()
+        self._active_job: Optional[SyncJob] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="policy-sync"
+        )
+
+    def submit(self, sync_type: str = "manual") -> Tuple[SyncJob, bool]:
+        """작업 등록. (작업, 새로 생성 여부) 반환 - 이미 진행 중이면 기존 작업 반환"""
+        with self._lock:
+            if self._active_job and self._active_job.is_active:
+                return self._active_job, False
+
+            job = SyncJob(sync_type)
+            self._jobs[job.id] = job
+            self._active_job = job
+            # 오래된 완료 작업 정리
+            while len(self._jobs) > self.max_history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.is_active:
+                    break
+                self._jobs.pop(oldest_id)
+
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job: SyncJob) -> Dict[str, Any]:
+        """진행 상황 갱신과 경합하지 않는 작업 상태 사본"""
+        with self._lock:
+            return job.to_dict()
+
+    def _update_progress(self, job: SyncJob, **fields):
+        with self._lock:
+            job.progress.update(fields)
+
+    def _run(self, job: SyncJob):
+        with self._lock:
+            job.status = "running"
+            job.started_at = datetime.now()
+            job.progress["phase"] = "starting"
+
+        result: Dict[str, Any]
+        try:
+            service = self.service_factory(
+                progress_callback=lambda **fields: self._update_progress(job, **fields)
+            )
+            # 다른 프로세스(스케줄 동기화 등)와 겹치지 않도록 프로세스 간 락을 잡고 실행
+            result = service.sync_policies_exclusive()
+        except Exception as e:
+            print(f"[SyncJob {job.id}] 동기화 작업 오류: {e}")
+            result = {"success": False, "message": f"동기화 중 오류 발생: {str(e)}"}
+
+        stats = result.get("stats") or {}
+        with self._lock:
+            job.finished_at = datetime.now()
+            if result.get("success"):
+                job.status = "succeeded"
+            elif result.get("partial"):
+                job.status = "partial"
+            else:
+                job.status = "failed"
+            job.progress["phase"] = "done"
+            job.message = result.get("message")
+            if "stats" in result:
+                job.changes = {
+                    "new_policies": stats.get("new", 0),
+                    "updated_policies": stats.get("updated", 0),
+                    "unchanged_policies": stats.get("unchanged", 0),
+                    "deleted_policies": stats.get("deleted", 0),
+                    "total_changes": result.get("total_changes", 0),
+                }
+
+        print(f"[SyncJob {job.id}] 동기화 작업 종료: {job.status} - {job.message}")
+
+        if self.on_finished:
+            try:
+                self.on_finished(job, result)
+            except Exception as e:
+                print(f"[SyncJob {job.id}] 완료 후 처리 실패: {e}")
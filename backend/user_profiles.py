@@ -0,0 +1,280 @@
+# AIBBOT/backend/user_profiles.py
+# 서버 측 사용자 프로필 저장소 + 파생 특성 캐시
+#
+# 채팅 요청마다 클라이언트가 프로필 전체를 보내고 서버가 나이/프롬프트 블록을 다시 계산하던 것을
+# user_profiles 테이블과 프로세스 메모리 캐시로 대체.
+# - 파생 특성(자녀별 개월 수, 자녀 수, 자치구 코드, 프로필 지문, QUA용 프로필 설명)은 프로필 저장 시 한 번 계산
+# - 개월 수는 날짜가 바뀌면 달라지므로 캐시된 특성은 계산한 날짜가 지나면 다시 계산 (DB 조회 없음)
+# - 다른 프로세스에서 저장한 프로필은 캐시 TTL이 지나면 반영
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 서울시 자치구 행정구역(시군구) 코드
+SEOUL_DISTRICT_CODES = {
+    "종로구": "11110",
+    "중구": "11140",
+    "용산구": "11170",
+    "성동구": "11200",
+    "광진구": "11215",
+    "동대문구": "11230",
+    "중랑구": "11260",
+    "성북구": "11290",
+    "강북구": "11305",
+    "도봉구": "11320",
+    "노원구": "11350",
+    "은평구": "11380",
+    "서대문구": "11410",
+    "마포구": "11440",
+    "양천구": "11470",
+    "강서구": "11500",
+    "구로구": "11530",
+    "금천구": "11545",
+    "영등포구": "11560",
+    "동작구": "11590",
+    "관악구": "11620",
+    "서초구": "11650",
+    "강남구": "11680",
+    "송파구": "11710",
+    "강동구": "11740",
+}
+
+HAS_CHILD_VALUES = ("유", "무")
+MAX_CHILDREN = 10
+MAX_PROFILE_JSON_LENGTH = 4000
+PROFILE_CACHE_TTL_SECONDS = 300
+PROFILE_CACHE_MAX_ENTRIES = 10000
+
+
+class InvalidProfileError(ValueError):
+    """저장할 수 없는 프로필 형식"""
+
+
+def profile_fingerprint(profile: Optional[Dict[str, Any]]) -> str:
+    """프로필의 안정적인 지문 (키 순서와 무관, 프로필이 없으면 "-")"""
+    if not profile:
+        return "-"
+    canonical = json.dumps(profile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+def _parse_birthdate(value: Any) -> Optional[date]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def age_in_months(birthdate: date, today: date) -> Optional[int]:
+    """만 개월 수 (출생 전이면 None - 출산 예정일로 입력한 경우)"""
+    months = (today.year - birthdate.year) * 12 + (today.month - birthdate.month)
+    if today.day < birthdate.day:
+        months -= 1
+    return months if months >= 0 else None
+
+
+def validate_profile(profile: Any) -> Dict[str, Any]:
+    """API로 받은 프로필 검증 (알 수 없는 항목은 문자열이면 그대로 보존)"""
+    if not isinstance(profile, dict):
+        raise InvalidProfileError("프로필은 JSON 객체여야 합니다.")
+
+    region = profile.get("region") or ""
+    if region and region not in SEOUL_DISTRICT_CODES:
+        raise InvalidProfileError(f"알 수 없는 지역입니다: {region}")
+
+    has_child = profile.get("hasChild") or ""
+    if has_child and has_child not in HAS_CHILD_VALUES:
+        raise InvalidProfileError("hasChild는 '유' 또는 '무'여야 합니다.")
+
+    children = profile.get("children") or []
+    if not isinstance(children, list) or len(children) > MAX_CHILDREN:
+        raise InvalidProfileError(f"children은 최대 {MAX_CHILDREN}개의 목록이어야 합니다.")
+    for child in children:
+        if not isinstance(child, dict):
+            raise InvalidProfileError("children 항목은 JSON 객체여야 합니다.")
+        if child.get("birthdate") and _parse_birthdate(child["birthdate"]) is None:
+            raise InvalidProfileError(
+                f"birthdate는 YYYY-MM-DD 형식이어야 합니다: {child['birthdate']}"
+            )
+
+    for key, value in profile.items():
+        if key != "children" and value is not None and not isinstance(value, str):
+            raise InvalidProfileError(f"'{key}' 항목은 문자열이어야 합니다.")
+
+    if len(json.dumps(profile, ensure_ascii=False)) > MAX_PROFILE_JSON_LENGTH:
+        raise InvalidProfileError("프로필이 너무 큽니다.")
+    return profile
+
+
+def derive_features(
+    profile: Optional[Dict[str, Any]], today: Optional[date] = None
+) -> Dict[str, Any]:
+    """프로필에서 검색/프롬프트용 파생 특성 계산"""
+    profile = profile or {}
+    today = today or date.today()
+    region = profile.get("region") or None
+
+    children = []
+    if profile.get("hasChild") != "무":
+        for child in profile.get("children") or []:
+            birthdate = _parse_birthdate(child.get("birthdate"))
+            months = age_in_months(birthdate, today) if birthdate else None
+            children.append(
+                {
+                    "gender": child.get("gender") or None,
+                    "birthdate": birthdate.isoformat() if birthdate else None,
+                    "age_months": months,
+                    "age_years": months // 12 if months is not None else None,
+                }
+            )
+
+    features = {
+        "region": region,
+        "region_code": SEOUL_DISTRICT_CODES.get(region) if region else None,
+        "has_child": profile.get("hasChild") or None,
+        "child_count": len(children),
+        "children": children,
+        "fingerprint": profile_fingerprint(profile),
+        "as_of": today.isoformat(),
+    }
+    features["prompt_context"] = _format_prompt_context(profile, features)
+    return features
+
+
+def _format_prompt_context(profile: Dict[str, Any], features: Dict[str, Any]) -> str:
+    """QUA 프롬프트에 넣는 사용자 정보 블록"""
+    if not profile:
+        return ""
+    return f"""
+등록된 사용자 정보:
+- 거주 지역: {features['region'] or '정보 없음'}
+- 자녀 유무: {features['has_child'] or '정보 없음'}
+- 자녀 정보: {_format_children(features['children'])}
+- 자산 수준: {profile.get('asset') or '정보 없음'}
+"""
+
+
+def _format_children(children: List[Dict[str, Any]]) -> str:
+    if not children:
+        return "자녀 정보 없음"
+
+    formatted = []
+    for i, child in enumerate(children, 1):
+        gender = child["gender"] or "성별 미상"
+        if child["birthdate"] is None:
+            formatted.append(f"{i}째 ({gender}, 생년월일 미상)")
+        elif child["age_months"] is None:
+            formatted.append(f"{i}째 ({gender}, {child['birthdate']} 출산 예정)")
+        else:
+            formatted.append(
+                f"{i}째 ({gender}, {child['birthdate']}, "
+                f"만 {child['age_years']}세/{child['age_months']}개월)"
+            )
+    return ", ".join(formatted)
+
+
+class UserProfileStore:
+    """
+    user_profiles 테이블 + 사용자별 (프로필, 파생 특성) LRU 캐시
+    get은 캐시가 유효하면 DB를 조회하지 않음
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        ttl_seconds: float = PROFILE_CACHE_TTL_SECONDS,
+        max_entries: int = PROFILE_CACHE_MAX_ENTRIES,
+    ):
+        self.connection_factory = connection_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # user_id → (만료 시각, 프로필, 파생 특성); 프로필이 없는 사용자도 None으로 캐시
+        self._cache: "OrderedDict[int, Tuple[float, Optional[Dict], Optional[Dict]]]" = (
+            OrderedDict()
+        )
+
+    def get(self, user_id: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """(프로필, 파생 특성) 반환 - 저장된 프로필이 없으면 (None, None)"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] > now:
+                self._cache.move_to_end(user_id)
+                _, profile, features = cached
+                if features and features["as_of"] != date.today().isoformat():
+                    # 날짜가 바뀌어 개월 수만 다시 계산 (프로필 자체는 그대로)
+                    features = derive_features(profile)
+                    self._cache[user_id] = (cached[0], profile, features)
+                return profile, features
+
+        profile = self._load(user_id)
+        features = derive_features(profile) if profile is not None else None
+        self._remember(user_id, profile, features)
+        return profile, features
+
+    def save(self, user_id: int, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """프로필 저장(검증 포함) 후 파생 특성 반환"""
+        profile = validate_profile(profile)
+        features = derive_features(profile)
+
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO user_profiles
+                    (user_id, profile_json, region_code, child_count, fingerprint)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    profile_json = VALUES(profile_json),
+                    region_code = VALUES(region_code),
+                    child_count = VALUES(child_count),
+                    fingerprint = VALUES(fingerprint)
+            """,
+                (
+                    user_id,
+                    json.dumps(profile, ensure_ascii=False),
+                    features["region_code"],
+                    features["child_count"],
+                    features["fingerprint"],
+                ),
+            )
+            conn.commit()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+
+        self._remember(user_id, profile, features)
+        return features
+
+    def _remember(self, user_id: int, profile, features):
+        with self._lock:
+            self._cache[user_id] = (time.monotonic() + self.ttl_seconds, profile, features)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        conn = self.connection_factory()
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT profile_json FROM user_profiles WHERE user_id = %s", (user_id,)
+            )
+            row = cursor.fetchone()
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,7 @@
+-- database/migrations/0002_sync_log_status.sql
+-- 동기화 로그에 결과 상태 추가 (partial: 일부 페이지 누락)
+
+ALTER TABLE sync_logs
+    ADD COLUMN status ENUM('success', 'partial', 'failed') NOT NULL DEFAULT 'success' COMMENT '결과 상태 (partial: 일부 페이지 누락)' AFTER success;
+
+UPDATE sync_logs SET status = 'failed' WHERE success = FALSE;
@@ -0,0 +1,8 @@
+-- database/migrations/0003_sync_metadata.sql
+-- 동기화 메타데이터 (upstream 변경 감지 지문, 마지막 전체 동기화 시각 등)
+
+CREATE TABLE IF NOT EXISTS sync_metadata (
+    meta_key VARCHAR(64) PRIMARY KEY COMMENT '메타데이터 키',
+    meta_value TEXT COMMENT '메타데이터 값',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 수정 시각'
+) COMMENT '정책 동기화 메타데이터 테이블';
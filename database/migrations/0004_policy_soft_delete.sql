@@ -0,0 +1,44 @@
+-- database/migrations/0004_policy_soft_delete.sql
+-- upstream 삭제 감지 (소프트 삭제) - 활성 여부와 마지막 확인 시각
+
+ALTER TABLE policies
+    ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT TRUE COMMENT '활성 여부 (upstream에서 사라지면 FALSE)' AFTER content_hash;
+
+ALTER TABLE policies
+    ADD COLUMN last_seen_at TIMESTAMP NULL COMMENT '마지막으로 upstream 전체 조회에서 확인된 시각' AFTER is_active;
+
+CREATE INDEX idx_active_seen ON policies (is_active, last_seen_at);
+
+ALTER TABLE sync_logs
+    ADD COLUMN deleted_policies INT DEFAULT 0 COMMENT 'upstream 삭제로 비활성화된 정책 수' AFTER unchanged_policies;
+
+-- 최근 변경 뷰는 활성 정책만 보여줌
+CREATE OR REPLACE VIEW recent_policy_changes AS
+SELECT
+    id,
+    biz_nm,
+    biz_mclsf_nm,
+    CASE
+        WHEN created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN 'new'
+        WHEN updated_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+        AND updated_at > created_at THEN 'updated'
+        ELSE 'existing'
+    END as change_type,
+    created_at,
+    updated_at
+FROM policies
+WHERE is_active = TRUE
+    AND (
+        (
+            created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+        )
+        OR (
+            updated_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+            AND updated_at > created_at
+        )
+    )
+ORDER BY
+    CASE
+        WHEN created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN created_at
+        ELSE updated_at
+    END DESC;
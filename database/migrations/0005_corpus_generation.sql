@@ -0,0 +1,10 @@
+-- database/migrations/0005_corpus_generation.sql
+-- 정책 데이터 변경 세대 (동기화가 기록하고 앱 프로세스들이 폴링해 캐시를 무효화)
+
+CREATE TABLE IF NOT EXISTS corpus_generation (
+    generation BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '단조 증가하는 세대 번호',
+    created_ids MEDIUMTEXT COMMENT '생성된 정책 ID 목록 (JSON 배열)',
+    updated_ids MEDIUMTEXT COMMENT '변경된 정책 ID 목록 (JSON 배열)',
+    deleted_ids MEDIUMTEXT COMMENT '비활성화된 정책 ID 목록 (JSON 배열)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '세대 생성 시각'
+) COMMENT '정책 데이터 변경 이벤트 테이블';
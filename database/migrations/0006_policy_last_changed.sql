@@ -0,0 +1,35 @@
+-- database/migrations/0006_policy_last_changed.sql
+-- 실제 내용 변경 시각/종류 (동기화가 내용이 바뀐 경우에만 갱신) - 최근 변경 조회를 인덱스 범위 스캔으로
+
+ALTER TABLE policies
+    ADD COLUMN last_changed_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP COMMENT '마지막 실제 내용 변경 시각 (신규/변경/삭제)' AFTER last_seen_at;
+
+ALTER TABLE policies
+    ADD COLUMN change_kind ENUM('new', 'updated', 'deleted') NOT NULL DEFAULT 'new' COMMENT '마지막 변경 종류' AFTER last_changed_at;
+
+-- 기존 행은 생성/수정 시각으로 채움 (컬럼 추가 시점으로 채워져 모두 최근 신규처럼 보이지 않도록)
+UPDATE policies
+SET
+    change_kind = CASE
+        WHEN NOT is_active THEN 'deleted'
+        WHEN updated_at > created_at THEN 'updated'
+        ELSE 'new'
+    END,
+    last_changed_at = GREATEST(created_at, updated_at),
+    updated_at = updated_at;
+
+CREATE INDEX idx_active_changed ON policies (is_active, last_changed_at);
+
+CREATE OR REPLACE VIEW recent_policy_changes AS
+SELECT
+    id,
+    biz_nm,
+    biz_mclsf_nm,
+    change_kind as change_type,
+    created_at,
+    updated_at,
+    last_changed_at
+FROM policies
+WHERE is_active = TRUE
+    AND last_changed_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+ORDER BY last_changed_at DESC;
@@ -0,0 +1,9 @@
+-- database/migrations/0007_materialized_feeds.sql
+-- 동기화 시점에 미리 만들어 두는 조회용 피드 (최근 변경 정책 등)
+
+CREATE TABLE IF NOT EXISTS materialized_feeds (
+    feed_name VARCHAR(64) PRIMARY KEY COMMENT '피드 이름',
+    etag CHAR(32) NOT NULL COMMENT '피드 내용의 MD5 (응답 ETag 계산용)',
+    payload MEDIUMTEXT NOT NULL COMMENT '직렬화된 피드 (JSON)',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 갱신 시각'
+) COMMENT '동기화 시 갱신되는 조회용 피드 테이블';
@@ -0,0 +1,20 @@
+-- database/migrations/0008_policy_browse.sql
+-- 정책 탐색 키셋 페이지네이션: 분류 컬럼의 NULL을 ''로 정규화하고 (is_active, 대분류, 중분류, id) 인덱스 추가
+-- (NULL이 섞이면 (대분류, 중분류, id) > (...) 행 비교 결과가 NULL이 되어 커서 이후 행을 놓침)
+
+UPDATE policies
+SET
+    biz_lclsf_nm = COALESCE(biz_lclsf_nm, ''),
+    biz_mclsf_nm = COALESCE(biz_mclsf_nm, ''),
+    biz_sclsf_nm = COALESCE(biz_sclsf_nm, ''),
+    updated_at = updated_at
+WHERE biz_lclsf_nm IS NULL
+    OR biz_mclsf_nm IS NULL
+    OR biz_sclsf_nm IS NULL;
+
+ALTER TABLE policies
+    MODIFY COLUMN biz_lclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업대분류명 (없으면 빈 문자열)',
+    MODIFY COLUMN biz_mclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업중분류명 (없으면 빈 문자열)',
+    MODIFY COLUMN biz_sclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업소분류명 (없으면 빈 문자열)';
+
+CREATE INDEX idx_browse ON policies (is_active, biz_lclsf_nm, biz_mclsf_nm, id);
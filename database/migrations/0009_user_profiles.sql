@@ -0,0 +1,13 @@
+-- database/migrations/0009_user_profiles.sql
+-- 서버 측 사용자 프로필 (채팅 요청은 user_id만 보내고 프로필/파생 특성은 서버에서 조회)
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id INT PRIMARY KEY COMMENT '사용자 ID (users.id)',
+    profile_json TEXT NOT NULL COMMENT '사용자가 입력한 프로필 원본 (JSON)',
+    region_code CHAR(5) NULL COMMENT '거주 자치구 행정구역 코드 (파생)',
+    child_count TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '자녀 수 (파생)',
+    fingerprint CHAR(32) NOT NULL COMMENT '프로필 지문 (정규화한 프로필의 MD5)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '최초 저장 시각',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 수정 시각',
+    CONSTRAINT fk_user_profiles_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) COMMENT '사용자 프로필 테이블';
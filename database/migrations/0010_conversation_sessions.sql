@@ -0,0 +1,11 @@
+-- database/migrations/0010_conversation_sessions.sql
+-- 채팅 대화 세션 스필 저장소 (메모리 상한을 넘어 밀려난 세션을 만료 시각까지 보관)
+
+CREATE TABLE IF NOT EXISTS conversation_sessions (
+    session_id CHAR(32) PRIMARY KEY COMMENT '대화 세션 ID',
+    user_id INT NULL COMMENT '로그인 사용자 ID (비로그인 세션은 NULL)',
+    state_json MEDIUMTEXT NOT NULL COMMENT '대화 기록/직전 분석 결과/인용 정책 ID (JSON)',
+    expires_at TIMESTAMP NOT NULL COMMENT '세션 만료 시각',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 저장 시각',
+    INDEX idx_conversation_expires (expires_at)
+) COMMENT '채팅 대화 세션 스필 테이블';
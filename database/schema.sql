@@ -1,4 +1,6 @@
 -- database/schema.sql (호환성 개선 버전)
+-- 최신 전체 스키마 참고용 - 실제 적용은 database/migrations의 마이그레이션으로 함 (python migrate.py)
+-- 스키마를 바꿀 때는 새 마이그레이션 파일을 추가하고 이 파일도 함께 갱신할 것
 
 -- 데이터베이스 생성
 CREATE DATABASE IF NOT EXISTS seoul_childcare_db DEFAULT CHARACTER SET utf8mb4 DEFAULT COLLATE utf8mb4_unicode_ci;
@@ -10,9 +12,9 @@ CREATE TABLE IF NOT EXISTS policies (
     id INT AUTO_INCREMENT PRIMARY KEY,
 
 -- 서울열린데이터광장 Open API 필드들
-biz_lclsf_nm VARCHAR(50) COMMENT '사업대분류명',
-biz_mclsf_nm VARCHAR(50) COMMENT '사업중분류명',
-biz_sclsf_nm VARCHAR(50) COMMENT '사업소분류명',
+biz_lclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업대분류명 (없으면 빈 문자열)',
+biz_mclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업중분류명 (없으면 빈 문자열)',
+biz_sclsf_nm VARCHAR(50) NOT NULL DEFAULT '' COMMENT '사업소분류명 (없으면 빈 문자열)',
 biz_nm VARCHAR(255) UNIQUE COMMENT '사업명 (고유해야 하므로 UNIQUE 제약조건)',
 biz_cn TEXT COMMENT '사업내용',
 utztn_trpr_cn TEXT COMMENT '이용대상내용',
@@ -28,6 +30,14 @@ aply_site_addr VARCHAR(500) COMMENT '신청하기사이트주소',
 -- 변경사항 추적을 위한 컬럼
 content_hash VARCHAR(32) COMMENT '정책 내용의 MD5 해시값 (변경사항 감지용)',
 
+-- upstream 삭제 감지 (소프트 삭제)
+is_active BOOLEAN NOT NULL DEFAULT TRUE COMMENT '활성 여부 (upstream에서 사라지면 FALSE)',
+last_seen_at TIMESTAMP NULL COMMENT '마지막으로 upstream 전체 조회에서 확인된 시각',
+
+-- 실제 내용 변경 추적 (동기화가 내용이 바뀐 경우에만 갱신)
+last_changed_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP COMMENT '마지막 실제 내용 변경 시각 (신규/변경/삭제)',
+change_kind ENUM('new', 'updated', 'deleted') NOT NULL DEFAULT 'new' COMMENT '마지막 변경 종류',
+
 -- 타임스탬프 컬럼
 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '레코드 생성 시각',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '레코드 마지막 수정 시각'
@@ -49,13 +59,61 @@ CREATE TABLE IF NOT EXISTS sync_logs (
     new_policies INT DEFAULT 0 COMMENT '신규 정책 수',
     updated_policies INT DEFAULT 0 COMMENT '업데이트된 정책 수',
     unchanged_policies INT DEFAULT 0 COMMENT '변경 없는 정책 수',
+    deleted_policies INT DEFAULT 0 COMMENT 'upstream 삭제로 비활성화된 정책 수',
     total_processed INT DEFAULT 0 COMMENT '처리된 총 정책 수',
     duration_seconds DECIMAL(10, 2) COMMENT '소요 시간 (초)',
     success BOOLEAN DEFAULT TRUE COMMENT '성공 여부',
+    status ENUM('success', 'partial', 'failed') NOT NULL DEFAULT 'success' COMMENT '결과 상태 (partial: 일부 페이지 누락)',
     error_message TEXT COMMENT '오류 메시지 (실패 시)',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '동기화 실행 시각'
 ) COMMENT '정책 동기화 로그 테이블';
 
+-- 동기화 메타데이터 (upstream 변경 감지 지문, 마지막 전체 동기화 시각 등)
+CREATE TABLE IF NOT EXISTS sync_metadata (
+    meta_key VARCHAR(64) PRIMARY KEY COMMENT '메타데이터 키',
+    meta_value TEXT COMMENT '메타데이터 값',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 수정 시각'
+) COMMENT '정책 동기화 메타데이터 테이블';
+
+-- 정책 데이터 변경 세대 (동기화가 기록하고 앱 프로세스들이 폴링해 캐시를 무효화)
+CREATE TABLE IF NOT EXISTS corpus_generation (
+    generation BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '단조 증가하는 세대 번호',
+    created_ids MEDIUMTEXT COMMENT '생성된 정책 ID 목록 (JSON 배열)',
+    updated_ids MEDIUMTEXT COMMENT '변경된 정책 ID 목록 (JSON 배열)',
+    deleted_ids MEDIUMTEXT COMMENT '비활성화된 정책 ID 목록 (JSON 배열)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '세대 생성 시각'
+) COMMENT '정책 데이터 변경 이벤트 테이블';
+
+-- 동기화 시점에 미리 만들어 두는 조회용 피드 (최근 변경 정책 등)
+CREATE TABLE IF NOT EXISTS materialized_feeds (
+    feed_name VARCHAR(64) PRIMARY KEY COMMENT '피드 이름',
+    etag CHAR(32) NOT NULL COMMENT '피드 내용의 MD5 (응답 ETag 계산용)',
+    payload MEDIUMTEXT NOT NULL COMMENT '직렬화된 피드 (JSON)',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 갱신 시각'
+) COMMENT '동기화 시 갱신되는 조회용 피드 테이블';
+
+-- 서버 측 사용자 프로필 (채팅 요청은 user_id만 보내고 프로필/파생 특성은 서버에서 조회)
+CREATE TABLE IF NOT EXISTS user_profiles (
+    user_id INT PRIMARY KEY COMMENT '사용자 ID (users.id)',
+    profile_json TEXT NOT NULL COMMENT '사용자가 입력한 프로필 원본 (JSON)',
+    region_code CHAR(5) NULL COMMENT '거주 자치구 행정구역 코드 (파생)',
+    child_count TINYINT UNSIGNED NOT NULL DEFAULT 0 COMMENT '자녀 수 (파생)',
+    fingerprint CHAR(32) NOT NULL COMMENT '프로필 지문 (정규화한 프로필의 MD5)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '최초 저장 시각',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 수정 시각',
+    CONSTRAINT fk_user_profiles_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+) COMMENT '사용자 프로필 테이블';
+
+-- 채팅 대화 세션 스필 저장소 (메모리 상한을 넘어 밀려난 세션을 만료 시각까지 보관)
+CREATE TABLE IF NOT EXISTS conversation_sessions (
+    session_id CHAR(32) PRIMARY KEY COMMENT '대화 세션 ID',
+    user_id INT NULL COMMENT '로그인 사용자 ID (비로그인 세션은 NULL)',
+    state_json MEDIUMTEXT NOT NULL COMMENT '대화 기록/직전 분석 결과/인용 정책 ID (JSON)',
+    expires_at TIMESTAMP NOT NULL COMMENT '세션 만료 시각',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '마지막 저장 시각',
+    INDEX idx_conversation_expires (expires_at)
+) COMMENT '채팅 대화 세션 스필 테이블';
+
 -- 인덱스 생성 (호환성을 위해 개별 실행)
 -- 기본 인덱스들
 CREATE INDEX idx_biz_nm ON policies (biz_nm);
@@ -68,30 +126,24 @@ CREATE INDEX idx_content_hash ON policies (content_hash);
 
 CREATE INDEX idx_recent_changes ON policies (created_at, updated_at);
 
+CREATE INDEX idx_active_seen ON policies (is_active, last_seen_at);
+
+CREATE INDEX idx_active_changed ON policies (is_active, last_changed_at);
+
+-- 정책 탐색 키셋 페이지네이션 (분류순 정렬 + 커서 위치부터 범위 스캔)
+CREATE INDEX idx_browse ON policies (is_active, biz_lclsf_nm, biz_mclsf_nm, id);
+
 -- 샘플 데이터 확인용 뷰
 CREATE VIEW recent_policy_changes AS
 SELECT
     id,
     biz_nm,
     biz_mclsf_nm,
-    CASE
-        WHEN created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN 'new'
-        WHEN updated_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-        AND updated_at > created_at THEN 'updated'
-        ELSE 'existing'
-    END as change_type,
+    change_kind as change_type,
     created_at,
-    updated_at
+    updated_at,
+    last_changed_at
 FROM policies
-WHERE (
-        created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-    )
-    OR (
-        updated_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-        AND updated_at > created_at
-    )
-ORDER BY
-    CASE
-        WHEN created_at >= DATE_SUB(NOW(), INTERVAL 7 DAY) THEN created_at
-        ELSE updated_at
-    END DESC;
\ No newline at end of file
+WHERE is_active = TRUE
+    AND last_changed_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)
+ORDER BY last_changed_at DESC;
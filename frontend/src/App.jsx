@@ -18,7 +18,8 @@ import {
   fetchPolicyDetailById,
   validateUserProfile,
   getUserProfileSummary,
-  syncPoliciesManually
+  syncPoliciesManually,
+  logoutUser
 } from './services/api';
 
 function App() {
@@ -405,6 +406,7 @@ function App() {
         onLoginClick={handleTopBarLoginClick} 
         currentUser={currentUser} 
         onLogout={() => { 
+          logoutUser();
           setCurrentUser(null); 
           setAuthMessage('로그아웃 되었습니다.'); 
         }} 
@@ -3,6 +3,66 @@ import axios from 'axios';
 
 const API_BASE_URL = '/api'; // Vite 프록시를 사용
 
+// 로그인 세션 토큰 (access: 짧은 만료, refresh: access 재발급용)
+const SESSION_STORAGE_KEY = 'authSession';
+
+const getSession = () => {
+  try {
+    const session = localStorage.getItem(SESSION_STORAGE_KEY);
+    return session ? JSON.parse(session) : null;
+  } catch (error) {
+    return null;
+  }
+};
+
+const saveSession = ({ access_token, refresh_token }) => {
+  localStorage.setItem(SESSION_STORAGE_KEY, JSON.stringify({ access_token, refresh_token }));
+};
+
+const clearSession = () => localStorage.removeItem(SESSION_STORAGE_KEY);
+
+// 모든 API 요청에 access 토큰 첨부
+axios.interceptors.request.use((config) => {
+  const session = getSession();
+  if (session?.access_token && !config.headers.Authorization) {
+    config.headers.Authorization = `Bearer ${session.access_token}`;
+  }
+  return config;
+});
+
+// access 토큰 만료(401) 시 refresh 토큰으로 한 번 재발급 후 재시도 (동시 요청은 재발급 한 번을 공유)
+let refreshPromise = null;
+axios.interceptors.response.use(null, async (error) => {
+  const config = error.config;
+  const session = getSession();
+  if (
+    error.response?.status !== 401 ||
+    !session?.refresh_token ||
+    !config ||
+    config._retriedWithRefresh ||
+    config.url === `${API_BASE_URL}/token/refresh`
+  ) {
+    throw error;
+  }
+
+  try {
+    refreshPromise = refreshPromise || axios.post(`${API_BASE_URL}/token/refresh`, {
+      refresh_token: session.refresh_token,
+    });
+    const response = await refreshPromise;
+    saveSession(response.data);
+  } catch (refreshError) {
+    clearSession();
+    throw error;
+  } finally {
+    refreshPromise = null;
+  }
+
+  config._retriedWithRefresh = true;
+  config.headers.Authorization = `Bearer ${getSession().access_token}`;
+  return axios(config);
+});
+
 // 사용자 프로필 가져오기 헬퍼 함수
 const getUserProfile = () => {
   try {
@@ -14,12 +74,32 @@ const getUserProfile = () => {
   }
 };
 
+// 대화 세션 ID (서버가 첫 응답에서 발급, 이후 요청에 전달해 후속 질문이 이전 대화를 이어 씀)
+const CHAT_SESSION_STORAGE_KEY = 'chatSessionId';
+
+const withChatSession = (requestData) => {
+  const sessionId = sessionStorage.getItem(CHAT_SESSION_STORAGE_KEY);
+  return sessionId ? { ...requestData, session_id: sessionId } : requestData;
+};
+
+const rememberChatSession = (responseData) => {
+  if (responseData?.session_id) {
+    sessionStorage.setItem(CHAT_SESSION_STORAGE_KEY, responseData.session_id);
+  }
+  return responseData;
+};
+
+// 새 대화 시작 (이전 대화 맥락을 이어 쓰지 않음)
+export const resetChatSession = () => {
+  sessionStorage.removeItem(CHAT_SESSION_STORAGE_KEY);
+};
+
 // 향상된 채팅 API 호출 함수 (사용자 프로필 자동 포함)
 export const sendMessageToChat = async (messageText, includeProfile = true) => {
   try {
-    const requestData = {
+    const requestData = withChatSession({
       message: messageText,
-    };
+    });
 
     // 사용자 프로필 자동 포함 (옵션)
     if (includeProfile) {
@@ -33,7 +113,7 @@ export const sendMessageToChat = async (messageText, includeProfile = true) => {
     }
 
     const response = await axios.post(`${API_BASE_URL}/chat`, requestData);
-    return response.data; // { answer, cited_policies, personalized, confidence_score 등 }
+    return rememberChatSession(response.data); // { answer, cited_policies, personalized, confidence_score, session_id 등 }
   } catch (error) {
     console.error("API 요청 중 오류 발생 (chat):", error.response ? error.response.data : error.message);
     throw error.response ? error.response.data : new Error('채팅 API 요청 중 서버 오류가 발생했습니다.');
@@ -49,16 +129,16 @@ export const findPersonalizedPolicies = async (messageText = "내 상황에 맞
   }
 
   try {
-    const requestData = {
+    const requestData = withChatSession({
       message: messageText,
       user_profile: userProfile,
       personalized_search: true // 맞춤 검색임을 명시
-    };
+    });
 
     console.log('맞춤 정책 검색 요청:', requestData);
 
     const response = await axios.post(`${API_BASE_URL}/chat`, requestData);
-    return response.data;
+    return rememberChatSession(response.data);
   } catch (error) {
     console.error("맞춤 정책 검색 중 오류:", error.response ? error.response.data : error.message);
     throw error.response ? error.response.data : new Error('맞춤 정책 검색 중 오류가 발생했습니다.');
@@ -126,23 +206,156 @@ export const fetchPolicyDetailById = async (policyId) => {
   }
 };
 
+const MAX_BATCH_POLICY_IDS = 50;
+
+// 여러 정책을 한 번에 가져오기 (fields를 지정하면 해당 컬럼만 반환)
+// 서버 제한(50개)을 넘는 ID 목록은 나누어 요청한 뒤 요청 순서대로 합침
+export const fetchPoliciesByIds = async (policyIds, fields = null) => {
+  const ids = [...new Set(policyIds)];
+  if (ids.length === 0) {
+    return { success: true, data: [], missing_ids: [] };
+  }
+  try {
+    const chunks = [];
+    for (let i = 0; i < ids.length; i += MAX_BATCH_POLICY_IDS) {
+      chunks.push(ids.slice(i, i + MAX_BATCH_POLICY_IDS));
+    }
+    const responses = await Promise.all(
+      chunks.map((chunk) =>
+        axios.get(`${API_BASE_URL}/policies`, {
+          params: {
+            ids: chunk.join(','),
+            ...(fields ? { fields: fields.join(',') } : {}),
+          },
+        })
+      )
+    );
+    return {
+      success: true,
+      data: responses.flatMap((response) => response.data.data || []),
+      missing_ids: responses.flatMap((response) => response.data.missing_ids || []),
+    };
+  } catch (error) {
+    console.error("API 요청 중 오류 발생 (policies):", error.response ? error.response.data : error.message);
+    const errorMessage = error.response?.data?.message || error.message || "정책 목록 요청 중 알 수 없는 서버 오류가 발생했습니다.";
+    throw new Error(errorMessage);
+  }
+};
+
+// 정책 목록 탐색 (분류 필터 + 커서 기반 페이지네이션)
+// 다음 페이지는 이전 응답의 next_cursor를 cursor로 전달
+export const browsePolicies = async ({ lclsf, mclsf, sclsf, cursor, limit = 20, facets } = {}) => {
+  try {
+    const params = { limit };
+    if (lclsf !== undefined) params.lclsf = lclsf;
+    if (mclsf !== undefined) params.mclsf = mclsf;
+    if (sclsf !== undefined) params.sclsf = sclsf;
+    if (cursor) params.cursor = cursor;
+    if (facets !== undefined) params.facets = facets;
+    const response = await axios.get(`${API_BASE_URL}/policies/browse`, { params });
+    return response.data; // { success, data, has_more, next_cursor, facets? }
+  } catch (error) {
+    console.error("API 요청 중 오류 발생 (policies/browse):", error.response ? error.response.data : error.message);
+    const errorMessage = error.response?.data?.message || error.message || "정책 목록 탐색 중 알 수 없는 서버 오류가 발생했습니다.";
+    throw new Error(errorMessage);
+  }
+};
+
+// 정책명/분류명 자동완성 (초성 입력 가능)
+export const fetchSuggestions = async (query, limit = 8) => {
+  if (!query || !query.trim()) {
+    return { success: true, query: '', suggestions: [] };
+  }
+  try {
+    const response = await axios.get(`${API_BASE_URL}/suggest`, { params: { q: query, limit } });
+    return response.data; // { success, query, suggestions: [{ type, id?, text, category?, level?, count? }] }
+  } catch (error) {
+    console.error("API 요청 중 오류 발생 (suggest):", error.response ? error.response.data : error.message);
+    const errorMessage = error.response?.data?.message || error.message || "자동완성 요청 중 알 수 없는 서버 오류가 발생했습니다.";
+    throw new Error(errorMessage);
+  }
+};
+
+// 서버에 저장된 사용자 프로필 조회 (저장된 프로필이 없으면 null)
+export const fetchUserProfile = async (userId) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/users/${userId}/profile`);
+    return response.data; // { success, profile, features: { region_code, child_count, children, fingerprint, ... } }
+  } catch (error) {
+    if (error.response?.status === 404) {
+      return null;
+    }
+    console.error("API 요청 중 오류 발생 (user profile):", error.response ? error.response.data : error.message);
+    throw new Error(error.response?.data?.message || '프로필 조회 중 서버 오류가 발생했습니다.');
+  }
+};
+
+// 사용자 프로필 서버 저장 (이후 채팅은 user_id만 보내면 서버 프로필 사용)
+export const saveUserProfile = async (userId, profile) => {
+  try {
+    const response = await axios.put(`${API_BASE_URL}/users/${userId}/profile`, profile);
+    return response.data;
+  } catch (error) {
+    console.error("API 요청 중 오류 발생 (save user profile):", error.response ? error.response.data : error.message);
+    throw new Error(error.response?.data?.message || '프로필 저장 중 서버 오류가 발생했습니다.');
+  }
+};
+
+const SYNC_JOB_POLL_INTERVAL_MS = 2000;
+
 // 수동 정책 동기화 API (관리자용)
-export const syncPoliciesManually = async () => {
+// 서버는 백그라운드 작업 ID를 즉시 반환하므로, 작업이 끝날 때까지 상태를 폴링한 뒤
+// 기존과 같은 형식({ success, message, changes })으로 결과를 반환
+export const syncPoliciesManually = async (onProgress) => {
+  let jobId;
   try {
     console.log('수동 정책 동기화 요청');
     const response = await axios.post(`${API_BASE_URL}/sync-policies`);
-    const result = response.data;
-    
-    console.log('동기화 응답:', {
-      success: result.success,
-      message: result.message,
-      changes: result.changes
-    });
-    
-    return result; // { success: true, message: "...", changes: {...} }
+    jobId = response.data.job_id;
+    console.log('동기화 작업 등록:', { message: response.data.message, jobId });
+  } catch (error) {
+    // 409: 이미 진행 중인 작업이 있으면 그 작업의 완료를 기다림
+    if (error.response?.status === 409 && error.response.data?.job_id) {
+      jobId = error.response.data.job_id;
+      console.log('진행 중인 동기화 작업에 합류:', jobId);
+    } else {
+      console.error("수동 정책 동기화 중 오류:", error.response ? error.response.data : error.message);
+      throw error.response?.data || new Error('정책 동기화 중 서버 오류가 발생했습니다.');
+    }
+  }
+
+  while (true) {
+    const { job } = await fetchSyncJobStatus(jobId);
+    if (onProgress) onProgress(job);
+
+    // partial: 일부 페이지를 받지 못해 다음 동기화에서 이어서 진행
+    if (['succeeded', 'partial', 'failed'].includes(job.status)) {
+      const result = {
+        success: job.status === 'succeeded',
+        message: job.message,
+        changes: job.changes || {},
+        job
+      };
+      console.log('동기화 응답:', {
+        success: result.success,
+        message: result.message,
+        changes: result.changes
+      });
+      return result; // { success: true, message: "...", changes: {...}, job: {...} }
+    }
+
+    await new Promise(resolve => setTimeout(resolve, SYNC_JOB_POLL_INTERVAL_MS));
+  }
+};
+
+// 동기화 작업 진행 상황 조회 API (관리자용)
+export const fetchSyncJobStatus = async (jobId) => {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/sync-jobs/${jobId}`);
+    return response.data; // { success: true, job: { status, progress, changes, ... } }
   } catch (error) {
-    console.error("수동 정책 동기화 중 오류:", error.response ? error.response.data : error.message);
-    throw error.response?.data || new Error('정책 동기화 중 서버 오류가 발생했습니다.');
+    console.error(`동기화 작업 조회 중 오류 (${jobId}):`, error.response ? error.response.data : error.message);
+    throw error.response?.data || new Error('동기화 작업 조회 중 서버 오류가 발생했습니다.');
   }
 };
 
@@ -163,13 +376,22 @@ export const loginUser = async (credentials) => {
   // credentials: { username, password }
   try {
     const response = await axios.post(`${API_BASE_URL}/login`, credentials);
-    return response.data; // { success: true, message: "...", user: { id, username } } 또는 { success: false, message: "..." }
+    if (response.data.success && response.data.access_token) {
+      saveSession(response.data);
+    }
+    return response.data; // { success: true, message: "...", user: { id, username }, access_token, refresh_token } 또는 { success: false, message: "..." }
   } catch (error) {
     console.error("API 요청 중 오류 발생 (login):", error.response ? error.response.data : error.message);
     throw error.response?.data || new Error('로그인 API 요청 중 서버 오류가 발생했습니다.');
   }
 };
 
+// 로그아웃 (저장된 세션 토큰 삭제)
+export const logoutUser = () => {
+  clearSession();
+  resetChatSession();
+};
+
 // 사용자 프로필 유효성 검사 함수
 export const validateUserProfile = () => {
   const userProfile = getUserProfile();
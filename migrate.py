@@ -0,0 +1,291 @@
+# migrate.py
+# 버전 관리되는 DB 스키마 마이그레이션 도구
+#
+# database/migrations/NNNN_설명.sql 파일을 번호 순서대로 한 번씩 적용하고
+# 적용 이력을 schema_migrations 테이블에 기록함.
+# 이미 schema.sql로 만든 DB에도 적용할 수 있도록 '이미 존재함' 계열 오류는 건너뜀.
+#
+# 사용법:
+#   python migrate.py          # 미적용 마이그레이션 적용
+#   python migrate.py status   # 적용 현황 출력
+
+import hashlib
+import logging
+import os
+import re
+import sys
+
+import mysql.connector
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_NAME = os.getenv("DB_NAME", "seoul_childcare_db")
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "database", "migrations"
+)
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# 여러 프로세스(앱 워커, CLI)가 동시에 시작해도 한 곳에서만 적용하도록 잡는 락
+MIGRATION_LOCK_NAME = "aibbot_schema_migrate"
+MIGRATION_LOCK_TIMEOUT_SECONDS = 60
+
+# 재실행해도 결과가 같은 DDL 오류 (마이그레이션 중간 실패 후 재시도, 기존 DB 편입 시)
+IGNORABLE_ERRNOS = {
+    1050,  # ER_TABLE_EXISTS_ERROR - 테이블/뷰가 이미 존재
+    1060,  # ER_DUP_FIELDNAME - 컬럼이 이미 존재
+    1061,  # ER_DUP_KEYNAME - 인덱스가 이미 존재
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY - 삭제할 컬럼/인덱스가 이미 없음
+}
+
+
+class MigrationError(Exception):
+    """마이그레이션 파일 구성이 잘못되었거나 적용에 실패한 경우"""
+
+
+class Migration:
+    """마이그레이션 파일 1개"""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.md5(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def statements(self):
+        return split_sql_statements(self.sql)
+
+
+def split_sql_statements(script):
+    """
+    SQL 스크립트를 개별 문장으로 분리
+    문자열('...', "...")과 백틱 식별자, 주석(--, #, /* */) 안의 세미콜론은 구분자로 보지 않음
+    주석은 문장에서 제거
+    """
+    statements = []
+    current = []
+    i = 0
+    length = len(script)
+    while i < length:
+        ch = script[i]
+        nxt = script[i + 1] if i + 1 < length else ""
+
+        # 한 줄 주석 (-- 뒤에는 공백/줄끝이 와야 MySQL 주석)
+        is_dash_comment = (
+            ch == "-" and nxt == "-" and (i + 2 >= length or script[i + 2].isspace())
+        )
+        if is_dash_comment or ch == "#":
+            end = script.find("\n", i)
+            i = length if end == -1 else end
+            continue
+
+        # 블록 주석
+        if ch == "/" and nxt == "*":
+            end = script.find("*/", i + 2)
+            if end == -1:
+                raise MigrationError("닫히지 않은 블록 주석이 있습니다.")
+            i = end + 2
+            current.append(" ")
+            continue
+
+        # 문자열 / 식별자 리터럴
+        if ch in ("'", '"', "`"):
+            quote = ch
+            j = i + 1
+            while j < length:
+                if script[j] == "\\" and quote != "`":
+                    j += 2
+                    continue
+                if script[j] == quote:
+                    # 따옴표 두 번은 이스케이프
+                    if j + 1 < length and script[j + 1] == quote:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            if j >= length:
+                raise MigrationError("닫히지 않은 문자열 리터럴이 있습니다.")
+            current.append(script[i : j + 1])
+            i = j + 1
+            continue
+
+        if ch == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+
+        current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """마이그레이션 파일을 버전 순으로 로드 (버전 중복 시 MigrationError)"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(
+                f"마이그레이션 버전 중복: {migrations[version].path}, {filename}"
+            )
+        migrations[version] = Migration(
+            version, match.group(2), os.path.join(directory, filename)
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def get_server_connection():
+    """데이터베이스를 지정하지 않은 MySQL 서버 연결"""
+    return mysql.connector.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        connect_timeout=10,
+    )
+
+
+def _ensure_database(cursor):
+    cursor.execute(
+        f"CREATE DATABASE IF NOT EXISTS `{DB_NAME}` "
+        f"DEFAULT CHARACTER SET utf8mb4 DEFAULT COLLATE utf8mb4_unicode_ci"
+    )
+    cursor.execute(f"USE `{DB_NAME}`")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY COMMENT '마이그레이션 번호',
+            name VARCHAR(255) NOT NULL COMMENT '마이그레이션 이름',
+            checksum CHAR(32) NOT NULL COMMENT '적용 당시 파일의 MD5',
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '적용 시각'
+        ) COMMENT '적용된 스키마 마이그레이션 이력'
+    """
+    )
+
+
+def _applied_migrations(cursor):
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {version: checksum for version, checksum in cursor.fetchall()}
+
+
+def _apply_migration(conn, cursor, migration):
+    logger.info(f"마이그레이션 적용: {migration.version:04d}_{migration.name}")
+    for statement in migration.statements:
+        try:
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+        except mysql.connector.Error as err:
+            if err.errno not in IGNORABLE_ERRNOS:
+                raise MigrationError(
+                    f"{migration.version:04d}_{migration.name} 적용 실패: {err}\n"
+                    f"실패한 SQL 문: {statement[:200]}"
+                ) from err
+            logger.info(f"  이미 적용된 변경 건너뜀: {err.msg}")
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+    conn.commit()
+
+
+def run_migrations(directory=MIGRATIONS_DIR):
+    """
+    미적용 마이그레이션을 순서대로 적용하고 적용한 버전 목록 반환
+    (DDL은 MySQL에서 자동 커밋되므로 마이그레이션은 재실행해도 안전하게 작성할 것)
+    """
+    migrations = load_migrations(directory)
+    conn = get_server_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT GET_LOCK(%s, %s)",
+            (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT_SECONDS),
+        )
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError("다른 프로세스의 마이그레이션이 끝나지 않았습니다.")
+
+        try:
+            _ensure_database(cursor)
+            applied = _applied_migrations(cursor)
+            applied_now = []
+            for migration in migrations:
+                if migration.version in applied:
+                    if applied[migration.version] != migration.checksum:
+                        logger.warning(
+                            f"적용된 마이그레이션 파일이 수정됨: {migration.path} "
+                            f"(이미 적용된 파일은 고치지 말고 새 마이그레이션을 추가하세요)"
+                        )
+                    continue
+                _apply_migration(conn, cursor, migration)
+                applied_now.append(migration.version)
+
+            if applied_now:
+                logger.info(f"마이그레이션 {len(applied_now)}개 적용 완료")
+            else:
+                logger.info("스키마가 최신 상태입니다.")
+            return applied_now
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def print_status(directory=MIGRATIONS_DIR):
+    """마이그레이션 적용 현황 출력"""
+    migrations = load_migrations(directory)
+    conn = get_server_connection()
+    cursor = conn.cursor()
+    try:
+        _ensure_database(cursor)
+        applied = _applied_migrations(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    for migration in migrations:
+        if migration.version not in applied:
+            state = "미적용"
+        elif applied[migration.version] != migration.checksum:
+            state = "적용됨 (파일 수정됨)"
+        else:
+            state = "적용됨"
+        print(f"{migration.version:04d}_{migration.name}: {state}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    command = sys.argv[1] if len(sys.argv) > 1 else "up"
+    try:
+        if command == "status":
+            print_status()
+        elif command == "up":
+            run_migrations()
+        else:
+            print("사용법: python migrate.py [up|status]")
+            sys.exit(1)
+    except (MigrationError, mysql.connector.Error) as e:
+        logger.error(f"마이그레이션 실패: {e}")
+        sys.exit(1)
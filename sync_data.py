@@ -3,11 +3,18 @@
 import requests
 import mysql.connector
 import os
+import json
+import queue
+import random
 import schedule
 import time
 import threading
 import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
 from dotenv import load_dotenv
 import logging
 
@@ -36,11 +43,269 @@ SERVICE_NAME = "VwSmpBizInfo"
 REQUEST_TYPE = "json"
 CHUNK_SIZE = 100
 
+# API 동시 요청 설정 (서울시 Open API 호출 한도를 넘지 않도록 조절)
+FETCH_MAX_WORKERS = int(os.getenv("SEOUL_API_MAX_WORKERS", "4"))
+FETCH_MAX_RPS = float(os.getenv("SEOUL_API_MAX_RPS", "5"))
+
+# 페이지별 재시도 설정 (지수 백오프 + 지터)
+FETCH_MAX_RETRIES = int(os.getenv("SEOUL_API_MAX_RETRIES", "4"))
+FETCH_BACKOFF_BASE_SECONDS = 1.0
+FETCH_BACKOFF_MAX_SECONDS = 30.0
+
+# 중단된 동기화를 이어받기 위한 체크포인트 파일 (DB 반영이 끝난 페이지 목록)
+SYNC_CHECKPOINT_PATH = os.getenv(
+    "SYNC_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sync_checkpoint.json"),
+)
+SYNC_CHECKPOINT_MAX_AGE_HOURS = 24
+
+# 스트리밍 동기화 파이프라인 설정
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "500"))  # DB 쓰기 배치 크기 (행)
+PIPELINE_QUEUE_SIZE = 4  # 단계 사이 큐에 쌓일 수 있는 최대 항목(페이지/배치) 수
+STATS_SAMPLE_SIZE = 5  # 통계에 보관할 변경 정책 요약 개수 (로그 출력용)
+
+# 변경사항 비교 방식: "batch" (배치별 해시 비교, 기본값) 또는 "staging" (임시 테이블 조인)
+SYNC_DIFF_MODE = os.getenv("SYNC_DIFF_MODE", "batch")
+
+# 여러 프로세스(워커) 중 하나만 동기화를 실행하도록 하는 MySQL named lock
+SYNC_LOCK_NAME = "aibbot_policy_sync"
+
+# 변경 감지 프로브: 첫/마지막 페이지 + 전체 개수 지문이 이전과 같으면 전체 동기화 생략
+# (단, 마지막 전체 동기화 후 이 기간이 지나면 지문과 무관하게 전체 검증)
+SYNC_FULL_VERIFY_DAYS = float(os.getenv("SYNC_FULL_VERIFY_DAYS", "7"))
+
+# 최근 변경 피드 (materialized_feeds 테이블) - /api/recent-policies가 지원하는 최대 범위
+# 최신순 상위 RECENT_FEED_MAX_ITEMS개만 저장하면 더 짧은 기간/개수 조회는 앞부분을 잘라 응답 가능
+RECENT_FEED_NAME = "recent_policies"
+RECENT_FEED_MAX_DAYS = 30
+RECENT_FEED_MAX_ITEMS = 50
+
+# 스테이징 모드에서 policies_staging s LEFT JOIN policies p 결과를 분류하는 조건
+STAGING_DIFF_CONDITIONS = {
+    "new": "p.id IS NULL",
+    "updated": (
+        "p.id IS NOT NULL AND (NOT (p.content_hash <=> s.content_hash) OR NOT p.is_active)"
+    ),
+    "unchanged": "p.id IS NOT NULL AND p.content_hash <=> s.content_hash AND p.is_active",
+}
+
+# 전체 조회에서 보이지 않은 정책을 비활성화할 때의 안전 장치
+# (API 이상으로 목록이 크게 줄어든 경우 활성 정책의 이 비율 이상은 한 번에 비활성화하지 않음)
+SYNC_MAX_DEACTIVATE_RATIO = 0.5
+
+# 정책 upsert 대상 컬럼 (_policy_values 순서와 동일)
+POLICY_UPSERT_COLUMNS = (
+    "biz_lclsf_nm",
+    "biz_mclsf_nm",
+    "biz_sclsf_nm",
+    "biz_nm",
+    "biz_cn",
+    "utztn_trpr_cn",
+    "utztn_mthd_cn",
+    "oper_hr_cn",
+    "aref_cn",
+    "trgt_child_age",
+    "trgt_itrst",
+    "trgt_rgn",
+    "deviw_site_addr",
+    "aply_site_addr",
+    "content_hash",
+    "is_active",
+    "last_seen_at",
+)
+
+# multi-row INSERT 한 문장에 넣을 최대 행 수 (TEXT 컬럼 크기와 max_allowed_packet 고려)
+SYNC_UPSERT_ROWS = int(os.getenv("SYNC_UPSERT_ROWS", "250"))
+
+# INSERT ... ON DUPLICATE KEY UPDATE 의 UPDATE 절에서 제외하는 컬럼 (중복 판정 키)
+_UPSERT_KEY_COLUMNS = ("biz_nm",)
+
+
+@lru_cache(maxsize=4)
+def build_upsert_update_clause(table="policies"):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE 의 UPDATE 절 (content_hash 포함)
+    INSERT ... SELECT에서는 SELECT 쪽에도 같은 이름의 컬럼(content_hash, is_active 등)이 있어
+    한정하지 않은 컬럼은 모호해지므로(1052) 대상 테이블 컬럼은 모두 table로 한정하고,
+    새 값은 VALUES()로만 참조함
+    """
+    # 실제 내용 변경(또는 비활성 정책 복귀) 여부 - 기존 행 값이 바뀌기 전에 평가해야 하므로
+    # 변경 추적 컬럼을 가장 먼저 대입함 (대입은 왼쪽부터 순서대로 적용됨)
+    changed = (
+        f"NOT ({table}.content_hash <=> VALUES(content_hash)) OR NOT {table}.is_active"
+    )
+    assignments = [
+        f"{table}.updated_at = IF({changed}, CURRENT_TIMESTAMP, {table}.updated_at)",
+        f"{table}.last_changed_at = IF({changed}, CURRENT_TIMESTAMP, {table}.last_changed_at)",
+        f"{table}.change_kind = IF({changed}, 'updated', {table}.change_kind)",
+    ] + [
+        f"{table}.{column} = VALUES({column})"
+        for column in POLICY_UPSERT_COLUMNS
+        if column not in _UPSERT_KEY_COLUMNS
+    ]
+    return "\n    ON DUPLICATE KEY UPDATE\n        " + ",\n        ".join(assignments) + "\n"
+
+
+@lru_cache(maxsize=8)
+def build_upsert_sql(row_count, table="policies"):
+    """row_count개 행을 한 번에 upsert하는 multi-row INSERT 문 생성"""
+    row_placeholder = "(" + ", ".join(["%s"] * len(POLICY_UPSERT_COLUMNS)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(POLICY_UPSERT_COLUMNS)}) VALUES "
+        + ", ".join([row_placeholder] * row_count)
+        + build_upsert_update_clause(table)
+    )
+
+
+class SeoulApiError(Exception):
+    """서울시 Open API가 정상 결과 코드(INFO-000)를 주지 않은 경우"""
+
+
+class RateLimiter:
+    """요청 시작 간격을 1/max_rps초 이상으로 유지하는 스레드 안전 rate limiter"""
+
+    def __init__(self, max_rps):
+        self.interval = 1.0 / max_rps if max_rps > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        """다음 요청 슬롯까지 대기"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SyncCheckpoint:
+    """
+    DB 반영까지 끝난 API 페이지 목록을 로컬 파일에 저장하는 체크포인트
+    동기화가 중간에 실패하면 다음 실행 시 이미 반영된 페이지는 건너뛰고 이어서 진행
+    (전체 개수가 달라졌거나 오래된 체크포인트는 폐기)
+    """
+
+    def __init__(self, path=SYNC_CHECKPOINT_PATH):
+        self.path = path
+        self.started_at = None
+        self._meta = None
+
+    def load(self, total_count):
+        """total_count에 맞는 체크포인트의 완료 페이지 시작 위치 집합 반환 (없으면 새로 시작)"""
+        meta = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        if meta:
+            started_at = datetime.fromisoformat(meta["started_at"])
+            expired = datetime.now() - started_at > timedelta(
+                hours=SYNC_CHECKPOINT_MAX_AGE_HOURS
+            )
+            if meta.get("total_count") == total_count and not expired:
+                self.started_at = started_at
+                self._meta = meta
+                completed = set(meta.get("pages", []))
+                logger.info(
+                    f"체크포인트에서 {len(completed)}개 페이지를 이어받음 (시작: {started_at})"
+                )
+                return completed
+            logger.info("체크포인트가 현재 데이터와 맞지 않거나 오래되어 폐기함")
+
+        self.started_at = datetime.now()
+        self._meta = {
+            "total_count": total_count,
+            "started_at": self.started_at.isoformat(),
+            "pages": [],
+        }
+        self._write()
+        return set()
+
+    def mark_completed(self, start_indexes):
+        """DB 반영이 끝난 페이지 기록"""
+        self._meta["pages"].extend(start_indexes)
+        self._write()
+
+    def _write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """체크포인트 삭제 (전체 페이지를 정상적으로 반영한 뒤 호출)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class _StageError:
+    """파이프라인 단계 스레드에서 발생한 예외 (소비자 쪽에서 다시 발생시킴)"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+_STAGE_END = object()
+
+
+def _pipeline_stage(iterable, name, maxsize=PIPELINE_QUEUE_SIZE):
+    """
+    iterable을 별도 스레드에서 소비해 크기 제한 큐로 넘겨주는 파이프라인 단계
+    앞 단계(API 조회, 해시/비교)와 뒤 단계(DB 쓰기)가 겹쳐서 실행되며,
+    큐가 가득 차면 앞 단계가 대기하므로 메모리 사용량은 큐 크기로 제한됨
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_STAGE_END)
+        except BaseException as e:
+            put(_StageError(e))
+        finally:
+            # 소비자가 중단한 경우에도 앞 단계 제너레이터의 정리 코드 실행
+            close = getattr(iterable, "close", None)
+            if close:
+                close()
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _STAGE_END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
 
 class PolicySyncService:
     """정책 데이터 자동 동기화 서비스 (실제 변경사항 추적)"""
 
-    def __init__(self):
+    def __init__(self, progress_callback=None):
+        # progress_callback(**fields): 진행 상황 보고용 (백그라운드 작업 상태 조회에 사용)
+        self.progress_callback = progress_callback
         self.db_config = {
             "host": DB_HOST,
             "port": DB_PORT,
@@ -49,6 +314,15 @@ class PolicySyncService:
             "database": DB_NAME,
         }
 
+    def _report_progress(self, **fields):
+        """진행 상황 콜백 호출 (콜백 오류가 동기화를 중단시키지 않도록 함)"""
+        if not self.progress_callback:
+            return
+        try:
+            self.progress_callback(**fields)
+        except Exception as e:
+            logger.warning(f"진행 상황 보고 실패: {e}")
+
     def get_db_connection(self):
         """데이터베이스 연결"""
         try:
@@ -57,6 +331,248 @@ class PolicySyncService:
             logger.error(f"DB 연결 실패: {err}")
             raise err
 
+    @contextmanager
+    def sync_lock(self):
+        """
+        MySQL GET_LOCK 기반 프로세스 간 동기화 락 (리더 선출)
+        락을 얻으면 True, 다른 프로세스가 보유 중이면 False를 yield
+        락은 연결 세션에 묶여 있으므로 프로세스가 죽으면 MySQL이 자동으로 해제함
+        """
+        conn = None
+        cursor = None
+        acquired = False
+        try:
+            try:
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                cursor.execute("SELECT GET_LOCK(%s, 0)", (SYNC_LOCK_NAME,))
+                row = cursor.fetchone()
+                acquired = bool(row and row[0] == 1)
+            except mysql.connector.Error as err:
+                logger.error(f"동기화 락 획득 실패: {err}")
+
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (SYNC_LOCK_NAME,))
+                    cursor.fetchone()
+                except mysql.connector.Error as err:
+                    logger.warning(f"동기화 락 해제 실패 (연결 종료 시 자동 해제): {err}")
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+    def save_sync_log(
+        self,
+        sync_type,
+        stats=None,
+        duration_seconds=None,
+        success=True,
+        error_message=None,
+        partial=False,
+    ):
+        """sync_logs 테이블에 동기화 결과 저장 (status: success / partial / failed)"""
+        stats = stats or {}
+        status = "success" if success else ("partial" if partial else "failed")
+        new_policies = stats.get("new", 0)
+        updated_policies = stats.get("updated", 0)
+        unchanged_policies = stats.get("unchanged", 0)
+        deleted_policies = stats.get("deleted", 0)
+
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO sync_logs (
+                    sync_type, new_policies, updated_policies, unchanged_policies,
+                    deleted_policies, total_processed, duration_seconds, success,
+                    status, error_message
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+                (
+                    sync_type,
+                    new_policies,
+                    updated_policies,
+                    unchanged_policies,
+                    deleted_policies,
+                    new_policies + updated_policies + unchanged_policies,
+                    duration_seconds,
+                    success,
+                    status,
+                    error_message,
+                ),
+            )
+            conn.commit()
+            logger.info(
+                f"sync_logs 저장 완료: {sync_type}({status}) - 신규:{new_policies}, 업데이트:{updated_policies}"
+            )
+        except mysql.connector.Error as err:
+            logger.error(f"sync_logs 저장 실패: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+    def has_scheduled_sync_since(self, since):
+        """since 이후 이미 기록된 스케줄 동기화가 있는지 확인 (같은 회차 중복 실행 방지)"""
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM sync_logs
+                WHERE sync_type = 'scheduled' AND created_at >= %s
+            """,
+                (since,),
+            )
+            row = cursor.fetchone()
+            return bool(row and row[0])
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+    def get_sync_metadata(self, key):
+        """sync_metadata 테이블에서 값 조회 (없으면 None)"""
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT meta_value FROM sync_metadata WHERE meta_key = %s", (key,)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+    def set_sync_metadata(self, values):
+        """sync_metadata 테이블에 {키: 값} 저장"""
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO sync_metadata (meta_key, meta_value) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE meta_value = VALUES(meta_value)
+            """,
+                list(values.items()),
+            )
+            conn.commit()
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+    def _upstream_fingerprint(self, total_count, first_rows, rate_limiter):
+        """
+        전체 개수 + 첫 페이지 + 마지막 페이지 내용으로 만든 upstream 지문
+        마지막 페이지 조회가 실패하면 None (프로브 불가 → 전체 동기화)
+        """
+        last_start = ((total_count - 1) // CHUNK_SIZE) * CHUNK_SIZE + 1
+        last_rows = []
+        if last_start > 1:
+            try:
+                _, last_rows = self._fetch_page_with_retry(last_start, rate_limiter)
+            except Exception as e:
+                logger.warning(f"프로브용 마지막 페이지 조회 실패: {e}")
+                return None
+
+        digest = hashlib.md5(str(total_count).encode("utf-8"))
+        for policy in list(first_rows) + list(last_rows):
+            digest.update(self.create_content_hash(policy).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _probe_unchanged(self, fingerprint):
+        """지문이 이전 동기화와 같고 전체 검증 주기가 지나지 않았으면 True"""
+        try:
+            stored_fingerprint = self.get_sync_metadata("upstream_fingerprint")
+            last_full_sync = self.get_sync_metadata("last_full_sync_at")
+        except mysql.connector.Error as err:
+            logger.warning(f"이전 동기화 지문 조회 실패 (전체 동기화 진행): {err}")
+            return False
+
+        if not fingerprint or fingerprint != stored_fingerprint or not last_full_sync:
+            return False
+
+        elapsed = datetime.now() - datetime.fromisoformat(last_full_sync)
+        if elapsed > timedelta(days=SYNC_FULL_VERIFY_DAYS):
+            logger.info(
+                f"마지막 전체 동기화 후 {elapsed.days}일 경과 - 주기적 전체 검증 실행"
+            )
+            return False
+        return True
+
+    def _resolve_policy_ids(self, cursor, names):
+        """정책명 목록을 ID 목록으로 변환"""
+        ids = []
+        for offset in range(0, len(names), SYNC_BATCH_SIZE):
+            chunk = names[offset : offset + SYNC_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"SELECT id FROM policies WHERE biz_nm IN ({placeholders})", chunk
+            )
+            ids.extend(row[0] for row in cursor.fetchall())
+        return sorted(ids)
+
+    def publish_corpus_change(self, stats):
+        """
+        동기화로 생성/변경/삭제된 정책 ID를 corpus_generation 테이블에 새 세대로 기록
+        (앱 프로세스들은 이 테이블을 폴링해 캐시를 정확히 무효화)
+        변경이 없으면 기록하지 않음. 새 세대 번호 반환 (없으면 None)
+        """
+        changed_names = stats["changed_names"]
+        if not (changed_names["new"] or changed_names["updated"] or stats["deleted_ids"]):
+            return None
+
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            created_ids = self._resolve_policy_ids(cursor, changed_names["new"])
+            updated_ids = self._resolve_policy_ids(cursor, changed_names["updated"])
+            cursor.execute(
+                """
+                INSERT INTO corpus_generation (created_ids, updated_ids, deleted_ids)
+                VALUES (%s, %s, %s)
+            """,
+                (
+                    json.dumps(created_ids),
+                    json.dumps(updated_ids),
+                    json.dumps(sorted(stats["deleted_ids"])),
+                ),
+            )
+            conn.commit()
+            generation = cursor.lastrowid
+            logger.info(
+                f"정책 변경 이벤트 발행: 세대 {generation} "
+                f"(생성 {len(created_ids)}, 변경 {len(updated_ids)}, "
+                f"삭제 {len(stats['deleted_ids'])})"
+            )
+            return generation
+        finally:
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
     def create_content_hash(self, policy_data):
         """정책 내용의 해시값 생성 (변경사항 감지용)"""
         # 주요 내용들을 합쳐서 해시 생성
@@ -76,279 +592,367 @@ class PolicySyncService:
         content_string = "|".join(content_parts)
         return hashlib.md5(content_string.encode("utf-8")).hexdigest()
 
-    def fetch_seoul_policies(self):
-        """서울시 Open API에서 모든 정책 데이터를 가져오는 함수"""
-        all_policies = []
-        start_index = 1
-        total_count = 0
+    def _fetch_page(self, start_index, rate_limiter):
+        """API 한 페이지(CHUNK_SIZE개) 조회. (전체 개수, 행 목록) 반환"""
+        end_index = start_index + CHUNK_SIZE - 1
+        api_url = f"{SEOUL_API_BASE_URL}/{API_KEY}/{REQUEST_TYPE}/{SERVICE_NAME}/{start_index}/{end_index}"
 
-        logger.info("서울시 API에서 정책 데이터 가져오기 시작...")
+        rate_limiter.wait()
+        response = requests.get(api_url, timeout=30)
+        response.raise_for_status()
+        data = response.json()
 
-        while True:
-            end_index = start_index + CHUNK_SIZE - 1
-            api_url = f"{SEOUL_API_BASE_URL}/{API_KEY}/{REQUEST_TYPE}/{SERVICE_NAME}/{start_index}/{end_index}"
+        # API 자체 결과 코드 체크
+        result_info = data.get(SERVICE_NAME, {}).get("RESULT")
+        if not result_info or result_info.get("CODE") != "INFO-000":
+            raise SeoulApiError(f"API 응답 오류: {result_info}")
+
+        total_count = int(data.get(SERVICE_NAME, {}).get("list_total_count", 0) or 0)
+        return total_count, data.get(SERVICE_NAME, {}).get("row", [])
 
+    def _fetch_page_with_retry(self, start_index, rate_limiter):
+        """페이지 조회 + 일시적 오류 시 지수 백오프(full jitter)로 재시도"""
+        for attempt in range(FETCH_MAX_RETRIES + 1):
             try:
-                response = requests.get(api_url, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-
-                # API 자체 결과 코드 체크
-                result_info = data.get(SERVICE_NAME, {}).get("RESULT")
-                if not result_info or result_info.get("CODE") != "INFO-000":
-                    logger.warning(f"API 응답 오류: {result_info}")
-                    break
-
-                # 첫 호출 시 전체 개수 저장
-                if start_index == 1:
-                    total_count = data.get(SERVICE_NAME, {}).get("list_total_count", 0)
-                    if not isinstance(total_count, int):
-                        total_count = int(total_count)
-                    logger.info(f"총 정책 개수: {total_count}")
-                    if total_count == 0:
-                        logger.warning("가져올 데이터가 없습니다.")
-                        break
-
-                # 실제 데이터(row) 추출
-                policies = data.get(SERVICE_NAME, {}).get("row", [])
-                if not policies:
-                    logger.info("더 이상 가져올 데이터가 없습니다.")
-                    break
-
-                all_policies.extend(policies)
-                logger.info(
-                    f"{len(policies)}개 데이터 추가됨 (현재까지 {len(all_policies)}개)"
+                return self._fetch_page(start_index, rate_limiter)
+            except (requests.exceptions.RequestException, SeoulApiError, ValueError) as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                # 429를 제외한 4xx는 재시도해도 결과가 같으므로 즉시 실패
+                retryable = status is None or status >= 500 or status == 429
+                if not retryable or attempt == FETCH_MAX_RETRIES:
+                    raise
+                delay = random.uniform(
+                    0,
+                    min(
+                        FETCH_BACKOFF_MAX_SECONDS,
+                        FETCH_BACKOFF_BASE_SECONDS * (2**attempt),
+                    ),
                 )
+                logger.warning(
+                    f"페이지 요청 실패 (시작 위치 {start_index}, 시도 {attempt + 1}/"
+                    f"{FETCH_MAX_RETRIES + 1}): {e} - {delay:.1f}초 후 재시도"
+                )
+                time.sleep(delay)
+
+    def iter_policy_pages(
+        self, total_count, first_rows, rate_limiter, skip_starts=(), failed_starts=None
+    ):
+        """
+        서울시 Open API 페이지를 (시작 위치, 행 목록) 형태로 순서대로 yield
+        첫 페이지는 호출자가 전체 개수 확인을 위해 이미 받아온 것을 사용하고,
+        나머지 페이지는 제한된 동시성으로 미리 요청함 (동시에 진행 중인 요청 수 제한)
+        재시도 후에도 실패한 페이지는 건너뛰고 failed_starts에 기록
+        """
+        starts = [
+            start
+            for start in range(1, total_count + 1, CHUNK_SIZE)
+            if start not in skip_starts
+        ]
+        pages_fetched = len(skip_starts)
 
-                # 다음 시작 위치 계산
-                start_index += CHUNK_SIZE
-                if start_index > total_count:
-                    break
-
-                # API 부하 방지를 위한 잠시 대기
-                time.sleep(0.5)
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"HTTP 요청 오류: {e}")
-                break
-            except Exception as e:
-                logger.error(f"데이터 처리 중 오류: {e}")
-                break
-
-        logger.info(f"데이터 가져오기 완료. 총 {len(all_policies)}개")
-        return all_policies
+        if starts and starts[0] == 1:
+            starts.pop(0)
+            pages_fetched += 1
+            self._report_progress(pages_fetched=pages_fetched)
+            yield 1, first_rows
 
-    def get_existing_policies_with_hash(self):
-        """기존 DB의 정책 목록을 해시값과 함께 가져옴"""
-        conn = None
-        cursor = None
-        try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-
-            cursor.execute(
-                """
-                SELECT biz_nm, content_hash, id, updated_at 
-                FROM policies 
-                ORDER BY updated_at DESC
-            """
+        if starts:
+            logger.info(
+                f"{len(starts)}개 페이지 동시 요청 "
+                f"(동시 요청 {FETCH_MAX_WORKERS}개, 초당 최대 {FETCH_MAX_RPS}회)"
             )
 
-            existing_policies = cursor.fetchall()
-
-            # 정책명을 키로 하는 딕셔너리 생성
-            policies_dict = {}
-            for policy in existing_policies:
-                policies_dict[policy["biz_nm"]] = policy
+        with ThreadPoolExecutor(
+            max_workers=FETCH_MAX_WORKERS, thread_name_prefix="seoul-api"
+        ) as executor:
+            pending_starts = iter(starts)
+            in_flight = deque()
+
+            def submit_next():
+                start_index = next(pending_starts, None)
+                if start_index is not None:
+                    in_flight.append(
+                        (
+                            start_index,
+                            executor.submit(
+                                self._fetch_page_with_retry, start_index, rate_limiter
+                            ),
+                        )
+                    )
 
-            logger.info(f"기존 정책 {len(existing_policies)}개 조회됨")
-            return policies_dict
+            for _ in range(FETCH_MAX_WORKERS * 2):
+                submit_next()
 
-        except mysql.connector.Error as err:
-            logger.error(f"기존 정책 조회 실패: {err}")
-            return {}
+            try:
+                while in_flight:
+                    start_index, future = in_flight.popleft()
+                    submit_next()
+                    try:
+                        _, policies = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.error(f"HTTP 요청 오류 (시작 위치 {start_index}): {e}")
+                        if failed_starts is not None:
+                            failed_starts.append(start_index)
+                        continue
+                    except Exception as e:
+                        logger.error(f"데이터 처리 중 오류 (시작 위치 {start_index}): {e}")
+                        if failed_starts is not None:
+                            failed_starts.append(start_index)
+                        continue
+
+                    pages_fetched += 1
+                    self._report_progress(pages_fetched=pages_fetched)
+                    logger.info(f"{len(policies)}개 데이터 받음 (시작 위치 {start_index})")
+                    yield start_index, policies
+            finally:
+                # 소비자가 중단한 경우 아직 시작하지 않은 요청은 취소
+                for _, future in in_flight:
+                    future.cancel()
+
+    def _hash_stage(self, pages):
+        """파이프라인 2단계: 각 정책 행에 content_hash 계산 (정책명 없는 행 제외)"""
+        for start_index, rows in pages:
+            yield start_index, [
+                (policy, self.create_content_hash(policy))
+                for policy in rows
+                if policy.get("BIZ_NM")
+            ]
+
+    def _diff_stage(self, hashed_pages):
+        """
+        파이프라인 3단계: 페이지를 SYNC_BATCH_SIZE 단위 배치로 묶고,
+        배치에 포함된 정책명의 기존 해시만 조회해 신규/변경/변경없음으로 분류
+        """
+        conn = self.get_db_connection()
+        # 쓰기 단계가 커밋한 내용을 바로 볼 수 있도록 읽기 전용 연결은 autocommit 사용
+        conn.autocommit = True
+        cursor = conn.cursor()
+        rows_diffed = 0
+        try:
+            batch_pages, batch_rows = [], []
+            for start_index, rows in hashed_pages:
+                batch_pages.append(start_index)
+                batch_rows.extend(rows)
+                if len(batch_rows) >= SYNC_BATCH_SIZE:
+                    rows_diffed += len(batch_rows)
+                    yield self._diff_batch(cursor, batch_pages, batch_rows)
+                    self._report_progress(rows_diffed=rows_diffed)
+                    batch_pages, batch_rows = [], []
+
+            if batch_pages:
+                rows_diffed += len(batch_rows)
+                yield self._diff_batch(cursor, batch_pages, batch_rows)
+                self._report_progress(rows_diffed=rows_diffed)
         finally:
-            if cursor:
-                cursor.close()
-            if conn and conn.is_connected():
+            cursor.close()
+            if conn.is_connected():
                 conn.close()
 
-    def save_to_db_with_real_change_tracking(self, policies):
-        """정책을 DB에 저장하면서 실제 변경사항만 추적"""
-        conn = None
-        cursor = None
-
-        try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-
-            logger.info(f"DB 저장 시작... ({len(policies)}개)")
-
-            # 기존 정책들의 해시값 가져오기
-            existing_policies = self.get_existing_policies_with_hash()
+    def _diff_batch(self, cursor, pages, rows):
+        """배치 1개의 변경 분류 결과 생성"""
+        # 같은 배치 안에 중복된 정책명이 있으면 마지막 행 기준
+        latest = {}
+        for policy, new_hash in rows:
+            latest[policy["BIZ_NM"]] = (policy, new_hash)
+
+        existing = self._get_existing_hashes(cursor, list(latest))
+
+        batch = {"pages": pages, "new": [], "updated": [], "unchanged": []}
+        for policy_name, (policy, new_hash) in latest.items():
+            if policy_name not in existing:
+                # 완전히 새로운 정책
+                batch["new"].append((policy, new_hash))
+            elif existing[policy_name] != (new_hash, True):
+                # 내용이 변경되었거나, 비활성화됐다가 upstream에 다시 나타난 정책
+                batch["updated"].append((policy, new_hash))
+            else:
+                # 변경사항 없는 정책 - 내용은 저장하지 않고 확인 시각만 갱신
+                batch["unchanged"].append(policy_name)
+        return batch
 
-            # 저장 통계
-            stats = {
-                "new": 0,
-                "updated": 0,
-                "unchanged": 0,
-                "new_policies": [],
-                "updated_policies": [],
-            }
+    def _get_existing_hashes(self, cursor, policy_names):
+        """주어진 정책명들의 기존 상태 조회 {정책명: (content_hash, 활성 여부)}"""
+        if not policy_names:
+            return {}
+        placeholders = ", ".join(["%s"] * len(policy_names))
+        cursor.execute(
+            f"""
+            SELECT biz_nm, content_hash, is_active FROM policies
+            WHERE biz_nm IN ({placeholders})
+        """,
+            policy_names,
+        )
+        return {
+            biz_nm: (content_hash, bool(is_active))
+            for biz_nm, content_hash, is_active in cursor.fetchall()
+        }
 
-            # 테이블에 content_hash 컬럼이 없다면 추가
-            try:
+    def save_to_db_with_real_change_tracking(self, conn, batch, stats, seen_at):
+        """
+        파이프라인 4단계: 분류된 배치 1개에서 신규/변경 정책만 DB에 저장
+        SYNC_UPSERT_ROWS개씩 multi-row INSERT ... ON DUPLICATE KEY UPDATE로 묶어
+        배치 전체를 한 트랜잭션으로 커밋하고, stats에 정책별 실제 변경사항 통계를 누적
+        변경 없는 정책은 last_seen_at만 seen_at으로 갱신 (upstream 삭제 감지용)
+        """
+        changes = [("new", policy, new_hash) for policy, new_hash in batch["new"]]
+        changes += [("updated", policy, new_hash) for policy, new_hash in batch["updated"]]
+
+        cursor = conn.cursor()
+        try:
+            unchanged_names = batch["unchanged"]
+            stats["unchanged"] += len(unchanged_names)
+            if unchanged_names:
+                placeholders = ", ".join(["%s"] * len(unchanged_names))
                 cursor.execute(
-                    "ALTER TABLE policies ADD COLUMN content_hash VARCHAR(32)"
-                )
-                conn.commit()
-                logger.info("content_hash 컬럼 추가됨")
-            except mysql.connector.Error:
-                # 이미 존재하면 무시
-                pass
-
-            # INSERT ... ON DUPLICATE KEY UPDATE SQL 구문 (content_hash 포함)
-            sql = """
-            INSERT INTO policies (
-                biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm, biz_nm, biz_cn,
-                utztn_trpr_cn, utztn_mthd_cn, oper_hr_cn, aref_cn, trgt_child_age,
-                trgt_itrst, trgt_rgn, deviw_site_addr, aply_site_addr, content_hash
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            ) ON DUPLICATE KEY UPDATE
-                biz_lclsf_nm = VALUES(biz_lclsf_nm), 
-                biz_mclsf_nm = VALUES(biz_mclsf_nm),
-                biz_sclsf_nm = VALUES(biz_sclsf_nm), 
-                biz_cn = VALUES(biz_cn),
-                utztn_trpr_cn = VALUES(utztn_trpr_cn), 
-                utztn_mthd_cn = VALUES(utztn_mthd_cn),
-                oper_hr_cn = VALUES(oper_hr_cn), 
-                aref_cn = VALUES(aref_cn),
-                trgt_child_age = VALUES(trgt_child_age), 
-                trgt_itrst = VALUES(trgt_itrst),
-                trgt_rgn = VALUES(trgt_rgn), 
-                deviw_site_addr = VALUES(deviw_site_addr),
-                aply_site_addr = VALUES(aply_site_addr),
-                content_hash = VALUES(content_hash),
-                updated_at = CASE 
-                    WHEN content_hash != VALUES(content_hash) THEN CURRENT_TIMESTAMP
-                    ELSE updated_at
-                END
-            """
-
-            for policy in policies:
-                policy_name = policy.get("BIZ_NM")
-                if not policy_name:
-                    continue
-
-                # 새로운 해시값 계산
-                new_hash = self.create_content_hash(policy)
-
-                # 기존 정책 정보 확인
-                existing_policy = existing_policies.get(policy_name)
-
-                if not existing_policy:
-                    # 완전히 새로운 정책
-                    is_new = True
-                    is_updated = False
-                elif existing_policy.get("content_hash") != new_hash:
-                    # 내용이 변경된 정책
-                    is_new = False
-                    is_updated = True
-                else:
-                    # 변경사항 없는 정책
-                    is_new = False
-                    is_updated = False
-                    stats["unchanged"] += 1
-                    continue  # 저장하지 않고 넘어감
-
-                values = (
-                    policy.get("BIZ_LCLSF_NM"),
-                    policy.get("BIZ_MCLSF_NM"),
-                    policy.get("BIZ_SCLSF_NM"),
-                    policy.get("BIZ_NM"),
-                    policy.get("BIZ_CN"),
-                    policy.get("UTZTN_TRPR_CN"),
-                    policy.get("UTZTN_MTHD_CN"),
-                    policy.get("OPER_HR_CN"),
-                    policy.get("AREF_CN"),
-                    policy.get("TRGT_CHILD_AGE"),
-                    policy.get("TRGT_ITRST"),
-                    policy.get("TRGT_RGN"),
-                    policy.get("DEVIW_SITE_ADDR"),
-                    policy.get("APLY_SITE_ADDR"),
-                    new_hash,
+                    # updated_at을 명시해 ON UPDATE CURRENT_TIMESTAMP 자동 갱신을 막음
+                    f"UPDATE policies SET last_seen_at = %s, updated_at = updated_at "
+                    f"WHERE biz_nm IN ({placeholders})",
+                    [seen_at] + unchanged_names,
                 )
 
-                try:
-                    cursor.execute(sql, values)
-
-                    if is_new:
-                        stats["new"] += 1
-                        stats["new_policies"].append(
-                            {
-                                "name": policy_name,
-                                "category": policy.get("BIZ_MCLSF_NM", "기타"),
-                                "target": policy.get("UTZTN_TRPR_CN", "")[:100],
-                            }
-                        )
-                        logger.info(f"신규 정책 추가: {policy_name}")
-                    elif is_updated:
-                        stats["updated"] += 1
-                        stats["updated_policies"].append(
-                            {
-                                "name": policy_name,
-                                "category": policy.get("BIZ_MCLSF_NM", "기타"),
-                                "target": policy.get("UTZTN_TRPR_CN", "")[:100],
-                            }
-                        )
-                        logger.info(f"정책 업데이트: {policy_name}")
-
-                except mysql.connector.Error as err:
-                    logger.error(f"정책 저장 오류 ({policy_name}): {err}")
-                    continue
+            for offset in range(0, len(changes), SYNC_UPSERT_ROWS):
+                chunk = changes[offset : offset + SYNC_UPSERT_ROWS]
+                for kind, policy, _ in self._upsert_rows(cursor, chunk, seen_at):
+                    self._record_change(stats, kind, policy)
 
             conn.commit()
+            self._report_progress(rows_written=stats["new"] + stats["updated"])
+        finally:
+            cursor.close()
 
-            # 저장 결과 로깅
-            logger.info(
-                f"""
+    def _upsert_rows(self, cursor, chunk, seen_at):
+        """
+        chunk를 multi-row INSERT 한 문장으로 저장하고 저장된 항목 목록 반환
+        문장 전체가 실패하면 문제 행만 제외하기 위해 행 단위로 다시 저장
+        """
+        params = []
+        for _, policy, new_hash in chunk:
+            params.extend(self._policy_values(policy, new_hash, seen_at))
+
+        try:
+            cursor.execute(build_upsert_sql(len(chunk)), params)
+            return chunk
+        except mysql.connector.Error as err:
+            if len(chunk) == 1:
+                logger.error(f"정책 저장 오류 ({chunk[0][1].get('BIZ_NM')}): {err}")
+                return []
+            logger.warning(f"일괄 저장 실패 ({len(chunk)}개) - 행 단위로 재시도: {err}")
+
+        written = []
+        for item in chunk:
+            written.extend(self._upsert_rows(cursor, [item], seen_at))
+        return written
+
+    def _record_change(self, stats, kind, policy):
+        """저장된 신규/변경 정책 1건을 통계에 반영"""
+        policy_name = policy.get("BIZ_NM")
+        stats[kind] += 1
+        stats["changed_names"][kind].append(policy_name)
+        samples = stats[f"{kind}_policies"]
+        if len(samples) < STATS_SAMPLE_SIZE:
+            samples.append(
+                {
+                    "name": policy_name,
+                    "category": policy.get("BIZ_MCLSF_NM", "기타"),
+                    "target": (policy.get("UTZTN_TRPR_CN") or "")[:100],
+                }
+            )
+        if kind == "new":
+            logger.info(f"신규 정책 추가: {policy_name}")
+        else:
+            logger.info(f"정책 업데이트: {policy_name}")
+
+    @staticmethod
+    def _policy_values(policy, content_hash, seen_at):
+        """POLICY_UPSERT_COLUMNS 순서에 맞춘 값 튜플 (분류 컬럼은 NULL 대신 '')"""
+        return (
+            policy.get("BIZ_LCLSF_NM") or "",
+            policy.get("BIZ_MCLSF_NM") or "",
+            policy.get("BIZ_SCLSF_NM") or "",
+            policy.get("BIZ_NM"),
+            policy.get("BIZ_CN"),
+            policy.get("UTZTN_TRPR_CN"),
+            policy.get("UTZTN_MTHD_CN"),
+            policy.get("OPER_HR_CN"),
+            policy.get("AREF_CN"),
+            policy.get("TRGT_CHILD_AGE"),
+            policy.get("TRGT_ITRST"),
+            policy.get("TRGT_RGN"),
+            policy.get("DEVIW_SITE_ADDR"),
+            policy.get("APLY_SITE_ADDR"),
+            content_hash,
+            True,  # is_active - upstream에서 확인된 정책
+            seen_at,
+        )
+
+    def _log_save_summary(self, stats):
+        """저장 결과 로깅"""
+        logger.info(
+            f"""
 DB 저장 완료:
 - 신규 정책: {stats['new']}개
 - 실제 업데이트: {stats['updated']}개  
 - 변경 없음: {stats['unchanged']}개
+- 비활성화(upstream 삭제): {stats['deleted']}개
 """
-            )
-
-            # 변경사항이 있는 경우만 자세히 로깅
-            if stats["new_policies"]:
-                logger.info("신규 정책 목록:")
-                for policy in stats["new_policies"][:5]:
-                    logger.info(f"  - {policy['name']} ({policy['category']})")
-                if len(stats["new_policies"]) > 5:
-                    logger.info(f"  ... 외 {len(stats['new_policies']) - 5}개 더")
-
-            if stats["updated_policies"]:
-                logger.info("업데이트된 정책 목록:")
-                for policy in stats["updated_policies"][:5]:
-                    logger.info(f"  - {policy['name']} ({policy['category']})")
-                if len(stats["updated_policies"]) > 5:
-                    logger.info(f"  ... 외 {len(stats['updated_policies']) - 5}개 더")
+        )
+
+        # 변경사항이 있는 경우만 자세히 로깅
+        if stats["new_policies"]:
+            logger.info("신규 정책 목록:")
+            for policy in stats["new_policies"]:
+                logger.info(f"  - {policy['name']} ({policy['category']})")
+            if stats["new"] > len(stats["new_policies"]):
+                logger.info(f"  ... 외 {stats['new'] - len(stats['new_policies'])}개 더")
+
+        if stats["updated_policies"]:
+            logger.info("업데이트된 정책 목록:")
+            for policy in stats["updated_policies"]:
+                logger.info(f"  - {policy['name']} ({policy['category']})")
+            if stats["updated"] > len(stats["updated_policies"]):
+                logger.info(
+                    f"  ... 외 {stats['updated'] - len(stats['updated_policies'])}개 더"
+                )
 
-            return stats
+    def refresh_recent_feed(self):
+        """
+        최근 RECENT_FEED_MAX_DAYS일 내 변경된 활성 정책 상위 RECENT_FEED_MAX_ITEMS개를
+        JSON으로 직렬화해 materialized_feeds 테이블에 저장 (앱은 메모리에 올려 응답)
+        저장한 피드의 ETag 반환
+        """
+        recent_policies = self.get_truly_recent_policies(
+            days=RECENT_FEED_MAX_DAYS, limit=RECENT_FEED_MAX_ITEMS, raise_errors=True
+        )
+        payload = json.dumps(
+            recent_policies,
+            ensure_ascii=False,
+            default=lambda value: value.isoformat(),
+        )
+        etag = hashlib.md5(payload.encode("utf-8")).hexdigest()
 
-        except mysql.connector.Error as err:
-            logger.error(f"DB 저장 실패: {err}")
-            if conn:
-                conn.rollback()
-            return None
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO materialized_feeds (feed_name, etag, payload)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE etag = VALUES(etag), payload = VALUES(payload)
+            """,
+                (RECENT_FEED_NAME, etag, payload),
+            )
+            conn.commit()
+            logger.info(f"최근 변경 피드 갱신: {len(recent_policies)}개 (ETag {etag[:8]})")
+            return etag
         finally:
             if cursor:
                 cursor.close()
             if conn and conn.is_connected():
                 conn.close()
 
-    def get_truly_recent_policies(self, days=7):
+    def get_truly_recent_policies(self, days=7, limit=50, raise_errors=False):
         """실제로 최근에 변경된 정책만 조회"""
         conn = None
         cursor = None
@@ -357,6 +961,7 @@ DB 저장 완료:
             cursor = conn.cursor(dictionary=True)
 
             # 최근 N일 내에 실제로 생성되거나 업데이트된 정책만
+            # (is_active, last_changed_at) 인덱스 범위 스캔 + 인덱스 순서 정렬
             cutoff_date = datetime.now() - timedelta(days=days)
 
             cursor.execute(
@@ -366,21 +971,14 @@ DB 저장 완료:
                     biz_lclsf_nm, biz_mclsf_nm, biz_sclsf_nm,
                     trgt_child_age, trgt_rgn, deviw_site_addr, aply_site_addr,
                     created_at, updated_at,
-                    CASE 
-                        WHEN created_at >= %s THEN 'new'
-                        WHEN updated_at >= %s AND updated_at > created_at THEN 'updated'
-                        ELSE 'existing'
-                    END as policy_status,
-                    CASE 
-                        WHEN created_at >= %s THEN created_at 
-                        ELSE updated_at 
-                    END as recent_date
+                    change_kind AS policy_status,
+                    last_changed_at AS recent_date
                 FROM policies 
-                WHERE (created_at >= %s) OR (updated_at >= %s AND updated_at > created_at)
-                ORDER BY recent_date DESC
-                LIMIT 50
+                WHERE is_active = TRUE AND last_changed_at >= %s
+                ORDER BY last_changed_at DESC
+                LIMIT %s
             """,
-                (cutoff_date, cutoff_date, cutoff_date, cutoff_date, cutoff_date),
+                (cutoff_date, limit),
             )
 
             recent_policies = cursor.fetchall()
@@ -391,6 +989,8 @@ DB 저장 완료:
 
         except mysql.connector.Error as err:
             logger.error(f"최근 정책 조회 실패: {err}")
+            if raise_errors:
+                raise
             return []
         finally:
             if cursor:
@@ -398,70 +998,487 @@ DB 저장 완료:
             if conn and conn.is_connected():
                 conn.close()
 
-    def sync_policies(self):
-        """정책 동기화 메인 함수 (실제 변경사항만 추적)"""
+    def _deactivate_unseen(self, conn, seen_at):
+        """
+        seen_at 이후 upstream 조회에서 확인되지 않은 활성 정책을 비활성화 (소프트 삭제)
+        비활성화 대상이 활성 정책의 SYNC_MAX_DEACTIVATE_RATIO 이상이면 API 이상으로 보고 건너뜀
+        비활성화한 정책 ID 목록 반환
+        """
+        cursor = conn.cursor()
         try:
-            logger.info("=== 정책 동기화 시작 ===")
+            cursor.execute(
+                """
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(last_seen_at IS NULL OR last_seen_at < %s), 0)
+                FROM policies
+                WHERE is_active = TRUE
+            """,
+                (seen_at,),
+            )
+            active_count, unseen_count = cursor.fetchone()
+            unseen_count = int(unseen_count)
+            if not unseen_count:
+                return []
+            if unseen_count >= active_count * SYNC_MAX_DEACTIVATE_RATIO:
+                logger.warning(
+                    f"upstream에서 사라진 정책이 {unseen_count}/{active_count}개로 너무 많아 "
+                    f"비활성화를 건너뜀 (API 응답 이상 가능성)"
+                )
+                return []
+
+            cursor.execute(
+                """
+                SELECT id FROM policies
+                WHERE is_active = TRUE
+                  AND (last_seen_at IS NULL OR last_seen_at < %s)
+            """,
+                (seen_at,),
+            )
+            unseen_ids = [row[0] for row in cursor.fetchall()]
+            for offset in range(0, len(unseen_ids), SYNC_BATCH_SIZE):
+                chunk = unseen_ids[offset : offset + SYNC_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"""
+                    UPDATE policies
+                    SET is_active = FALSE,
+                        change_kind = 'deleted',
+                        last_changed_at = CURRENT_TIMESTAMP
+                    WHERE id IN ({placeholders})
+                """,
+                    chunk,
+                )
+            conn.commit()
+            logger.info(f"upstream에서 사라진 정책 {len(unseen_ids)}개 비활성화")
+            return unseen_ids
+        finally:
+            cursor.close()
+
+    def _new_stats(self):
+        """동기화 통계 초기값"""
+        return {
+            "new": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "deleted": 0,
+            "new_policies": [],
+            "updated_policies": [],
+            # 변경 이벤트 발행용 (정책명은 발행 시 ID로 변환)
+            "changed_names": {"new": [], "updated": []},
+            "deleted_ids": [],
+        }
+
+    def _sync_with_batch_diff(self, total_count, first_rows, rate_limiter):
+        """
+        배치 비교 모드: 조회 → 해시 → 배치별 기존 해시 비교 → 배치 저장 스트리밍 파이프라인
+        DB 반영이 끝난 페이지는 체크포인트에 기록되어 중단 시 이어받음
+        (stats, 전체 페이지 반영 여부) 반환
+        """
+        checkpoint = SyncCheckpoint()
+        try:
+            completed_starts = checkpoint.load(total_count)
+        except OSError as e:
+            logger.warning(f"체크포인트 사용 불가 (이어받기 없이 진행): {e}")
+            checkpoint = None
+            completed_starts = set()
+        # 이어받은 실행도 같은 기준 시각을 써야 이전 실행에서 반영한 페이지가 '확인됨'으로 남음
+        # (TIMESTAMP 컬럼의 초 단위 반올림과 어긋나지 않도록 마이크로초 제거)
+        seen_at = (
+            checkpoint.started_at if checkpoint else datetime.now()
+        ).replace(microsecond=0)
+
+        failed_starts = []
+        pages = _pipeline_stage(
+            self.iter_policy_pages(
+                total_count,
+                first_rows,
+                rate_limiter,
+                skip_starts=completed_starts,
+                failed_starts=failed_starts,
+            ),
+            name="sync-fetch",
+        )
+        batches = _pipeline_stage(
+            self._diff_stage(self._hash_stage(pages)), name="sync-diff"
+        )
+
+        stats = self._new_stats()
+        conn = None
+        try:
+            conn = self.get_db_connection()
+            for batch in batches:
+                self.save_to_db_with_real_change_tracking(conn, batch, stats, seen_at)
+                if checkpoint:
+                    try:
+                        checkpoint.mark_completed(batch["pages"])
+                    except OSError as e:
+                        logger.warning(f"체크포인트 저장 실패: {e}")
+
+            # 전체 목록을 다 받은 경우에만 이번 조회에서 보이지 않은 정책을 비활성화
+            if not failed_starts:
+                stats["deleted_ids"] = self._deactivate_unseen(conn, seen_at)
+                stats["deleted"] = len(stats["deleted_ids"])
+        except mysql.connector.Error:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            batches.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+        is_complete = not failed_starts
+        if is_complete and checkpoint:
+            checkpoint.clear()
+        elif not is_complete:
+            logger.warning(
+                f"{len(failed_starts)}개 페이지를 가져오지 못함 "
+                f"(다음 실행 시 체크포인트에서 이어받음)"
+            )
+        return stats, is_complete
+
+    def _sync_with_staging_table(self, total_count, first_rows, rate_limiter):
+        """
+        스테이징 테이블 모드: 받은 행과 해시를 임시 테이블에 일괄 적재한 뒤
+        신규/변경/변경없음/삭제 집합을 biz_nm, content_hash 조인으로 계산하고
+        변경 종류별 INSERT ... SELECT 한 문장씩으로 반영 (Python 쪽 비교 없음)
+        임시 테이블은 연결 세션에 묶여 있으므로 체크포인트 이어받기 없이 전체를 받음
+        (stats, 전체 페이지 반영 여부) 반환
+        """
+        failed_starts = []
+        pages = _pipeline_stage(
+            self.iter_policy_pages(
+                total_count, first_rows, rate_limiter, failed_starts=failed_starts
+            ),
+            name="sync-fetch",
+        )
+        hashed_pages = self._hash_stage(pages)
+        seen_at = datetime.now().replace(microsecond=0)
+
+        stats = self._new_stats()
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_db_connection()
+            cursor = conn.cursor()
+
+            # 1. 스테이징 테이블 적재 (upstream 중복 정책명은 마지막 행 기준)
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS policies_staging")
+            cursor.execute("CREATE TEMPORARY TABLE policies_staging LIKE policies")
+            rows_loaded = 0
+            for _, rows in hashed_pages:
+                for offset in range(0, len(rows), SYNC_UPSERT_ROWS):
+                    chunk = rows[offset : offset + SYNC_UPSERT_ROWS]
+                    params = []
+                    for policy, new_hash in chunk:
+                        params.extend(self._policy_values(policy, new_hash, seen_at))
+                    cursor.execute(
+                        build_upsert_sql(len(chunk), table="policies_staging"), params
+                    )
+                rows_loaded += len(rows)
+                self._report_progress(rows_diffed=rows_loaded)
+            logger.info(f"스테이징 테이블 적재 완료: {rows_loaded}개")
+
+            # 2. 조인으로 변경 집합 계산
+            for kind, condition in STAGING_DIFF_CONDITIONS.items():
+                cursor.execute(
+                    f"""
+                    SELECT COUNT(*) FROM policies_staging s
+                    LEFT JOIN policies p ON p.biz_nm = s.biz_nm
+                    WHERE {condition}
+                """
+                )
+                stats[kind] = cursor.fetchone()[0]
+
+            for kind in ("new", "updated"):
+                cursor.execute(
+                    f"""
+                    SELECT s.biz_nm, s.biz_mclsf_nm, s.utztn_trpr_cn
+                    FROM policies_staging s
+                    LEFT JOIN policies p ON p.biz_nm = s.biz_nm
+                    WHERE {STAGING_DIFF_CONDITIONS[kind]}
+                    LIMIT {STATS_SAMPLE_SIZE}
+                """
+                )
+                stats[f"{kind}_policies"] = [
+                    {
+                        "name": biz_nm,
+                        "category": category or "기타",
+                        "target": (target or "")[:100],
+                    }
+                    for biz_nm, category, target in cursor.fetchall()
+                ]
+
+            # 3. 변경 종류별로 INSERT ... SELECT 한 문장씩 반영
+            staged_columns = ", ".join(f"s.{col}" for col in POLICY_UPSERT_COLUMNS)
+            for kind in ("new", "updated"):
+                if not stats[kind]:
+                    continue
+                cursor.execute(
+                    f"""
+                    SELECT s.biz_nm FROM policies_staging s
+                    LEFT JOIN policies p ON p.biz_nm = s.biz_nm
+                    WHERE {STAGING_DIFF_CONDITIONS[kind]}
+                """
+                )
+                stats["changed_names"][kind] = [row[0] for row in cursor.fetchall()]
+                # UPDATE 절은 policies 컬럼을 모두 테이블명으로 한정하므로 SELECT 쪽 같은 이름 컬럼과 모호하지 않음
+                cursor.execute(
+                    f"""
+                    INSERT INTO policies ({', '.join(POLICY_UPSERT_COLUMNS)})
+                    SELECT * FROM (
+                        SELECT {staged_columns}
+                        FROM policies_staging s
+                        LEFT JOIN policies p ON p.biz_nm = s.biz_nm
+                        WHERE {STAGING_DIFF_CONDITIONS[kind]}
+                    ) AS changed
+                    {build_upsert_update_clause("policies")}
+                """
+                )
+            # 변경 없는 정책은 확인 시각만 갱신
+            if stats["unchanged"]:
+                cursor.execute(
+                    """
+                    UPDATE policies p
+                    JOIN policies_staging s ON s.biz_nm = p.biz_nm
+                    SET p.last_seen_at = s.last_seen_at, p.updated_at = p.updated_at
+                """
+                )
+            conn.commit()
+            self._report_progress(rows_written=stats["new"] + stats["updated"])
+
+            # 전체 목록을 다 받은 경우에만 스테이징에 없는 정책을 비활성화
+            if not failed_starts:
+                stats["deleted_ids"] = self._deactivate_unseen(conn, seen_at)
+                stats["deleted"] = len(stats["deleted_ids"])
+
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS policies_staging")
+        except mysql.connector.Error:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            pages.close()
+            if cursor:
+                cursor.close()
+            if conn and conn.is_connected():
+                conn.close()
+
+        is_complete = not failed_starts
+        if not is_complete:
+            logger.warning(f"{len(failed_starts)}개 페이지를 가져오지 못함")
+        return stats, is_complete
+
+    def sync_policies(self, diff_mode=None, use_probe=False):
+        """
+        정책 동기화 메인 함수 (실제 변경사항만 추적)
+        use_probe: True이면 첫/마지막 페이지 지문을 먼저 비교해 upstream 변경이 없으면
+                   전체 페이지 조회를 생략 (스케줄 동기화에서 사용)
+        diff_mode:
+            "batch"   - API 조회 → 해시 계산 → 변경 비교 → 배치 저장을 크기 제한 큐로 연결한
+                        스트리밍 파이프라인 (기본값, 중단 시 체크포인트에서 이어받음)
+            "staging" - 임시 스테이징 테이블 적재 후 조인으로 변경 집합 계산 (대용량용)
+        """
+        diff_mode = diff_mode or SYNC_DIFF_MODE
+        try:
+            logger.info(f"=== 정책 동기화 시작 (비교 방식: {diff_mode}) ===")
             start_time = datetime.now()
+            self._report_progress(phase="fetching")
 
-            # 1. 서울시 API에서 데이터 가져오기
-            policies = self.fetch_seoul_policies()
-            if not policies:
+            # 1. 첫 페이지로 전체 개수 확인
+            rate_limiter = RateLimiter(FETCH_MAX_RPS)
+            try:
+                total_count, first_rows = self._fetch_page_with_retry(1, rate_limiter)
+            except Exception as e:
+                logger.error(f"첫 페이지 조회 실패: {e}")
+                total_count, first_rows = 0, []
+
+            logger.info(f"총 정책 개수: {total_count}")
+            if total_count == 0 or not first_rows:
                 logger.warning("가져온 정책 데이터가 없습니다.")
                 return {
                     "success": False,
                     "message": "API에서 데이터를 가져올 수 없습니다.",
                 }
+            self._report_progress(
+                total_rows=total_count, total_pages=-(-total_count // CHUNK_SIZE)
+            )
+
+            # 변경 감지 프로브 - 변경이 없으면 HTTP 2회로 종료
+            fingerprint = self._upstream_fingerprint(
+                total_count, first_rows, rate_limiter
+            )
+            if use_probe and self._probe_unchanged(fingerprint):
+                logger.info("프로브 결과 upstream 변경 없음 - 전체 동기화 생략")
+                stats = self._new_stats()
+                stats["unchanged"] = total_count
+                return {
+                    "success": True,
+                    "skipped_by_probe": True,
+                    "message": "동기화 완료: 새로운 변경사항이 없습니다. (변경 감지 프로브)",
+                    "stats": stats,
+                    "total_changes": 0,
+                }
 
-            # 2. DB에 저장하면서 실제 변경사항만 추적
-            stats = self.save_to_db_with_real_change_tracking(policies)
-            if stats is None:
-                logger.error("DB 저장 실패")
+            # 2. 변경사항 비교 및 저장
+            self._report_progress(phase="syncing")
+            try:
+                if diff_mode == "staging":
+                    stats, is_complete = self._sync_with_staging_table(
+                        total_count, first_rows, rate_limiter
+                    )
+                else:
+                    stats, is_complete = self._sync_with_batch_diff(
+                        total_count, first_rows, rate_limiter
+                    )
+            except mysql.connector.Error as err:
+                logger.error(f"DB 저장 실패: {err}")
                 return {"success": False, "message": "데이터베이스 저장 실패"}
 
+            self._log_save_summary(stats)
+
+            # 반영된 변경을 구독자(앱 캐시/인덱스)에 알림 - 부분 동기화도 반영분은 발행
+            # (구독자가 이벤트를 받고 다시 읽을 수 있도록 최근 변경 피드를 먼저 갱신)
+            generation = None
+            if stats["new"] or stats["updated"] or stats["deleted"]:
+                try:
+                    self.refresh_recent_feed()
+                except mysql.connector.Error as err:
+                    logger.warning(f"최근 변경 피드 갱신 실패: {err}")
+            try:
+                generation = self.publish_corpus_change(stats)
+            except mysql.connector.Error as err:
+                logger.warning(f"정책 변경 이벤트 발행 실패: {err}")
+
+            # 전체 페이지를 반영한 경우에만 다음 프로브 비교 기준 갱신
+            if is_complete and fingerprint:
+                try:
+                    self.set_sync_metadata(
+                        {
+                            "upstream_fingerprint": fingerprint,
+                            "last_full_sync_at": datetime.now().isoformat(),
+                        }
+                    )
+                except mysql.connector.Error as err:
+                    logger.warning(f"동기화 지문 저장 실패: {err}")
+
             # 3. 소요 시간 계산
             end_time = datetime.now()
             duration = end_time - start_time
 
             # 4. 결과 메시지 생성
-            total_changes = stats["new"] + stats["updated"]
-            if total_changes == 0:
+            total_changes = stats["new"] + stats["updated"] + stats["deleted"]
+            if not is_complete:
+                # 일부 페이지를 받지 못한 경우 - 받은 데이터는 저장하되 성공으로 취급하지 않음
+                message = (
+                    f"부분 동기화: 일부 페이지를 가져오지 못했습니다 "
+                    f"(신규 {stats['new']}개, 업데이트 {stats['updated']}개 반영). "
+                    f"다음 동기화에서 이어서 진행합니다."
+                )
+            elif total_changes == 0:
                 message = "동기화 완료: 새로운 변경사항이 없습니다."
             else:
                 message = (
                     f"동기화 완료: 신규 {stats['new']}개, 업데이트 {stats['updated']}개"
                 )
+                if stats["deleted"]:
+                    message += f", 삭제 {stats['deleted']}개"
 
             logger.info(
                 f"""
-=== 정책 동기화 완료 ===
+=== 정책 동기화 {'완료' if is_complete else '부분 완료'} ===
 소요 시간: {duration.total_seconds():.1f}초
-처리된 정책: {len(policies)}개
+처리된 정책: {stats['new'] + stats['updated'] + stats['unchanged']}개
 신규 정책: {stats['new']}개
 실제 업데이트: {stats['updated']}개
 변경 없음: {stats['unchanged']}개
+비활성화(upstream 삭제): {stats['deleted']}개
 """
             )
 
             return {
-                "success": True,
+                "success": is_complete,
+                "partial": not is_complete,
                 "message": message,
                 "stats": stats,
                 "total_changes": total_changes,
+                "generation": generation,
             }
 
         except Exception as e:
             logger.error(f"정책 동기화 실패: {e}")
             return {"success": False, "message": f"동기화 실패: {str(e)}"}
 
+    def sync_policies_exclusive(self):
+        """다른 프로세스와 겹치지 않도록 동기화 락을 잡은 상태에서만 동기화 실행"""
+        with self.sync_lock() as acquired:
+            if not acquired:
+                logger.info("다른 프로세스에서 동기화가 진행 중이어서 건너뜀")
+                return {
+                    "success": False,
+                    "skipped": True,
+                    "message": "다른 프로세스에서 동기화가 진행 중입니다.",
+                }
+            return self.sync_policies()
+
+    def run_scheduled_sync(self, slot_time):
+        """
+        스케줄 동기화 실행 (slot_time: "HH:MM" 형식의 예약 시각)
+        모든 프로세스가 같은 시각에 호출하지만 락을 얻은 리더 프로세스만 실행하고,
+        같은 회차가 이미 기록돼 있으면 늦게 깨어난 프로세스는 건너뜀
+        예외가 schedule.run_pending()까지 올라가면 스케줄러 루프가 끝나므로 여기서 모두 처리
+        """
+        try:
+            self._run_scheduled_sync(slot_time)
+        except Exception as e:
+            logger.error(f"[{slot_time}] 스케줄 동기화 처리 중 예기치 않은 오류: {e}")
+
+    def _run_scheduled_sync(self, slot_time):
+        hour, minute = (int(part) for part in slot_time.split(":"))
+        slot_start = datetime.now().replace(
+            hour=hour, minute=minute, second=0, microsecond=0
+        )
+
+        with self.sync_lock() as acquired:
+            if not acquired:
+                logger.info(f"[{slot_time}] 다른 프로세스가 스케줄 동기화 실행 중 - 건너뜀")
+                return
+
+            try:
+                if self.has_scheduled_sync_since(slot_start):
+                    logger.info(f"[{slot_time}] 이번 회차 스케줄 동기화가 이미 완료됨 - 건너뜀")
+                    return
+            except mysql.connector.Error as err:
+                logger.error(f"스케줄 동기화 이력 확인 실패: {err}")
+                return
+
+            logger.info(f"[{slot_time}] 스케줄 동기화 리더로 선출됨 - 동기화 시작")
+            start_time = datetime.now()
+            try:
+                result = self.sync_policies(use_probe=True)
+            except Exception as e:
+                # 리더가 실패한 회차도 sync_logs에 실패로 남김
+                logger.error(f"[{slot_time}] 스케줄 동기화 실패: {e}")
+                result = {"success": False, "message": f"동기화 실패: {str(e)}"}
+            duration = (datetime.now() - start_time).total_seconds()
+
+            self.save_sync_log(
+                "scheduled",
+                stats=result.get("stats"),
+                duration_seconds=duration,
+                success=result["success"],
+                error_message=None if result["success"] else result.get("message"),
+                partial=result.get("partial", False),
+            )
+
 
-# 기존 스케줄러 코드는 동일...
 def setup_scheduler():
-    """자동 스케줄링 설정"""
+    """자동 스케줄링 설정 (각 회차는 프로세스 간 리더 선출 후 한 번만 실행)"""
     policy_service = PolicySyncService()
 
-    schedule.every().day.at("06:00").do(policy_service.sync_policies)
-    schedule.every().monday.at("09:00").do(policy_service.sync_policies)
+    schedule.every().day.at("06:00").do(policy_service.run_scheduled_sync, "06:00")
+    schedule.every().monday.at("09:00").do(policy_service.run_scheduled_sync, "09:00")
 
     logger.info("자동 스케줄링 설정 완료:")
     logger.info("- 매일 오전 6시 정책 동기화")
@@ -494,7 +1511,8 @@ if __name__ == "__main__":
         command = sys.argv[1]
 
         if command == "sync":
-            result = policy_service.sync_policies()
+            diff_mode = sys.argv[2] if len(sys.argv) > 2 else None
+            result = policy_service.sync_policies(diff_mode=diff_mode)
             print(f"동기화 결과: {result['message']}")
 
         elif command == "recent":
@@ -516,6 +1534,7 @@ if __name__ == "__main__":
         else:
             print("사용법:")
             print("  python sync_data.py sync     # 즉시 동기화")
+            print("  python sync_data.py sync staging # 스테이징 테이블 비교 방식으로 동기화")
             print("  python sync_data.py recent   # 최근 7일 정책 조회")
             print("  python sync_data.py recent 3 # 최근 3일 정책 조회")
             print("  python sync_data.py auto     # 자동 스케줄링 시작")
@@ -154,7 +154,7 @@ def run_enhanced_rag_tests():
         
         try:
             # API 호출
-            response = requests.post(api_url, headers=headers, json=scenario['data'], timeout=45)
+            response = requests.post(api_url, headers=headers, json={**scenario['data'], "detail": "full"}, timeout=45)
             response.raise_for_status()
             
             response_data = response.json()